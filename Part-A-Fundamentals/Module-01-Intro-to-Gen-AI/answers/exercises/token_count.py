@@ -1,7 +1,12 @@
-import tiktoken
+import sys
+from pathlib import Path
+
+# Reuse the shared encoding registry from the examples folder
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "examples"))
+from token_counting import get_encoding
 
 def count_tokens(text: str, model: str) -> int:
-    encoding = tiktoken.encoding_for_model(model)
+    encoding = get_encoding(model)
     tokens = encoding.encode(text)
     return len(tokens)
 
@@ -18,13 +18,32 @@ Setup:
 """
 
 import os
-from typing import Optional
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
 from dotenv import load_dotenv
 
+from llm_clients import (
+    API_MODEL_NAMES,
+    get_anthropic_client,
+    get_async_anthropic_client,
+    get_async_openai_client,
+    get_openai_client,
+    provider_for,
+)
+from llm_metrics import get_registry, instrumented, print_metrics
+from rate_limiter import estimate_request_tokens, get_default_limiter, rate_limited
+from response_cache import cached_llm_call
+from single_flight import coalesced
+
 # Load environment variables from .env file
 load_dotenv()
 
 
+@cached_llm_call
+@coalesced
+@rate_limited
+@instrumented("openai")
 def call_openai(
     prompt: str,
     model: str = "gpt-3.5-turbo",
@@ -34,15 +53,21 @@ def call_openai(
     """
     Make a basic API call to OpenAI's GPT models.
     
+    Repeated calls at temperature <= 0.3 are served from the response
+    cache (see response_cache.py), identical concurrent calls share one
+    request (see single_flight.py), requests wait for rate-limit
+    capacity (see rate_limiter.py), and every request is recorded in
+    the metrics registry (see llm_metrics.py).
+    
     Args:
         prompt: The user's input text
         model: Model identifier (e.g., "gpt-3.5-turbo", "gpt-4")
         temperature: Randomness control (0.0-2.0)
         max_tokens: Maximum tokens in response
-        
+    
     Returns:
         dict: Response containing text and usage information
-        
+    
     Example output:
         {
             'text': 'Paris is the capital of France...',
@@ -52,42 +77,51 @@ def call_openai(
             'total_tokens': 57
         }
     """
-    from openai import OpenAI
-    
-    # Initialize client with API key from environment
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    # Shared client: reuses pooled connections across calls
+    client = get_openai_client()
     
     try:
         # Make API call
         response = client.chat.completions.create(
             model=model,
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a helpful assistant."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
+            messages=_openai_messages(prompt),
             temperature=temperature,
             max_tokens=max_tokens
         )
-        
-        # Extract and return relevant information
-        return {
-            'text': response.choices[0].message.content,
-            'model': response.model,
-            'input_tokens': response.usage.prompt_tokens,
-            'output_tokens': response.usage.completion_tokens,
-            'total_tokens': response.usage.total_tokens
-        }
-        
+        return _openai_result(response)
+    
     except Exception as e:
-        return {'error': str(e)}
+        return {'error': str(e), 'error_type': type(e).__name__}
+
+
+def _openai_messages(prompt: str) -> List[Dict[str, str]]:
+    return [
+        {
+            "role": "system",
+            "content": "You are a helpful assistant."
+        },
+        {
+            "role": "user",
+            "content": prompt
+        }
+    ]
 
 
+def _openai_result(response) -> dict:
+    # Extract and return relevant information
+    return {
+        'text': response.choices[0].message.content,
+        'model': response.model,
+        'input_tokens': response.usage.prompt_tokens,
+        'output_tokens': response.usage.completion_tokens,
+        'total_tokens': response.usage.total_tokens
+    }
+
+
+@cached_llm_call
+@coalesced
+@rate_limited
+@instrumented("anthropic")
 def call_anthropic(
     prompt: str,
     model: str = "claude-3-haiku-20240307",
@@ -97,15 +131,21 @@ def call_anthropic(
     """
     Make a basic API call to Anthropic's Claude models.
     
+    Repeated calls at temperature <= 0.3 are served from the response
+    cache (see response_cache.py), identical concurrent calls share one
+    request (see single_flight.py), requests wait for rate-limit
+    capacity (see rate_limiter.py), and every request is recorded in
+    the metrics registry (see llm_metrics.py).
+    
     Args:
         prompt: The user's input text
         model: Model identifier (e.g., "claude-3-haiku-20240307")
         temperature: Randomness control (0.0-1.0)
         max_tokens: Maximum tokens in response
-        
+    
     Returns:
         dict: Response containing text and usage information
-        
+    
     Example output:
         {
             'text': 'Paris is the capital and largest city of France...',
@@ -115,10 +155,8 @@ def call_anthropic(
             'total_tokens': 63
         }
     """
-    from anthropic import Anthropic
-    
-    # Initialize client with API key from environment
-    client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+    # Shared client: reuses pooled connections across calls
+    client = get_anthropic_client()
     
     try:
         # Make API call
@@ -133,18 +171,559 @@ def call_anthropic(
                 }
             ]
         )
+        return _anthropic_result(response)
+    
+    except Exception as e:
+        return {'error': str(e), 'error_type': type(e).__name__}
+
+
+def _anthropic_result(response) -> dict:
+    # Extract and return relevant information
+    return {
+        'text': response.content[0].text,
+        'model': response.model,
+        'input_tokens': response.usage.input_tokens,
+        'output_tokens': response.usage.output_tokens,
+        'total_tokens': response.usage.input_tokens + response.usage.output_tokens
+    }
+
+
+@coalesced
+@rate_limited
+@instrumented("openai")
+async def acall_openai(
+    prompt: str,
+    model: str = "gpt-3.5-turbo",
+    temperature: float = 0.7,
+    max_tokens: int = 150
+) -> dict:
+    """
+    Async version of call_openai(); returns the same dict.
+    """
+    client = get_async_openai_client()
+    
+    try:
+        response = await client.chat.completions.create(
+            model=model,
+            messages=_openai_messages(prompt),
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+        return _openai_result(response)
+    
+    except Exception as e:
+        return {'error': str(e), 'error_type': type(e).__name__}
+
+
+@coalesced
+@rate_limited
+@instrumented("anthropic")
+async def acall_anthropic(
+    prompt: str,
+    model: str = "claude-3-haiku-20240307",
+    temperature: float = 0.7,
+    max_tokens: int = 150
+) -> dict:
+    """
+    Async version of call_anthropic(); returns the same dict.
+    """
+    client = get_async_anthropic_client()
+    
+    try:
+        response = await client.messages.create(
+            model=model,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            messages=[{"role": "user", "content": prompt}]
+        )
+        return _anthropic_result(response)
+    
+    except Exception as e:
+        return {'error': str(e), 'error_type': type(e).__name__}
+
+
+ASYNC_CALLS = {
+    "openai": acall_openai,
+    "anthropic": acall_anthropic,
+}
+
+# The same calls without @coalesced, for callers that cancel requests
+# (see hedging.py): a coalesced call shields the shared request, so
+# cancelling the caller leaves the request running
+UNCOALESCED_ASYNC_CALLS = {provider: call.__wrapped__ for provider, call in ASYNC_CALLS.items()}
+
+
+async def acall_model(prompt: str, model: str = "gpt-3.5-turbo", **kwargs) -> dict:
+    """
+    Async call to whichever provider serves a model.
+    
+    Args:
+        prompt: The user's input text
+        model: PRICING_DATA or API model name (e.g. "claude-3-haiku")
+        **kwargs: Passed to acall_openai()/acall_anthropic()
+            (temperature, max_tokens)
+    
+    Returns:
+        dict: Same as acall_openai()/acall_anthropic()
+    """
+    api_model = API_MODEL_NAMES.get(model, model)
+    return await ASYNC_CALLS[provider_for(api_model)](prompt, model=api_model, **kwargs)
+
+
+ASYNC_CLIENTS = {
+    "openai": get_async_openai_client,
+    "anthropic": get_async_anthropic_client,
+}
+
+
+async def afan_out(
+    prompt: str,
+    targets: List[Tuple[str, str]],
+    concurrency: int = 8,
+    **kwargs
+) -> Dict[Tuple[str, str], dict]:
+    """
+    Send one prompt to several provider/model targets at the same time.
+    
+    Args:
+        prompt: The user's input text
+        targets: (provider, model) pairs, e.g. ("openai", "gpt-4")
+        concurrency: Maximum requests in flight at once
+        **kwargs: Passed to every call (temperature, max_tokens)
+    
+    Returns:
+        dict: (provider, model) -> result dict, in target order. Each
+        result has the usual call_openai()/call_anthropic() fields (or
+        'error') plus 'latency_ms'.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    # Build each provider's client up front so construction time is not
+    # counted as request latency
+    for provider in {provider for provider, _ in targets}:
+        if provider not in ASYNC_CALLS:
+            raise ValueError(f"Unknown provider: {provider}")
+        ASYNC_CLIENTS[provider]()
+    
+    async def run(provider: str, model: str) -> dict:
+        async with semaphore:
+            start = time.perf_counter()
+            result = await ASYNC_CALLS[provider](prompt, model=model, **kwargs)
+            result['latency_ms'] = (time.perf_counter() - start) * 1000
+            return result
+    
+    results = await asyncio.gather(*(run(provider, model) for provider, model in targets))
+    return dict(zip(targets, results))
+
+
+def fan_out(
+    prompt: str,
+    targets: List[Tuple[str, str]],
+    concurrency: int = 8,
+    **kwargs
+) -> Dict[Tuple[str, str], dict]:
+    """
+    Blocking wrapper around afan_out() for scripts without an event loop.
+    
+    Total wall time is roughly the slowest target's latency instead of
+    the sum of all of them.
+    
+    Example:
+        >>> results = fan_out("What is the capital of France?",
+        ...                   [("openai", "gpt-3.5-turbo"),
+        ...                    ("anthropic", "claude-3-haiku-20240307")])
+        >>> results[("openai", "gpt-3.5-turbo")]['latency_ms']
+        412.7
+    """
+    return asyncio.run(afan_out(prompt, targets, concurrency, **kwargs))
+
+
+def _openai_stream_event(chunk, stats: dict) -> Optional[str]:
+    # Chat completion chunks carry text in choices[0].delta; with
+    # include_usage the final chunk has usage and no choices
+    stats['model'] = chunk.model or stats['model']
+    if chunk.usage:
+        stats['input_tokens'] = chunk.usage.prompt_tokens
+        stats['output_tokens'] = chunk.usage.completion_tokens
+    if chunk.choices and chunk.choices[0].delta.content:
+        stats['chunks'] += 1
+        return chunk.choices[0].delta.content
+    return None
+
+
+def _anthropic_stream_event(event, stats: dict) -> Optional[str]:
+    # Messages events: message_start has the model and input usage,
+    # content_block_delta the text, message_delta the output usage
+    if event.type == "message_start":
+        stats['model'] = event.message.model
+        stats['input_tokens'] = event.message.usage.input_tokens
+    elif event.type == "content_block_delta" and getattr(event.delta, 'text', None):
+        stats['chunks'] += 1
+        return event.delta.text
+    elif event.type == "message_delta":
+        stats['output_tokens'] = event.usage.output_tokens
+    return None
+
+
+STREAM_EVENT_HANDLERS = {
+    "openai": _openai_stream_event,
+    "anthropic": _anthropic_stream_event,
+}
+
+
+class _StreamTimer:
+    """
+    Shared bookkeeping for CompletionStream and AsyncCompletionStream.
+    """
+    
+    def __init__(self, provider: str, get_client, open_stream, params: dict):
+        self.provider = provider
+        self.result: Optional[dict] = None
+        # Rate-limit reservation, taken before the request is sent
+        self._reserve = (params['model'], estimate_request_tokens(
+            params['messages'], params['model'], params['max_tokens']
+        ))
+        self._reservation = None
+        # The client is looked up before the clock starts, so building it
+        # is not counted as time to first token
+        self._get_client = get_client
+        self._open_stream = open_stream
+        self._handle_event = STREAM_EVENT_HANDLERS[provider]
+        self._response = None
+        self._events = None
+        self._parts: List[str] = []
+        self._stats = {'model': None, 'input_tokens': 0, 'output_tokens': 0, 'chunks': 0}
+        self._start = 0.0
+        self._first_token = None
+    
+    def _delta(self, text: str) -> str:
+        if self._first_token is None:
+            self._first_token = time.perf_counter()
+        self._parts.append(text)
+        return text
+    
+    def __del__(self):
+        # Abandoned before the end without close(): still settle the
+        # reservation and record the call
+        if self.result is None and getattr(self, '_reservation', None) is not None:
+            self._finish(asyncio.CancelledError("stream abandoned before the end"))
+    
+    def _cancel(self, reason: str) -> None:
+        error = asyncio.CancelledError(reason)
+        if self._reservation is None:
+            # Never sent: nothing to settle or record
+            self.result = {'error': str(error), 'error_type': type(error).__name__}
+        else:
+            self._finish(error)
+    
+    def _finish(self, error: BaseException = None) -> None:
+        if error is not None:
+            self.result = {'error': str(error), 'error_type': type(error).__name__}
+            # Tokens seen before the failure (none if nothing streamed)
+            stats = self._stats
+            self._settle(stats['input_tokens'] + (stats['output_tokens'] or stats['chunks']))
+            self._record(self.result)
+            return
+        
+        end = time.perf_counter()
+        stats = self._stats
+        # Fall back to one token per chunk if the stream had no usage data
+        output_tokens = stats['output_tokens'] or stats['chunks']
+        first_token = self._first_token or end
+        generation_seconds = end - first_token
         
-        # Extract and return relevant information
-        return {
-            'text': response.content[0].text,
-            'model': response.model,
-            'input_tokens': response.usage.input_tokens,
-            'output_tokens': response.usage.output_tokens,
-            'total_tokens': response.usage.input_tokens + response.usage.output_tokens
+        self.result = {
+            'text': "".join(self._parts),
+            'model': stats['model'],
+            'input_tokens': stats['input_tokens'],
+            'output_tokens': output_tokens,
+            'total_tokens': stats['input_tokens'] + output_tokens,
+            'ttft_ms': (first_token - self._start) * 1000,
+            'tokens_per_second': output_tokens / generation_seconds if generation_seconds > 0 else 0.0,
+            'latency_ms': (end - self._start) * 1000,
         }
+        self._settle(self.result['total_tokens'])
+        self._record(self.result)
+    
+    def _record(self, result: dict) -> None:
+        get_registry().record_call(
+            self.provider,
+            self._reserve[0],
+            (time.perf_counter() - self._start) * 1000 if self._start else 0.0,
+            input_tokens=result.get('input_tokens', 0),
+            output_tokens=result.get('output_tokens', 0),
+            error=result.get('error_type')
+        )
+    
+    def _settle(self, tokens: int) -> None:
+        if self._reservation is not None:
+            get_default_limiter().reconcile(self._reservation, tokens)
+            self._reservation = None
+
+
+class CompletionStream(_StreamTimer):
+    """
+    Iterator over the text deltas of a streaming completion.
+    
+    Both providers' event formats are reduced to plain text chunks. The
+    request is sent on the first next(); once the iterator is exhausted,
+    .result holds the same dict as call_openai()/call_anthropic() plus
+    'ttft_ms', 'tokens_per_second' and 'latency_ms' (or just 'error').
+    To stop reading early, call close() or use the stream in a ``with``
+    block, so the rate-limit reservation is settled and the call recorded.
+    
+    Example:
+        >>> stream = stream_openai("Tell me a joke")
+        >>> for delta in stream:
+        ...     print(delta, end="", flush=True)
+        >>> stream.result['ttft_ms']
+        231.4
+    """
+    
+    def __iter__(self):
+        return self
+    
+    def __enter__(self) -> "CompletionStream":
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+    
+    def __next__(self) -> str:
+        if self.result is not None:
+            raise StopIteration
         
-    except Exception as e:
-        return {'error': str(e)}
+        try:
+            if self._events is None:
+                client = self._get_client()
+                self._reservation = get_default_limiter().acquire(*self._reserve)
+                self._start = time.perf_counter()
+                self._response = self._open_stream(client)
+                self._events = iter(self._response)
+            for event in self._events:
+                text = self._handle_event(event, self._stats)
+                if text:
+                    return self._delta(text)
+        except Exception as e:
+            self._finish(e)
+            raise StopIteration
+        
+        self._finish()
+        raise StopIteration
+    
+    def get_result(self) -> dict:
+        """Read any remaining deltas and return the final result dict."""
+        for _ in self:
+            pass
+        return self.result
+    
+    def close(self) -> None:
+        """
+        Stop reading early: close the HTTP response, settle the rate-limit
+        reservation and record the call as a CancelledError. Does nothing
+        once the stream has ended.
+        """
+        if self.result is not None:
+            return
+        try:
+            if self._response is not None and hasattr(self._response, 'close'):
+                self._response.close()
+        finally:
+            self._cancel("stream closed before the end")
+
+
+class AsyncCompletionStream(_StreamTimer):
+    """
+    Async version of CompletionStream, used with ``async for``. Stop
+    early with aclose() or ``async with``; cancelling the task reading it
+    closes it too.
+    
+    Example:
+        >>> stream = astream_anthropic("Tell me a joke")
+        >>> async for delta in stream:
+        ...     print(delta, end="", flush=True)
+        >>> stream.result['tokens_per_second']
+        87.5
+    """
+    
+    def __aiter__(self):
+        return self
+    
+    async def __aenter__(self) -> "AsyncCompletionStream":
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+    
+    async def __anext__(self) -> str:
+        if self.result is not None:
+            raise StopAsyncIteration
+        
+        try:
+            if self._events is None:
+                client = self._get_client()
+                self._reservation = await get_default_limiter().aacquire(*self._reserve)
+                self._start = time.perf_counter()
+                self._response = await self._open_stream(client)
+                self._events = self._response.__aiter__()
+            while True:
+                try:
+                    event = await self._events.__anext__()
+                except StopAsyncIteration:
+                    break
+                text = self._handle_event(event, self._stats)
+                if text:
+                    return self._delta(text)
+        except asyncio.CancelledError:
+            # The task was cancelled (e.g. a hedged request that lost):
+            # release the connection and reservation, then keep cancelling
+            await self.aclose()
+            raise
+        except Exception as e:
+            self._finish(e)
+            raise StopAsyncIteration
+        
+        self._finish()
+        raise StopAsyncIteration
+    
+    async def get_result(self) -> dict:
+        """Read any remaining deltas and return the final result dict."""
+        async for _ in self:
+            pass
+        return self.result
+    
+    async def aclose(self) -> None:
+        """
+        Stop reading early: close the HTTP response, settle the rate-limit
+        reservation and record the call as a CancelledError. Does nothing
+        once the stream has ended.
+        """
+        if self.result is not None:
+            return
+        try:
+            if self._response is not None and hasattr(self._response, 'close'):
+                await self._response.close()
+        finally:
+            self._cancel("stream closed before the end")
+
+
+def _openai_stream_params(prompt: str, model: str, temperature: float, max_tokens: int) -> dict:
+    return {
+        'model': model,
+        'messages': _openai_messages(prompt),
+        'temperature': temperature,
+        'max_tokens': max_tokens,
+        'stream': True,
+        'stream_options': {'include_usage': True},
+    }
+
+
+def _anthropic_stream_params(prompt: str, model: str, temperature: float, max_tokens: int) -> dict:
+    return {
+        'model': model,
+        'max_tokens': max_tokens,
+        'temperature': temperature,
+        'messages': [{"role": "user", "content": prompt}],
+        'stream': True,
+    }
+
+
+def stream_openai(
+    prompt: str,
+    model: str = "gpt-3.5-turbo",
+    temperature: float = 0.7,
+    max_tokens: int = 150
+) -> CompletionStream:
+    """
+    Streaming version of call_openai(): yields text as it is generated.
+    
+    Returns:
+        CompletionStream: Iterate for text deltas; .result afterwards
+    """
+    params = _openai_stream_params(prompt, model, temperature, max_tokens)
+    return CompletionStream(
+        "openai", get_openai_client,
+        lambda client: client.chat.completions.create(**params),
+        params
+    )
+
+
+def stream_anthropic(
+    prompt: str,
+    model: str = "claude-3-haiku-20240307",
+    temperature: float = 0.7,
+    max_tokens: int = 150
+) -> CompletionStream:
+    """
+    Streaming version of call_anthropic(): yields text as it is generated.
+    
+    Returns:
+        CompletionStream: Iterate for text deltas; .result afterwards
+    """
+    params = _anthropic_stream_params(prompt, model, temperature, max_tokens)
+    return CompletionStream(
+        "anthropic", get_anthropic_client,
+        lambda client: client.messages.create(**params),
+        params
+    )
+
+
+def astream_openai(
+    prompt: str,
+    model: str = "gpt-3.5-turbo",
+    temperature: float = 0.7,
+    max_tokens: int = 150
+) -> AsyncCompletionStream:
+    """
+    Async streaming version of call_openai(), used with ``async for``.
+    """
+    params = _openai_stream_params(prompt, model, temperature, max_tokens)
+    return AsyncCompletionStream(
+        "openai", get_async_openai_client,
+        lambda client: client.chat.completions.create(**params),
+        params
+    )
+
+
+def astream_anthropic(
+    prompt: str,
+    model: str = "claude-3-haiku-20240307",
+    temperature: float = 0.7,
+    max_tokens: int = 150
+) -> AsyncCompletionStream:
+    """
+    Async streaming version of call_anthropic(), used with ``async for``.
+    """
+    params = _anthropic_stream_params(prompt, model, temperature, max_tokens)
+    return AsyncCompletionStream(
+        "anthropic", get_async_anthropic_client,
+        lambda client: client.messages.create(**params),
+        params
+    )
+
+
+ASYNC_STREAMS = {
+    "openai": astream_openai,
+    "anthropic": astream_anthropic,
+}
+
+
+def print_result(result: dict) -> None:
+    """
+    Print one call result: response text and token usage, or the error.
+    """
+    if 'error' not in result:
+        print(f"Response: {result['text']}")
+        print(f"\nTokens - Input: {result['input_tokens']}, "
+              f"Output: {result['output_tokens']}, "
+              f"Total: {result['total_tokens']}")
+    else:
+        print(f"Error: {result['error']}")
+    if 'latency_ms' in result:
+        print(f"Latency: {result['latency_ms']:.0f} ms")
+    if 'ttft_ms' in result:
+        print(f"Time to first token: {result['ttft_ms']:.0f} ms, "
+              f"{result['tokens_per_second']:.1f} tokens/sec")
 
 
 def compare_providers(prompt: str) -> None:
@@ -158,56 +737,73 @@ def compare_providers(prompt: str) -> None:
     print(f"PROMPT: {prompt}")
     print("=" * 70)
     
-    # Call OpenAI
+    # Call both providers at the same time
+    results = fan_out(prompt, [
+        ("openai", "gpt-3.5-turbo"),
+        ("anthropic", "claude-3-haiku-20240307"),
+    ])
+    
     print("\n🟢 OPENAI (GPT-3.5-turbo):")
     print("-" * 70)
-    openai_result = call_openai(prompt)
-    if 'error' not in openai_result:
-        print(f"Response: {openai_result['text']}")
-        print(f"\nTokens - Input: {openai_result['input_tokens']}, "
-              f"Output: {openai_result['output_tokens']}, "
-              f"Total: {openai_result['total_tokens']}")
-    else:
-        print(f"Error: {openai_result['error']}")
+    print_result(results[("openai", "gpt-3.5-turbo")])
     
-    # Call Anthropic
     print("\n🔵 ANTHROPIC (Claude 3 Haiku):")
     print("-" * 70)
-    anthropic_result = call_anthropic(prompt)
-    if 'error' not in anthropic_result:
-        print(f"Response: {anthropic_result['text']}")
-        print(f"\nTokens - Input: {anthropic_result['input_tokens']}, "
-              f"Output: {anthropic_result['output_tokens']}, "
-              f"Total: {anthropic_result['total_tokens']}")
-    else:
-        print(f"Error: {anthropic_result['error']}")
+    print_result(results[("anthropic", "claude-3-haiku-20240307")])
+
+
+def demonstrate_streaming(prompt: str) -> None:
+    """
+    Stream a response from each provider and report time to first token.
+    
+    Args:
+        prompt: The user's input text
+    """
+    print("\n" + "=" * 70)
+    print("STREAMING RESPONSES")
+    print("=" * 70)
+    print(f"Prompt: {prompt}")
+    
+    for label, stream in [
+        ("🟢 OPENAI (GPT-3.5-turbo)", stream_openai(prompt)),
+        ("🔵 ANTHROPIC (Claude 3 Haiku)", stream_anthropic(prompt)),
+    ]:
+        print(f"\n{label}:")
+        print("-" * 70)
+        for delta in stream:
+            print(delta, end="", flush=True)
+        print()
+        
+        result = stream.result
+        if 'error' not in result:
+            print(f"\nTime to first token: {result['ttft_ms']:.0f} ms, "
+                  f"total: {result['latency_ms']:.0f} ms, "
+                  f"{result['tokens_per_second']:.1f} tokens/sec")
+        else:
+            print(f"Error: {result['error']}")
 
 
-def demonstrate_temperature_effect(prompt: str) -> None:
+def demonstrate_temperature_effect(prompt: str, samples: int = 5) -> None:
     """
     Show how temperature affects response consistency.
     
+    Every temperature's samples come from one request (n=samples), all
+    temperatures are sampled at once, and each set is scored for how
+    much its samples differ.
+    
     Args:
         prompt: The user's input text
+        samples: Completions per temperature
     """
+    from sampling import print_temperature_study, temperature_study
+    
     print("\n" + "=" * 70)
     print("TEMPERATURE EFFECT DEMONSTRATION")
     print("=" * 70)
     print(f"Prompt: {prompt}\n")
     
-    temperatures = [0.0, 0.7, 1.5]
-    
-    for temp in temperatures:
-        print(f"\n🌡️  Temperature: {temp}")
-        print("-" * 70)
-        
-        # Make 2 calls with same temperature to show consistency
-        for i in range(2):
-            result = call_openai(prompt, temperature=temp, max_tokens=50)
-            if 'error' not in result:
-                print(f"Call {i+1}: {result['text'][:100]}...")
-            else:
-                print(f"Error: {result['error']}")
+    study = temperature_study(prompt, [0.0, 0.7, 1.5], n=samples, max_tokens=50)
+    print_temperature_study(study)
 
 
 def main():
@@ -225,27 +821,36 @@ def main():
     print("\n\n")
     compare_providers("Write a haiku about artificial intelligence.")
     
-    # Example 3: Temperature effect
+    # Example 3: Streaming
+    demonstrate_streaming("Describe the ocean in three sentences.")
+    
+    # Example 4: Temperature effect
     demonstrate_temperature_effect(
         "Generate a creative name for a coffee shop."
     )
     
-    # Example 4: Different models (OpenAI)
+    # Example 5: Different models (OpenAI)
     print("\n\n" + "=" * 70)
     print("COMPARING OPENAI MODELS")
     print("=" * 70)
     
     prompt = "Explain quantum computing in one sentence."
     
-    for model in ["gpt-3.5-turbo", "gpt-4"]:
+    targets = [("openai", "gpt-3.5-turbo"), ("openai", "gpt-4")]
+    results = fan_out(prompt, targets, max_tokens=100)
+    
+    for (_, model), result in results.items():
         print(f"\n📊 Model: {model}")
         print("-" * 70)
-        result = call_openai(prompt, model=model, max_tokens=100)
         if 'error' not in result:
             print(f"Response: {result['text']}")
             print(f"Tokens: {result['total_tokens']}")
+            print(f"Latency: {result['latency_ms']:.0f} ms")
         else:
             print(f"Error: {result['error']}")
+    
+    # Latency, tokens, cost and errors of every call above
+    print_metrics()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,603 @@
+"""
+Batch Jobs - Run Non-Urgent Prompts Through the Provider Batch APIs
+
+OpenAI and Anthropic both accept large sets of requests as one batch
+job, answered within 24 hours at half the normal price. This module
+turns a JSONL file of chat requests into those batch jobs:
+1. prepare  - write one provider request file per batch
+2. submit   - upload and create the batch jobs
+3. poll     - wait until every job has finished
+4. collect  - download each job's results
+5. merge    - write one result per input line, in input order, with
+              its cost (batch discount applied)
+
+Progress is saved in a checkpoint file after every step, so an
+interrupted run picks up where it stopped without resubmitting jobs.
+A job is marked "submitting" before its batch is created; if the run
+stops before the batch ID is saved, the next run finds the batch the
+provider already has instead of creating a second one.
+
+Input JSONL, one request per line (the message shape the examples use):
+    {"id": "q1", "model": "gpt-3.5-turbo", "max_tokens": 150,
+     "messages": [{"role": "system", "content": "You are a helpful assistant."},
+                  {"role": "user", "content": "What is the capital of France?"}]}
+
+Usage:
+    python batch_jobs.py run prompts.jsonl --output results.jsonl
+    python batch_jobs.py status prompts.jsonl
+    python batch_jobs.py demo    # Offline, against the local mock server
+
+Requirements:
+    - openai>=1.12.0
+    - anthropic>=0.39.0 (message batches)
+    - numpy>=1.26.0
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from llm_clients import provider_for
+from pricing_calculator import BATCH_DISCOUNT, calculate_cost, current_price_table, record_costs
+from usage_report import resolve_model
+
+
+# Anthropic requires max_tokens; used when a request does not set it
+DEFAULT_MAX_TOKENS = 1024
+
+# Requests per batch job accepted by each provider
+MAX_BATCH_REQUESTS = {"openai": 50_000, "anthropic": 100_000}
+
+# OpenAI batch states after which nothing more will change
+OPENAI_FINAL_STATES = {"completed", "failed", "expired", "cancelled"}
+
+# Metadata key tagging each OpenAI batch with the job that created it
+JOB_METADATA_KEY = "batch_job"
+
+# Clock difference allowed between us and the provider when matching a
+# "submitting" job to a batch by creation time (seconds)
+SUBMIT_CLOCK_SKEW = 300
+
+
+def read_requests(path: str) -> Iterator[Tuple[int, dict]]:
+    """Yield (index, request) for each non-empty line of a JSONL file."""
+    with open(path, "r", encoding="utf-8") as f:
+        index = 0
+        for line in f:
+            if line.strip():
+                yield index, json.loads(line)
+                index += 1
+
+
+def openai_batch_line(custom_id: str, request: dict) -> dict:
+    """One line of an OpenAI batch input file."""
+    body = {'model': request['model'], 'messages': request['messages']}
+    for key in ('max_tokens', 'temperature'):
+        if key in request:
+            body[key] = request[key]
+    return {'custom_id': custom_id, 'method': 'POST', 'url': '/v1/chat/completions', 'body': body}
+
+
+def anthropic_batch_request(custom_id: str, request: dict) -> dict:
+    """One request of an Anthropic message batch (system messages moved to 'system')."""
+    system = [m['content'] for m in request['messages'] if m['role'] == 'system']
+    params = {
+        'model': request['model'],
+        'max_tokens': request.get('max_tokens', DEFAULT_MAX_TOKENS),
+        'messages': [m for m in request['messages'] if m['role'] != 'system'],
+    }
+    if system:
+        params['system'] = "\n\n".join(system)
+    if 'temperature' in request:
+        params['temperature'] = request['temperature']
+    return {'custom_id': custom_id, 'params': params}
+
+
+def _custom_id(index: int) -> str:
+    return f"item-{index}"
+
+
+def _index(custom_id: str) -> int:
+    return int(custom_id.rsplit("-", 1)[1])
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@dataclass
+class BatchJob:
+    """One provider batch job and how far it has got."""
+    provider: str
+    request_file: str
+    requests: int
+    input_file_id: Optional[str] = None
+    batch_id: Optional[str] = None
+    status: str = "prepared"
+    results_file: Optional[str] = None
+    # Set just before the batch is created: a key stored with the batch
+    # (OpenAI metadata) and the time, to find the batch after a crash
+    submit_key: Optional[str] = None
+    submitted_at: Optional[float] = None
+
+
+class BatchPipeline:
+    """
+    Prepare, submit, poll, collect and merge batch jobs for one input file.
+    
+    Example:
+        >>> pipeline = BatchPipeline("prompts.jsonl")
+        >>> summary = pipeline.run("results.jsonl", poll_interval=60)
+        >>> summary['total_cost']
+        0.0123
+    """
+    
+    def __init__(
+        self,
+        input_path: str,
+        checkpoint_path: str = None,
+        work_dir: str = None,
+        openai_client=None,
+        anthropic_client=None
+    ):
+        """
+        Args:
+            input_path: JSONL file of chat requests
+            checkpoint_path: Progress file (None = <input>.batch.json)
+            work_dir: Where request/result files go (None = <input>.batch/)
+            openai_client: OpenAI client (None = shared client from llm_clients)
+            anthropic_client: Anthropic client (None = shared client from llm_clients)
+        """
+        self.input_path = input_path
+        self.checkpoint_path = checkpoint_path or f"{input_path}.batch.json"
+        self.work_dir = work_dir or f"{input_path}.batch"
+        self._clients = {'openai': openai_client, 'anthropic': anthropic_client}
+        self.jobs: List[BatchJob] = []
+        self.items = 0
+        self._input_digest = _file_digest(input_path)
+        
+        if os.path.exists(self.checkpoint_path):
+            self._load()
+    
+    def _load(self) -> None:
+        with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        if state['input_sha256'] != self._input_digest:
+            raise ValueError(
+                f"{self.input_path} changed since {self.checkpoint_path} was written; "
+                f"delete the checkpoint to start over"
+            )
+        self.items = state['items']
+        self.jobs = [BatchJob(**job) for job in state['jobs']]
+    
+    def _save(self) -> None:
+        state = {
+            'input': self.input_path,
+            'input_sha256': self._input_digest,
+            'items': self.items,
+            'jobs': [asdict(job) for job in self.jobs],
+        }
+        # Write to a temporary file and rename, so a crash never leaves
+        # a half-written checkpoint
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, self.checkpoint_path)
+    
+    def _client(self, provider: str):
+        if self._clients[provider] is None:
+            from llm_clients import get_client
+            self._clients[provider] = get_client(provider)
+        return self._clients[provider]
+    
+    def prepare(self) -> None:
+        """Write the provider request files (skipped if already prepared)."""
+        if self.jobs:
+            return
+        os.makedirs(self.work_dir, exist_ok=True)
+        
+        open_files: Dict[str, tuple] = {}
+        
+        def start_job(provider: str) -> tuple:
+            path = os.path.join(self.work_dir, f"{len(self.jobs):03d}-{provider}-requests.jsonl")
+            self.jobs.append(BatchJob(provider, path, 0))
+            return open(path, "w", encoding="utf-8"), self.jobs[-1]
+        
+        try:
+            for index, request in read_requests(self.input_path):
+                provider = provider_for(request['model'])
+                if provider not in open_files or open_files[provider][1].requests >= MAX_BATCH_REQUESTS[provider]:
+                    if provider in open_files:
+                        open_files[provider][0].close()
+                    open_files[provider] = start_job(provider)
+                f, job = open_files[provider]
+                
+                custom_id = _custom_id(index)
+                if provider == "openai":
+                    line = openai_batch_line(custom_id, request)
+                else:
+                    line = anthropic_batch_request(custom_id, request)
+                f.write(json.dumps(line, ensure_ascii=False) + "\n")
+                job.requests += 1
+                self.items = index + 1
+        finally:
+            for f, _ in open_files.values():
+                f.close()
+        
+        self._save()
+    
+    def submit(self) -> None:
+        """Create a batch job for every prepared request file."""
+        for number, job in enumerate(self.jobs):
+            if job.batch_id is not None:
+                continue
+            client = self._client(job.provider)
+            
+            if job.status == "submitting":
+                # The last run stopped after asking for this batch but
+                # before saving its ID; the provider may have created it
+                job.batch_id = self._find_submitted(job)
+            
+            if job.batch_id is None:
+                if job.provider == "openai" and job.input_file_id is None:
+                    with open(job.request_file, "rb") as f:
+                        job.input_file_id = client.files.create(file=f, purpose="batch").id
+                    self._save()
+                
+                job.status = "submitting"
+                job.submit_key = f"{self._input_digest[:16]}-{number:03d}"
+                job.submitted_at = time.time()
+                self._save()
+                
+                if job.provider == "openai":
+                    batch = client.batches.create(
+                        input_file_id=job.input_file_id,
+                        endpoint="/v1/chat/completions",
+                        completion_window="24h",
+                        metadata={JOB_METADATA_KEY: job.submit_key}
+                    )
+                else:
+                    with open(job.request_file, "r", encoding="utf-8") as f:
+                        requests = [json.loads(line) for line in f]
+                    batch = client.messages.batches.create(requests=requests)
+                job.batch_id = batch.id
+            
+            job.status = "submitted"
+            self._save()
+    
+    def _find_submitted(self, job: BatchJob) -> Optional[str]:
+        """
+        ID of the batch created for a job marked "submitting", or None if
+        the provider has none (it is then safe to submit again).
+        
+        OpenAI batches are matched by their metadata key and input file.
+        Message batches carry no metadata, so they are matched by request
+        count among those created since the job was marked.
+        """
+        client = self._client(job.provider)
+        since = job.submitted_at - SUBMIT_CLOCK_SKEW
+        
+        if job.provider == "openai":
+            # Listed newest first
+            for batch in client.batches.list(limit=100):
+                if batch.created_at < since:
+                    break
+                if ((batch.metadata or {}).get(JOB_METADATA_KEY) == job.submit_key
+                        and batch.input_file_id == job.input_file_id):
+                    return batch.id
+            return None
+        
+        matches = []
+        for batch in client.messages.batches.list(limit=100):
+            if batch.created_at.timestamp() < since:
+                break
+            counts = batch.request_counts
+            total = (counts.processing + counts.succeeded + counts.errored
+                     + counts.canceled + counts.expired)
+            if total == job.requests:
+                matches.append(batch.id)
+        if len(matches) > 1:
+            raise RuntimeError(
+                f"Several message batches of {job.requests} requests were created since "
+                f"{job.request_file} was submitted ({', '.join(matches)}); set its batch_id "
+                f"in {self.checkpoint_path} to the right one"
+            )
+        return matches[0] if matches else None
+    
+    def poll(self) -> bool:
+        """
+        Refresh the status of every unfinished job.
+        
+        Returns:
+            bool: True once every job has finished
+        """
+        for job in self.jobs:
+            if job.batch_id is None or job.status in ("finished", "collected"):
+                continue
+            client = self._client(job.provider)
+            if job.provider == "openai":
+                status = client.batches.retrieve(job.batch_id).status
+                finished = status in OPENAI_FINAL_STATES
+            else:
+                status = client.messages.batches.retrieve(job.batch_id).processing_status
+                finished = status == "ended"
+            job.status = "finished" if finished else status
+        self._save()
+        return all(job.status in ("finished", "collected") for job in self.jobs)
+    
+    def collect(self) -> None:
+        """Download the results of finished jobs into normalized JSONL files."""
+        for job in self.jobs:
+            if job.status != "finished":
+                continue
+            job.results_file = job.request_file.replace("-requests.jsonl", "-results.jsonl")
+            if job.provider == "openai":
+                results = self._openai_results(job)
+            else:
+                results = self._anthropic_results(job)
+            
+            with open(job.results_file, "w", encoding="utf-8") as f:
+                for result in results:
+                    f.write(json.dumps(result, ensure_ascii=False) + "\n")
+            job.status = "collected"
+            self._save()
+    
+    def _openai_results(self, job: BatchJob) -> Iterator[dict]:
+        client = self._client("openai")
+        batch = client.batches.retrieve(job.batch_id)
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            for line in client.files.content(file_id).text.splitlines():
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                response = item.get('response') or {}
+                body = response.get('body') or {}
+                if response.get('status_code') == 200:
+                    yield {
+                        'custom_id': item['custom_id'],
+                        'text': body['choices'][0]['message']['content'],
+                        'model': body['model'],
+                        'input_tokens': body['usage']['prompt_tokens'],
+                        'output_tokens': body['usage']['completion_tokens'],
+                    }
+                else:
+                    error = item.get('error') or body.get('error') or {}
+                    yield {'custom_id': item['custom_id'], 'error': error.get('message', str(error))}
+    
+    def _anthropic_results(self, job: BatchJob) -> Iterator[dict]:
+        client = self._client("anthropic")
+        for item in client.messages.batches.results(job.batch_id):
+            result = item.result
+            if result.type == "succeeded":
+                message = result.message
+                yield {
+                    'custom_id': item.custom_id,
+                    'text': "".join(block.text for block in message.content if block.type == "text"),
+                    'model': message.model,
+                    'input_tokens': message.usage.input_tokens,
+                    'output_tokens': message.usage.output_tokens,
+                }
+            else:
+                error = getattr(result, 'error', None)
+                yield {'custom_id': item.custom_id, 'error': str(error) if error else result.type}
+    
+    def merge(self, output_path: str) -> Dict[str, float]:
+        """
+        Write one result line per input request, in input order.
+        
+        Each line has the input 'id' and either the call_openai()-style
+        fields plus 'cost_usd' (batch price), or 'error'.
+        
+        Returns:
+            dict: Item counts and total cost
+        """
+        results: List[Optional[dict]] = [None] * self.items
+        for job in self.jobs:
+            if job.results_file is None:
+                continue
+            with open(job.results_file, "r", encoding="utf-8") as f:
+                for line in f:
+                    result = json.loads(line)
+                    results[_index(result.pop('custom_id'))] = result
+        
+        # Cost of every succeeded, priced result in one vectorized call
+        table = current_price_table()
+        priced = []
+        for i, result in enumerate(results):
+            if result and 'error' not in result:
+                name = resolve_model(result['model'])
+                if name:
+                    priced.append((i, table.index[name]))
+        costs = np.full(self.items, np.nan)
+        if priced:
+            rows, columns = np.array(priced).T
+            costs[rows] = record_costs(
+                [results[i]['input_tokens'] for i in rows],
+                [results[i]['output_tokens'] for i in rows],
+                columns,
+                table=table,
+                batch=True
+            )['total_cost']
+        
+        summary = {'items': self.items, 'succeeded': 0, 'failed': 0, 'total_cost': 0.0}
+        tmp_path = f"{output_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as out:
+            for index, request in read_requests(self.input_path):
+                result = results[index] or {'error': "No result (job failed or expired)"}
+                line = {'id': request.get('id', index)}
+                if 'error' in result:
+                    line['error'] = result['error']
+                    summary['failed'] += 1
+                else:
+                    line.update(result)
+                    line['total_tokens'] = result['input_tokens'] + result['output_tokens']
+                    line['cost_usd'] = None if np.isnan(costs[index]) else float(costs[index])
+                    summary['succeeded'] += 1
+                    summary['total_cost'] += line['cost_usd'] or 0.0
+                out.write(json.dumps(line, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, output_path)
+        return summary
+    
+    def run(self, output_path: str, poll_interval: float = 60.0, timeout: float = None) -> Dict[str, float]:
+        """
+        Run (or resume) every step and merge the results.
+        
+        Args:
+            output_path: Where to write the merged JSONL
+            poll_interval: Seconds between status checks
+            timeout: Give up waiting after this many seconds (None = wait)
+        
+        Returns:
+            dict: Summary from merge()
+        
+        Raises:
+            TimeoutError: If the jobs do not finish within timeout
+        """
+        self.prepare()
+        self.submit()
+        
+        start = time.monotonic()
+        while not self.poll():
+            if timeout is not None and time.monotonic() - start > timeout:
+                raise TimeoutError(f"Batch jobs still running; resume later from {self.checkpoint_path}")
+            time.sleep(poll_interval)
+        
+        self.collect()
+        return self.merge(output_path)
+    
+    def status(self) -> List[dict]:
+        """Current state of every job."""
+        return [asdict(job) for job in self.jobs]
+
+
+def print_summary(summary: Dict[str, float]) -> None:
+    """Print the merge() summary."""
+    print(f"Items: {summary['items']:,}  ✅ {summary['succeeded']:,}  ❌ {summary['failed']:,}")
+    print(f"Batch cost: ${summary['total_cost']:.6f} "
+          f"(saved ${summary['total_cost'] / (1 - BATCH_DISCOUNT) * BATCH_DISCOUNT:.6f} "
+          f"vs. regular requests)")
+
+
+def demonstrate_batch_jobs(num_prompts: int = 6) -> None:
+    """
+    Run a small batch end to end against the local mock server,
+    interrupting it after submission and resuming from the checkpoint.
+    """
+    from anthropic import Anthropic
+    from openai import OpenAI
+    from mock_llm_server import start_mock_server
+    
+    server, base_url = start_mock_server(batch_delay=1.0)
+    clients = {
+        'openai_client': OpenAI(api_key="mock", base_url=f"{base_url}/v1"),
+        'anthropic_client': Anthropic(api_key="mock", base_url=base_url),
+    }
+    
+    work_dir = tempfile.mkdtemp()
+    input_path = os.path.join(work_dir, "prompts.jsonl")
+    output_path = os.path.join(work_dir, "results.jsonl")
+    models = ["gpt-3.5-turbo", "claude-3-haiku-20240307", "gpt-4"]
+    with open(input_path, "w", encoding="utf-8") as f:
+        for i in range(num_prompts):
+            f.write(json.dumps({
+                'id': f"q{i}",
+                'model': models[i % len(models)],
+                'max_tokens': 100,
+                'messages': [
+                    {"role": "system", "content": "You are a helpful assistant."},
+                    {"role": "user", "content": f"Summarize document number {i} in one sentence."},
+                ],
+            }) + "\n")
+    
+    print(f"\n{'='*70}")
+    print(f"BATCH JOBS ({num_prompts} prompts, local mock server)")
+    print(f"{'='*70}")
+    
+    try:
+        # First run: prepare and submit, then stop as if interrupted
+        pipeline = BatchPipeline(input_path, **clients)
+        pipeline.prepare()
+        pipeline.submit()
+        for job in pipeline.status():
+            print(f"Submitted {job['provider']:<10} {job['requests']} requests -> {job['batch_id']}")
+        
+        # Second run: resumes from the checkpoint without resubmitting
+        print("\n⏸️  Interrupted; resuming from checkpoint...")
+        resumed = BatchPipeline(input_path, **clients)
+        summary = resumed.run(output_path, poll_interval=0.25)
+        
+        print(f"\n{'ID':<6} {'Model':<28} {'Tokens':>8} {'Batch $':>12} {'Regular $':>12}")
+        print("-" * 70)
+        with open(output_path, "r", encoding="utf-8") as f:
+            for line in f:
+                result = json.loads(line)
+                regular = calculate_cost(result['input_tokens'], result['output_tokens'],
+                                         resolve_model(result['model']))['total_cost']
+                print(f"{result['id']:<6} {result['model']:<28} {result['total_tokens']:>8} "
+                      f"{result['cost_usd']:>12.8f} {regular:>12.8f}")
+        print()
+        print_summary(summary)
+    finally:
+        server.shutdown()
+
+
+def main():
+    """
+    Command-line entry point.
+    """
+    parser = argparse.ArgumentParser(description="Run chat requests through provider batch APIs.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    run_parser = commands.add_parser("run", help="Run or resume a batch")
+    run_parser.add_argument("input", help="JSONL file of chat requests")
+    run_parser.add_argument("--output", required=True, help="Merged results JSONL")
+    run_parser.add_argument("--checkpoint", help="Checkpoint file (default: <input>.batch.json)")
+    run_parser.add_argument("--poll-interval", type=float, default=60.0)
+    run_parser.add_argument("--timeout", type=float, help="Stop waiting after this many seconds")
+    
+    status_parser = commands.add_parser("status", help="Show job status from the checkpoint")
+    status_parser.add_argument("input", help="JSONL file of chat requests")
+    status_parser.add_argument("--checkpoint")
+    
+    commands.add_parser("demo", help="Run a small batch against the local mock server")
+    
+    args = parser.parse_args()
+    
+    if args.command == "demo":
+        demonstrate_batch_jobs()
+        return
+    
+    pipeline = BatchPipeline(args.input, args.checkpoint)
+    if args.command == "status":
+        if not pipeline.jobs:
+            print(f"No batch jobs yet for {args.input}")
+            return
+        pipeline.poll()
+        for job in pipeline.status():
+            print(f"{job['provider']:<10} {job['requests']:>8} requests  {job['status']:<12} {job['batch_id'] or '-'}")
+        return
+    
+    try:
+        summary = pipeline.run(args.output, args.poll_interval, args.timeout)
+    except TimeoutError as e:
+        print(f"⏳ {e}")
+        return
+    print_summary(summary)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
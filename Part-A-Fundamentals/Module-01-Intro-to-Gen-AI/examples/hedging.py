@@ -0,0 +1,344 @@
+"""
+Hedged Requests - Cut Tail Latency with a Backup Provider
+
+Most LLM requests finish close to the median, but a few take many times
+longer. Hedging sends the request to a primary provider/model and, if no
+answer (or, when streaming, no first token) has arrived by a deadline,
+sends it to the next target as well. Whichever answers first wins and
+the other request is cancelled. A hard error from a target triggers the
+next one immediately (failover) through the same path.
+
+The deadline for each target is a latency percentile (p95 by default)
+measured from that target's own recent requests, so it adapts as the
+provider gets faster or slower. Until enough requests have been seen, a
+fixed default deadline is used.
+
+Usage:
+    from hedging import Hedger
+
+    hedger = Hedger([("openai", "gpt-3.5-turbo"),
+                     ("anthropic", "claude-3-haiku-20240307")])
+    result = hedger.call("What is the capital of France?", max_tokens=50)
+    result['target'], result['hedged'], result['latency_ms']
+
+    python hedging.py   # Demo against two local mock servers
+"""
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+from basic_llm_call import ASYNC_STREAMS, UNCOALESCED_ASYNC_CALLS
+from usage_report import LogHistogram
+
+
+Target = Tuple[str, str]
+
+
+class LatencyTracker:
+    """
+    Recent latency distribution per target, in milliseconds.
+    
+    Each target keeps two LogHistograms: the one being filled and the
+    previous full one. Percentiles cover both, so they reflect roughly
+    the last `window` to 2 * `window` requests.
+    
+    Example:
+        >>> tracker = LatencyTracker()
+        >>> tracker.record(("openai", "gpt-4"), 850.0)
+        >>> tracker.percentile(("openai", "gpt-4"), 50)
+        849.8
+    """
+    
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self._current: Dict[Target, LogHistogram] = {}
+        self._previous: Dict[Target, LogHistogram] = {}
+    
+    def record(self, target: Target, latency_ms: float) -> None:
+        """Add one latency sample for a target."""
+        current = self._current.setdefault(target, LogHistogram())
+        current.record(latency_ms)
+        if current.total >= self.window:
+            self._previous[target] = current
+            self._current[target] = LogHistogram()
+    
+    def count(self, target: Target) -> int:
+        """Samples currently covered for a target."""
+        return sum(h.total for h in (self._current.get(target), self._previous.get(target)) if h)
+    
+    def percentile(self, target: Target, q: float) -> float:
+        """Latency at percentile q (0-100) for a target (0.0 with no samples)."""
+        merged = LogHistogram()
+        for hist in (self._current.get(target), self._previous.get(target)):
+            if hist:
+                merged.merge(hist)
+        return merged.percentile(q)
+
+
+async def _default_call(target: Target, prompt: str, **kwargs) -> dict:
+    # Not coalesced, so cancelling a losing attempt stops its request
+    provider, model = target
+    return await UNCOALESCED_ASYNC_CALLS[provider](prompt, model=model, **kwargs)
+
+
+def _default_stream(target: Target, prompt: str, **kwargs):
+    provider, model = target
+    return ASYNC_STREAMS[provider](prompt, model=model, **kwargs)
+
+
+class Hedger:
+    """
+    Send each request to targets in priority order, hedging on slowness
+    and failing over on errors.
+    
+    Attributes:
+        tracker: LatencyTracker holding each target's recent latencies
+        hedges: Backup requests sent because a deadline passed
+        failovers: Backup requests sent because a target returned an error
+        wins: target -> requests it answered
+    """
+    
+    def __init__(
+        self,
+        targets: List[Target],
+        percentile: float = 95.0,
+        default_deadline_ms: float = 2000.0,
+        min_samples: int = 20,
+        stream: bool = False,
+        call: Callable[..., Awaitable[dict]] = None,
+        open_stream: Callable = None,
+        tracker: LatencyTracker = None
+    ):
+        """
+        Args:
+            targets: (provider, model) pairs, primary first
+            percentile: Latency percentile used as each target's deadline
+            default_deadline_ms: Deadline until min_samples are recorded
+            min_samples: Samples needed before the percentile is trusted
+            stream: Race on time to first token instead of full response
+            call: async (target, prompt, **kwargs) -> result dict
+                (default: acall_openai/acall_anthropic without @coalesced).
+                Must stop its request when cancelled.
+            open_stream: (target, prompt, **kwargs) -> AsyncCompletionStream
+                (default: astream_openai/astream_anthropic)
+            tracker: Shared LatencyTracker (None = a new one)
+        """
+        if not targets:
+            raise ValueError("Hedger needs at least one target")
+        self.targets = list(targets)
+        self.percentile = percentile
+        self.default_deadline_ms = default_deadline_ms
+        self.min_samples = min_samples
+        self.stream = stream
+        self._call = call or _default_call
+        self._open_stream = open_stream or _default_stream
+        self.tracker = tracker or LatencyTracker()
+        self.hedges = 0
+        self.failovers = 0
+        self.wins: Dict[Target, int] = {target: 0 for target in self.targets}
+    
+    def deadline_ms(self, target: Target) -> float:
+        """How long to wait for a target before sending the next one."""
+        if self.tracker.count(target) < self.min_samples:
+            return self.default_deadline_ms
+        return self.tracker.percentile(target, self.percentile)
+    
+    async def _attempt(self, target: Target, prompt: str, kwargs: dict) -> tuple:
+        # Returns (result, stream). In stream mode a success is the first
+        # delta; the stream is returned so the winner can be read to the end.
+        try:
+            if not self.stream:
+                return await self._call(target, prompt, **kwargs), None
+            stream = self._open_stream(target, prompt, **kwargs)
+            async for delta in stream:
+                return {'first_delta': delta}, stream
+            return stream.result or {'error': "Empty stream"}, None
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            return {'error': str(e)}, None
+    
+    async def acall(
+        self,
+        prompt: str,
+        on_delta: Callable[[str], None] = None,
+        **kwargs
+    ) -> dict:
+        """
+        Get one answer, hedging and failing over across the targets.
+        
+        Args:
+            prompt: The user's input text
+            on_delta: In stream mode, called with each text delta of the
+                winning response as it arrives
+            **kwargs: Passed to every call (temperature, max_tokens)
+        
+        Returns:
+            dict: The winning target's result plus 'target', 'attempts',
+            'hedged' and 'latency_ms'. If every target fails, 'error'
+            and 'errors' (one message per target).
+        """
+        start = time.perf_counter()
+        pending: Dict[asyncio.Task, Tuple[Target, float]] = {}
+        launched: List[Target] = []
+        errors: List[str] = []
+        winner = None
+        
+        def launch() -> None:
+            target = self.targets[len(launched)]
+            launched.append(target)
+            task = asyncio.ensure_future(self._attempt(target, prompt, kwargs))
+            pending[task] = (target, time.perf_counter())
+        
+        launch()
+        try:
+            while pending and winner is None:
+                timeout = None
+                if len(launched) < len(self.targets):
+                    # Wait until the most recently launched target's deadline
+                    latest, started = next(reversed(pending.values()))
+                    remaining = self.deadline_ms(latest) / 1000 - (time.perf_counter() - started)
+                    timeout = max(0.0, remaining)
+                
+                done, _ = await asyncio.wait(pending, timeout=timeout,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    self.hedges += 1
+                    launch()
+                    continue
+                
+                failed = False
+                for task in done:
+                    target, started = pending.pop(task)
+                    result, stream = task.result()
+                    if 'error' in result:
+                        errors.append(f"{target[0]}/{target[1]}: {result['error']}")
+                        failed = True
+                        continue
+                    self.tracker.record(target, (time.perf_counter() - started) * 1000)
+                    if winner is None:
+                        winner = (target, result, stream)
+                    elif stream is not None:
+                        # Finished at the same time as the winner
+                        await stream.aclose()
+                
+                if winner is None and failed and len(launched) < len(self.targets):
+                    self.failovers += 1
+                    launch()
+        finally:
+            # Cancel the losers. Their elapsed time is not recorded: it is
+            # only a lower bound on their latency and would pull the
+            # target's percentiles down
+            for task in pending:
+                task.cancel()
+            # Wait for them to finish cancelling, so their streams are
+            # closed and their rate-limit reservations settled
+            await asyncio.gather(*pending, return_exceptions=True)
+        
+        if winner is None:
+            return {'error': "All targets failed", 'errors': errors,
+                    'attempts': len(launched), 'latency_ms': (time.perf_counter() - start) * 1000}
+        
+        target, result, stream = winner
+        if stream is not None:
+            if on_delta:
+                on_delta(result['first_delta'])
+                async for delta in stream:
+                    on_delta(delta)
+            result = await stream.get_result()
+        
+        self.wins[target] += 1
+        result = dict(result)
+        result.update({
+            'target': target,
+            'attempts': len(launched),
+            'hedged': len(launched) > 1,
+            'latency_ms': (time.perf_counter() - start) * 1000,
+        })
+        return result
+    
+    def call(self, prompt: str, **kwargs) -> dict:
+        """Blocking wrapper around acall() for scripts without an event loop."""
+        return asyncio.run(self.acall(prompt, **kwargs))
+    
+    def stats(self) -> Dict[str, object]:
+        """Hedge/failover counters and per-target p50/p99 and deadline."""
+        return {
+            'hedges': self.hedges,
+            'failovers': self.failovers,
+            'targets': {
+                f"{provider}/{model}": {
+                    'wins': self.wins[(provider, model)],
+                    'samples': self.tracker.count((provider, model)),
+                    'p50_ms': self.tracker.percentile((provider, model), 50),
+                    'p99_ms': self.tracker.percentile((provider, model), 99),
+                    'deadline_ms': self.deadline_ms((provider, model)),
+                }
+                for provider, model in self.targets
+            },
+        }
+
+
+def demonstrate_hedging(num_requests: int = 200) -> None:
+    """
+    Compare no hedging with hedging against two local mock servers.
+    
+    The primary answers in 20 ms, except 5% of requests that take 500 ms;
+    the secondary always takes 40 ms. Hedging at the primary's p90 cuts
+    the tail to about p90 + 40 ms.
+    
+    Args:
+        num_requests: Requests per mode
+    """
+    import random
+    from llm_clients import get_async_client
+    from mock_llm_server import start_mock_server
+    
+    primary_server, primary_url = start_mock_server(
+        latency=lambda: 0.5 if random.random() < 0.05 else 0.02
+    )
+    secondary_server, secondary_url = start_mock_server(latency=0.04)
+    base_urls = {"primary": f"{primary_url}/v1", "secondary": f"{secondary_url}/v1"}
+    
+    async def call(target: Target, prompt: str, **kwargs) -> dict:
+        client = get_async_client("openai", api_key="mock", base_url=base_urls[target[0]])
+        response = await client.chat.completions.create(
+            model=target[1], messages=[{"role": "user", "content": prompt}], **kwargs
+        )
+        return {'text': response.choices[0].message.content,
+                'total_tokens': response.usage.total_tokens}
+    
+    targets = [("primary", "gpt-3.5-turbo"), ("secondary", "gpt-3.5-turbo")]
+    
+    async def run(hedger: Hedger) -> List[float]:
+        latencies = []
+        for i in range(num_requests):
+            result = await hedger.acall(f"Question {i}", max_tokens=20)
+            latencies.append(result['latency_ms'])
+        return sorted(latencies)
+    
+    print(f"\n{'='*70}")
+    print(f"HEDGED REQUESTS ({num_requests} requests, primary p95 = 500 ms)")
+    print(f"{'='*70}")
+    print(f"{'Mode':<25} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}")
+    print("-" * 70)
+    
+    try:
+        for label, hedger in [
+            ("Primary only", Hedger(targets[:1], call=call)),
+            ("Hedged at p90", Hedger(targets, percentile=90, default_deadline_ms=100, call=call)),
+        ]:
+            latencies = asyncio.run(run(hedger))
+            p50, p95, p99 = (latencies[min(len(latencies) - 1, int(len(latencies) * q))]
+                             for q in (0.50, 0.95, 0.99))
+            print(f"{label:<25} {p50:>10.1f} {p95:>10.1f} {p99:>10.1f}")
+        wins = ", ".join(f"{name} {count}" for (name, _), count in hedger.wins.items())
+        print(f"\nHedges sent: {hedger.hedges}; wins: {wins}")
+    finally:
+        primary_server.shutdown()
+        secondary_server.shutdown()
+
+
+if __name__ == "__main__":
+    demonstrate_hedging()
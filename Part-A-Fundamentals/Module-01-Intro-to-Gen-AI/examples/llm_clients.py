@@ -0,0 +1,417 @@
+"""
+LLM Clients - Shared, Reusable Provider Clients
+
+Every OpenAI()/Anthropic() client owns an HTTP connection pool. Creating
+a new client per request throws that pool away, so each call pays for a
+fresh TCP connection and TLS handshake. This module keeps one client per
+provider (and per event loop for async clients) for the whole process,
+with connection-pool limits you can tune.
+
+Usage:
+    from llm_clients import get_openai_client
+
+    client = get_openai_client()
+    response = client.chat.completions.create(...)
+
+Requirements:
+    - openai>=1.12.0
+    - anthropic>=0.18.0
+    - httpx (installed with openai)
+"""
+
+import asyncio
+import os
+import threading
+import time
+import weakref
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional
+
+
+# Connection-pool and timeout settings used for every new client
+CLIENT_SETTINGS = {
+    'max_connections': 100,
+    'max_keepalive_connections': 20,
+    'keepalive_expiry': 30.0,
+    'timeout': 60.0,
+    # Used when get_client() is called without base_url (None = SDK
+    # default or the OPENAI_BASE_URL / ANTHROPIC_BASE_URL env var)
+    'openai_base_url': None,
+    'anthropic_base_url': None,
+}
+
+# Where the SDKs send requests when no base URL is configured anywhere
+SDK_BASE_URLS = {
+    "openai": "https://api.openai.com/v1",
+    "anthropic": "https://api.anthropic.com",
+}
+
+# Names the APIs expect where they differ from PRICING_DATA
+API_MODEL_NAMES = {
+    "claude-3-haiku": "claude-3-haiku-20240307",
+    "claude-3-sonnet": "claude-3-sonnet-20240229",
+    "claude-3-opus": "claude-3-opus-20240229",
+}
+
+_clients: Dict[tuple, object] = {}
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[tuple, object]]" = (
+    weakref.WeakKeyDictionary()
+)
+_lock = threading.Lock()
+
+# HTTP attempts made inside the current count_attempts() block
+_attempts: ContextVar[Optional[List[int]]] = ContextVar("llm_request_attempts", default=None)
+
+
+def configure_clients(**settings) -> None:
+    """
+    Change connection-pool and base-URL settings for clients created
+    from now on.
+    
+    Call this at startup, before the first request. Clients that already
+    exist keep their settings until close_clients() is called.
+    
+    Args:
+        max_connections: Maximum open connections per client
+        max_keepalive_connections: Idle connections kept open for reuse
+        keepalive_expiry: Seconds an idle connection stays open
+        timeout: Request timeout in seconds
+        openai_base_url: Default OpenAI base URL, e.g. a mock server's
+        anthropic_base_url: Default Anthropic base URL
+    
+    Example:
+        >>> configure_clients(max_connections=200, keepalive_expiry=60)
+    """
+    unknown = set(settings) - set(CLIENT_SETTINGS)
+    if unknown:
+        raise ValueError(f"Unknown client settings: {sorted(unknown)}")
+    CLIENT_SETTINGS.update(settings)
+
+
+def _limits() -> "httpx.Limits":
+    # httpx comes with the SDKs; imported here so that importing this
+    # module stays cheap
+    import httpx
+    return httpx.Limits(
+        max_connections=CLIENT_SETTINGS['max_connections'],
+        max_keepalive_connections=CLIENT_SETTINGS['max_keepalive_connections'],
+        keepalive_expiry=CLIENT_SETTINGS['keepalive_expiry'],
+    )
+
+
+def _count_attempt(request: "httpx.Request") -> None:
+    counter = _attempts.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+async def _acount_attempt(request: "httpx.Request") -> None:
+    _count_attempt(request)
+
+
+class count_attempts:
+    """
+    Count HTTP requests sent by shared clients inside the block.
+    
+    The SDKs retry failed requests on their own, so one API call can
+    send several HTTP requests; attempts[0] - 1 is the number of retries.
+    Works in threads and in asyncio tasks. A class rather than a
+    @contextmanager generator, since it wraps every instrumented call.
+    
+    Example:
+        >>> with count_attempts() as attempts:
+        ...     client.chat.completions.create(...)
+        >>> attempts[0]
+        1
+    """
+    
+    __slots__ = ('counter', 'token')
+    
+    def __enter__(self) -> List[int]:
+        self.counter = [0]
+        self.token = _attempts.set(self.counter)
+        return self.counter
+    
+    def __exit__(self, *exc_info) -> None:
+        _attempts.reset(self.token)
+
+
+def _create_client(provider: str, api_key: Optional[str], base_url: Optional[str], is_async: bool):
+    timeout = CLIENT_SETTINGS['timeout']
+    
+    if provider == "openai":
+        import openai
+        http_client_class = openai.DefaultAsyncHttpxClient if is_async else openai.DefaultHttpxClient
+        client_class = openai.AsyncOpenAI if is_async else openai.OpenAI
+        api_key = api_key or os.getenv("OPENAI_API_KEY")
+    elif provider == "anthropic":
+        import anthropic
+        http_client_class = anthropic.DefaultAsyncHttpxClient if is_async else anthropic.DefaultHttpxClient
+        client_class = anthropic.AsyncAnthropic if is_async else anthropic.Anthropic
+        api_key = api_key or os.getenv("ANTHROPIC_API_KEY")
+    else:
+        raise ValueError(f"Unknown provider: {provider}")
+    
+    # base_url=None lets the SDK fall back to OPENAI_BASE_URL / ANTHROPIC_BASE_URL
+    return client_class(
+        api_key=api_key,
+        base_url=base_url,
+        timeout=timeout,
+        http_client=http_client_class(
+            limits=_limits(),
+            timeout=timeout,
+            event_hooks={'request': [_acount_attempt if is_async else _count_attempt]},
+        ),
+    )
+
+
+def provider_for(model: str) -> str:
+    """Provider serving a model name."""
+    return "anthropic" if model.startswith("claude") else "openai"
+
+
+def default_base_url(provider: str) -> str:
+    """
+    Base URL that get_client(provider) sends requests to: the configured
+    default, else the OPENAI_BASE_URL / ANTHROPIC_BASE_URL env var, else
+    the SDK's own default.
+    """
+    return (
+        CLIENT_SETTINGS.get(f"{provider}_base_url")
+        or os.getenv(f"{provider.upper()}_BASE_URL")
+        or SDK_BASE_URLS[provider]
+    )
+
+
+def get_client(provider: str, api_key: str = None, base_url: str = None):
+    """
+    Get the shared synchronous client for a provider.
+    
+    One client is created per (provider, api_key, base_url) and reused by
+    every caller and thread; the SDK clients are thread-safe.
+    
+    Args:
+        provider: "openai" or "anthropic"
+        api_key: API key (None = read from the environment)
+        base_url: API base URL (None = the configured default, see
+            configure_clients)
+    
+    Returns:
+        OpenAI or Anthropic client
+    """
+    base_url = base_url or CLIENT_SETTINGS.get(f"{provider}_base_url")
+    key = (provider, api_key, base_url)
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _clients[key] = _create_client(provider, api_key, base_url, False)
+    return client
+
+
+def get_async_client(provider: str, api_key: str = None, base_url: str = None):
+    """
+    Get the shared async client for a provider in the running event loop.
+    
+    Async connection pools are bound to the event loop that created them,
+    so there is one client per loop; it is dropped with its loop.
+    
+    Args:
+        provider: "openai" or "anthropic"
+        api_key: API key (None = read from the environment)
+        base_url: API base URL (None = the configured default, see
+            configure_clients)
+    
+    Returns:
+        AsyncOpenAI or AsyncAnthropic client
+    """
+    loop = asyncio.get_running_loop()
+    base_url = base_url or CLIENT_SETTINGS.get(f"{provider}_base_url")
+    key = (provider, api_key, base_url)
+    with _lock:
+        loop_clients = _async_clients.setdefault(loop, {})
+        client = loop_clients.get(key)
+        if client is None:
+            client = loop_clients[key] = _create_client(provider, api_key, base_url, True)
+    return client
+
+
+def get_openai_client(api_key: str = None, base_url: str = None):
+    """Shared OpenAI client (see get_client)."""
+    return get_client("openai", api_key, base_url)
+
+
+def get_anthropic_client(api_key: str = None, base_url: str = None):
+    """Shared Anthropic client (see get_client)."""
+    return get_client("anthropic", api_key, base_url)
+
+
+def get_async_openai_client(api_key: str = None, base_url: str = None):
+    """Shared AsyncOpenAI client for the running loop (see get_async_client)."""
+    return get_async_client("openai", api_key, base_url)
+
+
+def get_async_anthropic_client(api_key: str = None, base_url: str = None):
+    """Shared AsyncAnthropic client for the running loop (see get_async_client)."""
+    return get_async_client("anthropic", api_key, base_url)
+
+
+def close_clients() -> None:
+    """
+    Close all shared synchronous clients and forget them.
+    
+    Async clients are released when their event loop is garbage collected.
+    """
+    with _lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client.close()
+
+
+class LazyClient:
+    """
+    Stand-in for a client that is only built when first used.
+    
+    Scripts that keep a module-level client can create it as a
+    LazyClient, so importing the script does not import the SDK or read
+    .env; the factory runs once, on the first attribute access, and the
+    built client is used from then on (thread-safe).
+    
+    Example:
+        >>> client = LazyClient(lambda: with_rate_limit(get_openai_client()))
+        >>> client.chat.completions.create(...)   # Built here
+    """
+    
+    def __init__(self, factory: Callable[[], object]):
+        self._factory = factory
+        self._client = None
+        self._lock = threading.Lock()
+    
+    def get(self):
+        """The built client (building it on the first call)."""
+        client = self._client
+        if client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._factory()
+                client = self._client
+        return client
+    
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+
+class ChatClientWrapper:
+    """
+    Base class for layers that intercept client.chat.completions.create().
+    
+    A wrapper looks like an OpenAI client to the code using it: calls to
+    wrapper.chat.completions.create(...) go to the wrapper's create()
+    method, and every other attribute is read from the wrapped client.
+    Wrappers can be stacked, e.g. a cache around a rate limiter.
+    
+    Subclasses override create() and call super().create(**params) to
+    pass the request on.
+    """
+    
+    def __init__(self, client):
+        self.client = client
+        self.chat = _ChatNamespace(self)
+    
+    def create(self, **params):
+        """Send a chat completion request to the wrapped client."""
+        return self.client.chat.completions.create(**params)
+    
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+
+class _ChatNamespace:
+    def __init__(self, wrapper: ChatClientWrapper):
+        self.completions = wrapper
+    
+    def __getattr__(self, name):
+        return getattr(self.completions.client.chat, name)
+
+
+def _build_default_chat_client():
+    # Imported here: the wrapper modules build on ChatClientWrapper above
+    from dotenv import load_dotenv
+    from rate_limiter import with_rate_limit
+    from response_cache import with_response_cache
+    from single_flight import with_single_flight
+    
+    load_dotenv()
+    return with_response_cache(with_single_flight(with_rate_limit(get_openai_client())))
+
+
+def default_chat_client() -> LazyClient:
+    """
+    OpenAI client with the standard wrappers, for module-level use in
+    the course scripts.
+    
+    Requests wait for RPM/TPM capacity, identical concurrent requests
+    share one call, and low-temperature requests are answered from the
+    response cache when repeated. The client is built on the first
+    request, so importing a script does not load the OpenAI SDK or read
+    .env.
+    
+    Example:
+        >>> client = default_chat_client()
+        >>> client.chat.completions.create(...)   # Built here
+    """
+    return LazyClient(_build_default_chat_client)
+
+
+def benchmark_client_reuse(num_requests: int = 200) -> None:
+    """
+    Compare a new client per request with the shared client, against the
+    local mock server.
+    
+    The mock server runs over plain HTTP on localhost, so the gap shown
+    here is client construction plus TCP connect only; against the real
+    APIs each new client also pays a TLS handshake over the network.
+    
+    Args:
+        num_requests: Requests per approach
+    """
+    from openai import OpenAI
+    from mock_llm_server import start_mock_server
+    
+    server, base_url = start_mock_server()
+    messages = [{"role": "user", "content": "What is the capital of France?"}]
+    
+    def per_call() -> None:
+        client = OpenAI(api_key="mock", base_url=f"{base_url}/v1")
+        client.chat.completions.create(model="gpt-3.5-turbo", messages=messages, max_tokens=20)
+    
+    def shared() -> None:
+        client = get_openai_client(api_key="mock", base_url=f"{base_url}/v1")
+        client.chat.completions.create(model="gpt-3.5-turbo", messages=messages, max_tokens=20)
+    
+    print(f"\n{'='*70}")
+    print(f"CLIENT REUSE BENCHMARK ({num_requests} requests, local mock server)")
+    print(f"{'='*70}")
+    print(f"{'Approach':<25} {'Mean ms':>10} {'p99 ms':>10}")
+    print("-" * 70)
+    
+    try:
+        for label, call in [("New client per call", per_call), ("Shared client", shared)]:
+            call()  # Warm up
+            latencies = []
+            for _ in range(num_requests):
+                start = time.perf_counter()
+                call()
+                latencies.append((time.perf_counter() - start) * 1000)
+            latencies.sort()
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            print(f"{label:<25} {sum(latencies) / len(latencies):>10.2f} {p99:>10.2f}")
+    finally:
+        close_clients()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    benchmark_client_reuse()
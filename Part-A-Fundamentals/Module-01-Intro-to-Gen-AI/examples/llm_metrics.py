@@ -0,0 +1,452 @@
+"""
+LLM Metrics - Latency, Tokens, Cost and Errors for Every Call
+
+This module records each LLM call into an in-process metrics registry:
+1. Latency histograms per model (LogHistogram, HDR-style)
+2. Request, token, retry and cost counters
+3. Errors by exception class
+4. A span per call, in OpenTelemetry's data model
+
+The registry can be exported as Prometheus text (for a /metrics
+endpoint) or as OTLP/JSON spans (for any OpenTelemetry collector).
+Recording a call costs a few microseconds; run this file to measure it.
+
+Usage:
+    from llm_metrics import instrumented, with_metrics, get_registry
+
+    @instrumented("openai")
+    def call_openai(prompt, model="gpt-3.5-turbo", ...):
+        ...
+
+    client = with_metrics(get_openai_client())
+    print(get_registry().to_prometheus())
+"""
+
+import functools
+import inspect
+import random
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+
+from llm_clients import ChatClientWrapper, count_attempts
+from pricing_calculator import calculate_cost, current_price_table, on_price_refresh
+from usage_report import LogHistogram, resolve_model
+
+
+# Spans kept for export; older ones are dropped
+MAX_SPANS = 10_000
+
+
+@lru_cache(maxsize=256)
+def _token_prices(model: str) -> Tuple[float, float]:
+    # USD per input and per output token, or zeros for unpriced models
+    priced = resolve_model(model)
+    if priced is None:
+        return 0.0, 0.0
+    return (calculate_cost(1, 0, priced)['total_cost'],
+            calculate_cost(0, 1, priced)['total_cost'])
+
+
+on_price_refresh(_token_prices.cache_clear)
+
+
+class _ModelStats:
+    # Counters and latency histogram for one (provider, model)
+    __slots__ = ('requests', 'errors', 'retries', 'input_tokens', 'output_tokens',
+                 'cost_usd', 'latency', 'latency_sum')
+    
+    def __init__(self):
+        self.requests = 0
+        self.errors: Dict[str, int] = {}
+        self.retries = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cost_usd = 0.0
+        self.latency = LogHistogram()
+        self.latency_sum = 0.0
+
+
+class MetricsRegistry:
+    """
+    In-process store of LLM call metrics.
+    
+    Example:
+        >>> registry = MetricsRegistry()
+        >>> registry.record_call("openai", "gpt-4", 850.0, input_tokens=12, output_tokens=40)
+        >>> registry.snapshot()[("openai", "gpt-4")]['p50_ms']
+        847.2021850399715
+    """
+    
+    def __init__(self, record_spans: bool = True, max_spans: int = MAX_SPANS):
+        self.record_spans = record_spans
+        self.spans: deque = deque(maxlen=max_spans)
+        self._stats: Dict[Tuple[str, str], _ModelStats] = {}
+        self._lock = threading.Lock()
+    
+    def record_call(
+        self,
+        provider: str,
+        model: str,
+        latency_ms: float,
+        input_tokens: int = 0,
+        output_tokens: int = 0,
+        error: Optional[str] = None,
+        retries: int = 0,
+        start_time: float = None
+    ) -> None:
+        """
+        Record one finished call.
+        
+        Args:
+            provider: "openai", "anthropic", ...
+            model: Model name as requested or reported
+            latency_ms: Wall time of the call
+            input_tokens: Prompt tokens used
+            output_tokens: Completion tokens used
+            error: Error class name if the call failed
+            retries: HTTP retries made by the SDK
+            start_time: Call start as time.time() (None = now - latency)
+        """
+        # Rebuilds the price table, clearing _token_prices, after PRICING_DATA edits
+        current_price_table()
+        input_price, output_price = _token_prices(model)
+        cost = input_tokens * input_price + output_tokens * output_price
+        
+        with self._lock:
+            stats = self._stats.get((provider, model))
+            if stats is None:
+                stats = self._stats[(provider, model)] = _ModelStats()
+            stats.requests += 1
+            stats.retries += retries
+            stats.input_tokens += input_tokens
+            stats.output_tokens += output_tokens
+            stats.cost_usd += cost
+            stats.latency.record(latency_ms)
+            stats.latency_sum += latency_ms
+            if error is not None:
+                stats.errors[error] = stats.errors.get(error, 0) + 1
+        
+        if self.record_spans:
+            end = time.time()
+            start = start_time if start_time is not None else end - latency_ms / 1000
+            attributes = {
+                'gen_ai.system': provider,
+                'gen_ai.request.model': model,
+                'gen_ai.usage.input_tokens': input_tokens,
+                'gen_ai.usage.output_tokens': output_tokens,
+                'llm.cost_usd': cost,
+                'llm.retries': retries,
+            }
+            if error is not None:
+                attributes['error.type'] = error
+            # deque.append is atomic, so no lock is needed here
+            self.spans.append({
+                'traceId': f"{random.getrandbits(128):032x}",
+                'spanId': f"{random.getrandbits(64):016x}",
+                'name': f"chat {model}",
+                'kind': 3,  # SPAN_KIND_CLIENT
+                'startTimeUnixNano': int(start * 1e9),
+                'endTimeUnixNano': int(end * 1e9),
+                'attributes': attributes,
+                'status': {'code': 2 if error else 1},  # ERROR / OK
+            })
+    
+    def snapshot(self) -> Dict[Tuple[str, str], dict]:
+        """Current totals and latency percentiles per (provider, model)."""
+        with self._lock:
+            return {
+                key: {
+                    'requests': stats.requests,
+                    'errors': dict(stats.errors),
+                    'retries': stats.retries,
+                    'input_tokens': stats.input_tokens,
+                    'output_tokens': stats.output_tokens,
+                    'cost_usd': stats.cost_usd,
+                    'p50_ms': stats.latency.percentile(50),
+                    'p95_ms': stats.latency.percentile(95),
+                    'p99_ms': stats.latency.percentile(99),
+                }
+                for key, stats in self._stats.items()
+            }
+    
+    def to_prometheus(self) -> str:
+        """
+        All metrics in the Prometheus text exposition format.
+        
+        Latency is exported as a summary (p50/p90/p99 plus sum and count).
+        """
+        lines: List[str] = []
+        
+        def family(name: str, kind: str, help_text: str) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+        
+        with self._lock:
+            items = sorted(self._stats.items())
+            
+            family("llm_requests_total", "counter", "LLM API calls.")
+            for (provider, model), stats in items:
+                lines.append(f"llm_requests_total{_labels(provider, model)} {stats.requests}")
+            
+            family("llm_errors_total", "counter", "Failed LLM API calls by error class.")
+            for (provider, model), stats in items:
+                for error, count in sorted(stats.errors.items()):
+                    lines.append(f"llm_errors_total{_labels(provider, model, error=error)} {count}")
+            
+            family("llm_retries_total", "counter", "HTTP retries made by the SDKs.")
+            for (provider, model), stats in items:
+                lines.append(f"llm_retries_total{_labels(provider, model)} {stats.retries}")
+            
+            family("llm_tokens_total", "counter", "Tokens used.")
+            for (provider, model), stats in items:
+                lines.append(f"llm_tokens_total{_labels(provider, model, direction='input')} {stats.input_tokens}")
+                lines.append(f"llm_tokens_total{_labels(provider, model, direction='output')} {stats.output_tokens}")
+            
+            family("llm_cost_usd_total", "counter", "Cost in USD from pricing_calculator.")
+            for (provider, model), stats in items:
+                lines.append(f"llm_cost_usd_total{_labels(provider, model)} {stats.cost_usd:.10g}")
+            
+            family("llm_request_duration_ms", "summary", "LLM API call latency in milliseconds.")
+            for (provider, model), stats in items:
+                for q in (0.5, 0.9, 0.99):
+                    value = stats.latency.percentile(q * 100)
+                    lines.append(
+                        f"llm_request_duration_ms{_labels(provider, model, quantile=str(q))} {value:.3f}"
+                    )
+                lines.append(f"llm_request_duration_ms_sum{_labels(provider, model)} {stats.latency_sum:.3f}")
+                lines.append(f"llm_request_duration_ms_count{_labels(provider, model)} {stats.requests}")
+        
+        return "\n".join(lines) + "\n"
+    
+    def export_spans(self, service_name: str = "llm-examples", clear: bool = True) -> dict:
+        """
+        Recorded spans as an OTLP/JSON ExportTraceServiceRequest.
+        
+        POST the result to a collector's /v1/traces endpoint.
+        
+        Args:
+            service_name: Value of the service.name resource attribute
+            clear: Drop the exported spans from the buffer
+        """
+        spans = list(self.spans)
+        if clear:
+            for _ in range(len(spans)):
+                self.spans.popleft()
+        
+        return {
+            'resourceSpans': [{
+                'resource': {'attributes': [_otlp_attribute('service.name', service_name)]},
+                'scopeSpans': [{
+                    'scope': {'name': "llm_metrics"},
+                    'spans': [
+                        dict(span, attributes=[_otlp_attribute(k, v) for k, v in span['attributes'].items()])
+                        for span in spans
+                    ],
+                }],
+            }],
+        }
+    
+    def reset(self) -> None:
+        """Forget all metrics and spans."""
+        with self._lock:
+            self._stats.clear()
+            self.spans.clear()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(provider: str, model: str, **extra) -> str:
+    pairs = [('provider', provider), ('model', model)] + list(extra.items())
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in pairs) + "}"
+
+
+def _otlp_attribute(key: str, value) -> dict:
+    if isinstance(value, bool):
+        return {'key': key, 'value': {'boolValue': value}}
+    if isinstance(value, int):
+        return {'key': key, 'value': {'intValue': str(value)}}
+    if isinstance(value, float):
+        return {'key': key, 'value': {'doubleValue': value}}
+    return {'key': key, 'value': {'stringValue': str(value)}}
+
+
+_registry = MetricsRegistry()
+
+
+def get_registry() -> MetricsRegistry:
+    """The process-wide registry used when none is passed explicitly."""
+    return _registry
+
+
+def instrumented(provider: str, registry: MetricsRegistry = None):
+    """
+    Decorator recording every call of a call_openai()/call_anthropic()-style
+    function (plain or async).
+    
+    The function must take a model argument and return the usual result
+    dict; 'error_type' in the result is recorded as the error class.
+    
+    Example:
+        >>> @instrumented("openai")
+        ... def call_openai(prompt, model="gpt-3.5-turbo", temperature=0.7, max_tokens=150):
+        ...     ...
+    """
+    def decorator(func: Callable):
+        signature = inspect.signature(func)
+        default_model = signature.parameters['model'].default
+        
+        def record(kwargs: dict, args: tuple, result: dict, start: float, started_at: float,
+                   attempts: int) -> None:
+            model = kwargs.get('model')
+            if model is None:
+                # Positional model argument (rare): fall back to binding
+                bound = signature.bind_partial(*args, **kwargs)
+                model = bound.arguments.get('model', default_model)
+            (registry or _registry).record_call(
+                provider,
+                model,
+                (time.perf_counter() - start) * 1000,
+                input_tokens=result.get('input_tokens', 0),
+                output_tokens=result.get('output_tokens', 0),
+                error=result.get('error_type', "Error") if 'error' in result else None,
+                retries=max(0, attempts - 1),
+                start_time=started_at
+            )
+        
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                started_at, start = time.time(), time.perf_counter()
+                with count_attempts() as attempts:
+                    result = await func(*args, **kwargs)
+                record(kwargs, args, result, start, started_at, attempts[0])
+                return result
+            return async_wrapper
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started_at, start = time.time(), time.perf_counter()
+            with count_attempts() as attempts:
+                result = func(*args, **kwargs)
+            record(kwargs, args, result, start, started_at, attempts[0])
+            return result
+        
+        return wrapper
+    
+    return decorator
+
+
+class InstrumentedClient(ChatClientWrapper):
+    """
+    OpenAI client wrapper recording every chat.completions.create() call.
+    
+    Streaming calls are recorded when the request is sent, without usage.
+    """
+    
+    def __init__(self, client, registry: MetricsRegistry = None, provider: str = "openai"):
+        super().__init__(client)
+        self.registry = registry
+        self.provider = provider
+    
+    def create(self, **params):
+        registry = self.registry or _registry
+        started_at, start = time.time(), time.perf_counter()
+        with count_attempts() as attempts:
+            try:
+                response = super().create(**params)
+            except Exception as e:
+                registry.record_call(self.provider, params.get('model', "unknown"),
+                                     (time.perf_counter() - start) * 1000, error=type(e).__name__,
+                                     retries=max(0, attempts[0] - 1), start_time=started_at)
+                raise
+        
+        usage = getattr(response, 'usage', None)
+        registry.record_call(
+            self.provider,
+            params.get('model', "unknown"),
+            (time.perf_counter() - start) * 1000,
+            input_tokens=usage.prompt_tokens if usage else 0,
+            output_tokens=usage.completion_tokens if usage else 0,
+            retries=max(0, attempts[0] - 1),
+            start_time=started_at
+        )
+        return response
+
+
+def with_metrics(client, registry: MetricsRegistry = None):
+    """
+    Wrap an OpenAI client so chat.completions.create() calls are recorded.
+    
+    Args:
+        client: OpenAI client (or another ChatClientWrapper)
+        registry: Registry to record into (None = get_registry())
+    
+    Returns:
+        InstrumentedClient: Drop-in replacement for the client
+    """
+    return InstrumentedClient(client, registry)
+
+
+def print_metrics(registry: MetricsRegistry = None) -> None:
+    """Print a per-model table of the recorded metrics."""
+    snapshot = (registry or _registry).snapshot()
+    
+    print(f"\n{'='*80}")
+    print("LLM CALL METRICS")
+    print(f"{'='*80}")
+    print(f"{'Model':<30} {'Calls':>6} {'Errors':>7} {'Tokens':>9} {'Cost $':>10} {'p50 ms':>8} {'p99 ms':>8}")
+    print("-" * 80)
+    for (provider, model), stats in sorted(snapshot.items()):
+        errors = sum(stats['errors'].values())
+        tokens = stats['input_tokens'] + stats['output_tokens']
+        print(f"{model:<30} {stats['requests']:>6} {errors:>7} {tokens:>9,} "
+              f"{stats['cost_usd']:>10.6f} {stats['p50_ms']:>8.1f} {stats['p99_ms']:>8.1f}")
+
+
+def benchmark_overhead(num_calls: int = 200_000) -> None:
+    """
+    Measure what instrumentation adds to each call, using a function that
+    returns immediately so only the overhead is timed.
+    
+    Args:
+        num_calls: Calls per measurement
+    """
+    result = {'text': "ok", 'model': "gpt-3.5-turbo", 'input_tokens': 12,
+              'output_tokens': 40, 'total_tokens': 52}
+    
+    def call_openai(prompt: str, model: str = "gpt-3.5-turbo") -> dict:
+        return result
+    
+    cases = [
+        ("Bare function", call_openai),
+        ("Instrumented, no spans", instrumented("openai", MetricsRegistry(record_spans=False))(call_openai)),
+        ("Instrumented with spans", instrumented("openai", MetricsRegistry())(call_openai)),
+    ]
+    
+    print(f"\n{'='*70}")
+    print(f"INSTRUMENTATION OVERHEAD ({num_calls:,} calls)")
+    print(f"{'='*70}")
+    print(f"{'Variant':<30} {'µs per call':>12} {'Overhead µs':>12}")
+    print("-" * 70)
+    
+    baseline = None
+    for label, func in cases:
+        func("warm up", model="gpt-3.5-turbo")
+        start = time.perf_counter()
+        for _ in range(num_calls):
+            func("What is AI?", model="gpt-3.5-turbo")
+        per_call = (time.perf_counter() - start) / num_calls * 1e6
+        if baseline is None:
+            baseline = per_call
+        print(f"{label:<30} {per_call:>12.2f} {per_call - baseline:>12.2f}")
+
+
+if __name__ == "__main__":
+    benchmark_overhead()
+    print()
+    print(get_registry().to_prometheus() or "(no calls recorded in this process)")
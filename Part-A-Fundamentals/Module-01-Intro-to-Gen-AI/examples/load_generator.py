@@ -0,0 +1,250 @@
+"""
+Load Generator - Replay Usage Scenarios as Real Traffic
+
+The scenarios in pricing_calculator.SCENARIOS describe load shapes
+(requests per day, average input and output tokens) but are only used
+for cost projections. This module turns a scenario into traffic:
+1. Arrivals are a Poisson process at requests_per_day, sped up
+2. Each request's input and output length is drawn around the averages
+3. Requests are sent open-loop: a slow response never delays the next
+   arrival, as with real users
+4. The report shows throughput, latency percentiles, errors, and the
+   real cost next to the projected one
+
+Latency is measured from each request's scheduled arrival, so time spent
+queued in the client layer (rate limiter, connection pool) counts too.
+The rate limiter's share is reported separately, since a load test
+against a mock server would otherwise measure our own RPM/TPM budget.
+
+Usage:
+    from load_generator import run_scenario, print_load_report
+    from pricing_calculator import SCENARIOS
+
+    report = run_scenario(SCENARIOS[0], "gpt-3.5-turbo", speedup=500, duration=30)
+    print_load_report(report)
+
+    python load_generator.py   # Every scenario against the local mock server
+"""
+
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, Dict, List
+
+from basic_llm_call import acall_model
+from llm_clients import API_MODEL_NAMES
+from pricing_calculator import calculate_cost
+from rate_limiter import RateLimiter, get_default_limiter
+from usage_report import LogHistogram, resolve_model
+
+
+# Shape of the gamma distribution for token lengths: coefficient of
+# variation 1/sqrt(shape), i.e. lengths typically within +-50% of the mean
+LENGTH_SHAPE = 4.0
+
+# Client-side limits for a mock server, which has none of its own: high
+# enough that the rate limiter never holds a request back
+MOCK_RATE_LIMIT = {"rpm": 1_000_000, "tpm": 1_000_000_000}
+
+# Filler words for synthetic prompts (about one token each)
+_WORDS = ("the report shows that our team can help with this request for more "
+          "data about sales and support in each region over time").split()
+
+
+def synthetic_prompt(num_tokens: int, request_id: int) -> str:
+    """
+    A prompt of roughly num_tokens tokens, unique per request_id so
+    caching and coalescing do not answer it.
+    """
+    words = [_WORDS[(request_id + i) % len(_WORDS)] for i in range(max(1, num_tokens - 3))]
+    return f"Request {request_id}: " + " ".join(words)
+
+
+async def _default_call(model: str, prompt: str, max_tokens: int) -> dict:
+    return await acall_model(prompt, model=model, max_tokens=max_tokens)
+
+
+async def arun_scenario(
+    scenario: dict,
+    model: str,
+    speedup: float = 1.0,
+    duration: float = 60.0,
+    seed: int = 0,
+    call: Callable[[str, str, int], Awaitable[dict]] = None,
+    limiter: RateLimiter = None
+) -> Dict[str, object]:
+    """
+    Send one scenario's traffic to a model for a fixed time.
+    
+    Args:
+        scenario: Entry shaped like pricing_calculator.SCENARIOS
+            ('requests_per_day', 'avg_input', 'avg_output')
+        model: PRICING_DATA or API model name
+        speedup: Multiplier on requests_per_day (e.g. 500 turns 500/day
+            into about 3 requests per second)
+        duration: Seconds to generate arrivals for; requests still in
+            flight afterwards are awaited
+        seed: Seed for arrivals and lengths (same seed = same traffic)
+        call: async (model, prompt, max_tokens) -> result dict
+            (default: acall_model())
+        limiter: Rate limiter the calls go through, whose waits are
+            reported (None = get_default_limiter())
+    
+    Returns:
+        dict: Offered and achieved request rates, latency percentiles,
+        time spent waiting in the rate limiter, errors by class, token
+        totals, and real vs projected cost
+    """
+    rng = random.Random(seed)
+    call = call or _default_call
+    limiter = limiter or get_default_limiter()
+    rate = scenario['requests_per_day'] * speedup / 86400
+    if rate <= 0:
+        raise ValueError("Scenario has no traffic (requests_per_day * speedup must be > 0)")
+    
+    latency = LogHistogram()
+    errors: Dict[str, int] = {}
+    totals = {'input_tokens': 0, 'output_tokens': 0, 'cost': 0.0}
+    priced = resolve_model(API_MODEL_NAMES.get(model, model))
+    
+    def draw_length(mean: float) -> int:
+        return max(1, round(rng.gammavariate(LENGTH_SHAPE, mean / LENGTH_SHAPE)))
+    
+    async def send(request_id: int, arrival: float, input_tokens: int, max_tokens: int) -> None:
+        try:
+            result = await call(model, synthetic_prompt(input_tokens, request_id), max_tokens)
+        except Exception as e:
+            result = {'error': str(e), 'error_type': type(e).__name__}
+        latency.record((time.perf_counter() - arrival) * 1000)
+        
+        if 'error' in result:
+            error = result.get('error_type', "Error")
+            errors[error] = errors.get(error, 0) + 1
+            return
+        totals['input_tokens'] += result.get('input_tokens', 0)
+        totals['output_tokens'] += result.get('output_tokens', 0)
+        if priced is not None:
+            totals['cost'] += calculate_cost(result.get('input_tokens', 0),
+                                             result.get('output_tokens', 0), priced)['total_cost']
+    
+    tasks: List[asyncio.Task] = []
+    limiter_before = limiter.stats()
+    start = time.perf_counter()
+    next_arrival = start + rng.expovariate(rate)
+    while next_arrival < start + duration:
+        delay = next_arrival - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        # Lengths are drawn here, in arrival order, so a seed always
+        # produces the same requests
+        tasks.append(asyncio.ensure_future(send(
+            len(tasks), next_arrival,
+            draw_length(scenario['avg_input']), draw_length(scenario['avg_output'])
+        )))
+        next_arrival += rng.expovariate(rate)
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    limiter_after = limiter.stats()
+    
+    sent = len(tasks)
+    completed = sent - sum(errors.values())
+    projected = 0.0
+    if priced is not None:
+        projected = calculate_cost(scenario['avg_input'], scenario['avg_output'], priced)['total_cost'] * sent
+    
+    return {
+        'scenario': scenario.get('name', "custom"),
+        'model': model,
+        'offered_rps': rate,
+        'sent': sent,
+        'completed': completed,
+        'achieved_rps': completed / elapsed if elapsed > 0 else 0.0,
+        'elapsed_s': elapsed,
+        'p50_ms': latency.percentile(50),
+        'p95_ms': latency.percentile(95),
+        'p99_ms': latency.percentile(99),
+        'limiter_waits': limiter_after['waits'] - limiter_before['waits'],
+        'limiter_wait_s': limiter_after['wait_seconds'] - limiter_before['wait_seconds'],
+        'errors': errors,
+        'error_rate': (sent - completed) / sent if sent else 0.0,
+        'input_tokens': totals['input_tokens'],
+        'output_tokens': totals['output_tokens'],
+        'real_cost': totals['cost'],
+        'projected_cost': projected,
+    }
+
+
+def run_scenario(scenario: dict, model: str, **kwargs) -> Dict[str, object]:
+    """Blocking wrapper around arun_scenario() for scripts without an event loop."""
+    return asyncio.run(arun_scenario(scenario, model, **kwargs))
+
+
+def print_load_report(report: Dict[str, object]) -> None:
+    """
+    Print one load-test report.
+    
+    Args:
+        report: Result of run_scenario()
+    """
+    print(f"\n📈 {report['scenario']} -> {report['model']}")
+    print(f"   Requests:   {report['sent']:,} sent, {report['completed']:,} completed "
+          f"in {report['elapsed_s']:.1f}s")
+    print(f"   Throughput: {report['achieved_rps']:.2f} req/s achieved "
+          f"({report['offered_rps']:.2f} offered)")
+    print(f"   Latency:    p50 {report['p50_ms']:.0f} ms, p95 {report['p95_ms']:.0f} ms, "
+          f"p99 {report['p99_ms']:.0f} ms")
+    if report['sent']:
+        print(f"   Limiter:    {report['limiter_waits']:,} requests waited, "
+              f"{report['limiter_wait_s'] / report['sent'] * 1000:.0f} ms per request "
+              f"(included in latency)")
+    errors = ", ".join(f"{name} {count}" for name, count in sorted(report['errors'].items()))
+    print(f"   Errors:     {report['error_rate']:.1%}" + (f" ({errors})" if errors else ""))
+    print(f"   Tokens:     {report['input_tokens']:,} input + {report['output_tokens']:,} output")
+    print(f"   Cost:       ${report['real_cost']:.6f} real vs ${report['projected_cost']:.6f} projected")
+
+
+def demonstrate_load_generation(duration: float = 10.0, requests_per_second: float = 20.0) -> None:
+    """
+    Replay every scenario against the local mock server, each sped up
+    to the same request rate.
+    
+    The mock server answers with a long-tailed latency (median 150 ms,
+    p99 800 ms), generates 200 tokens per second and rate-limits 1% of
+    requests, so the report has realistic percentiles and some retries.
+    The default rate limiter gets MOCK_RATE_LIMIT for the run, so the
+    tier-1 limits do not throttle the offered load.
+    
+    Args:
+        duration: Seconds of traffic per scenario
+        requests_per_second: Offered load for every scenario
+    """
+    from mock_llm_server import lognormal_latency, start_mock_server, use_mock_server
+    from pricing_calculator import SCENARIOS
+    
+    server, base_url = start_mock_server(
+        latency=lognormal_latency(0.15, 0.8),
+        tokens_per_second=200,
+        rate_limit_rate=0.01
+    )
+    use_mock_server(base_url)
+    limiter = get_default_limiter()
+    saved_limits = limiter.limits
+    limiter.limits = {model: MOCK_RATE_LIMIT for model in saved_limits}
+    
+    print(f"\n{'='*80}")
+    print(f"LOAD GENERATION ({requests_per_second:.0f} req/s for {duration:.0f}s per scenario, "
+          f"local mock server)")
+    print(f"{'='*80}")
+    
+    try:
+        for scenario in SCENARIOS:
+            speedup = requests_per_second * 86400 / scenario['requests_per_day']
+            report = run_scenario(scenario, "gpt-3.5-turbo", speedup=speedup, duration=duration)
+            print_load_report(report)
+    finally:
+        limiter.limits = saved_limits
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    demonstrate_load_generation()
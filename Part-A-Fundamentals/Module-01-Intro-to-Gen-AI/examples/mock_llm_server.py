@@ -0,0 +1,679 @@
+"""
+Mock LLM Server - A Local Stand-in for the OpenAI and Anthropic APIs
+
+This module runs a small HTTP server that answers the endpoints the
+examples use:
+1. POST /v1/chat/completions  (OpenAI chat completions, plain or streamed)
+2. POST /v1/messages          (Anthropic messages, plain or streamed)
+3. OpenAI files and batches, and Anthropic message batches, so
+   batch_jobs.py can be run offline
+
+Responses echo the last user message (or return a canned answer for
+known prompts), with usage fields filled in, so the client code in
+basic_llm_call.py can be benchmarked and exercised without API keys or
+network access. Latency, generation speed and injected 429/500 errors
+are configurable, and random draws come from a seeded generator so a
+run can be repeated.
+
+Usage:
+    python mock_llm_server.py --port 8000 --latency 0.2 --tokens-per-second 80
+
+    # Then point the SDKs at it:
+    OPENAI_BASE_URL=http://127.0.0.1:8000/v1
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8000
+
+    # Or, in-process:
+    server, base_url = start_mock_server(tokens_per_second=80)
+    use_mock_server(base_url)
+    call_openai("What is the capital of France?")
+"""
+
+import argparse
+import email.parser
+import email.policy
+import json
+import math
+import os
+import random
+import re
+import socket
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+
+# z-score of the 99th percentile of a normal distribution
+_Z99 = 2.3263
+
+
+def _fake_tokens(text: str) -> int:
+    # Roughly 4 characters per token, like English text
+    return max(1, len(text) // 4)
+
+
+def _last_user_text(messages: list) -> str:
+    for message in reversed(messages):
+        if message.get('role') == 'user':
+            content = message.get('content', '')
+            if isinstance(content, list):
+                content = " ".join(part.get('text', '') for part in content)
+            return content
+    return ""
+
+
+def lognormal_latency(median: float, p99: float, seed: int = 0) -> Callable[[], float]:
+    """
+    Latency function with a long right tail, like real API latencies.
+    
+    Args:
+        median: Median latency in seconds
+        p99: 99th-percentile latency in seconds (>= median)
+        seed: Seed for the random generator (same seed = same delays)
+    
+    Returns:
+        callable: Returns a fresh delay in seconds on every call; pass
+        it as start_mock_server(latency=...)
+    
+    Example:
+        >>> server, base_url = start_mock_server(latency=lognormal_latency(0.3, 2.0))
+    """
+    if p99 < median:
+        raise ValueError("p99 must be at least the median")
+    rng = random.Random(seed)
+    mu = math.log(median)
+    sigma = math.log(p99 / median) / _Z99
+    return lambda: rng.lognormvariate(mu, sigma)
+
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    """
+    Request handler speaking the OpenAI and Anthropic wire formats.
+    """
+    
+    # Keep connections open between requests, like the real APIs
+    protocol_version = "HTTP/1.1"
+    
+    # Seconds to wait before answering each request (time to first
+    # token when streaming), or a function returning a fresh delay for
+    # every request
+    latency = 0.0
+    
+    # Output generation speed after the first token (0 = instant)
+    tokens_per_second = 0.0
+    
+    # Fractions of chat requests answered with a 429 or a 500 error, and
+    # the retry delay suggested with each 429
+    rate_limit_rate = 0.0
+    error_rate = 0.0
+    retry_after = 0.1
+    
+    # Last user message -> canned reply (other prompts are echoed)
+    responses: Dict[str, str] = {}
+    
+    # Generator for error injection (one per server)
+    rng = random.Random(0)
+    rng_lock = threading.Lock()
+    
+    # Files and batch jobs (one store per server)
+    batch_store: "BatchStore" = None
+    
+    def setup(self):
+        super().setup()
+        # Headers and body are written separately; don't let Nagle's
+        # algorithm hold the body back waiting for an ACK
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length)
+        if "/batches" in self.path or self.path.endswith("/files"):
+            self._batch_api("POST", body)
+            return
+        request = json.loads(body or b"{}")
+        
+        if self.path.endswith("/chat/completions"):
+            api = "openai"
+        elif self.path.endswith("/messages"):
+            api = "anthropic"
+        else:
+            self._send_json(404, {'error': {'message': f"Unknown path: {self.path}"}})
+            return
+        
+        if self._inject_error(api):
+            return
+        
+        delay = self.latency() if callable(self.latency) else self.latency
+        if delay:
+            time.sleep(delay)
+        
+        if request.get('stream'):
+            events = self._openai_events(request) if api == "openai" else self._anthropic_events(request)
+            self._send_stream(events)
+            return
+        
+        response = self._openai_response(request) if api == "openai" else self._anthropic_response(request)
+        if self.tokens_per_second:
+            output_tokens = (response['usage'].get('completion_tokens')
+                             or response['usage'].get('output_tokens', 0))
+            time.sleep(output_tokens / self.tokens_per_second)
+        self._send_json(200, response)
+    
+    def do_GET(self):
+        self._batch_api("GET", b"")
+    
+    def _send_json(self, status: int, body: dict, headers: Dict[str, str] = None) -> None:
+        self._send_bytes(status, json.dumps(body).encode('utf-8'), 'application/json', headers)
+    
+    def _send_bytes(self, status: int, data: bytes, content_type: str,
+                    headers: Dict[str, str] = None) -> None:
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up (e.g. a cancelled hedge request)
+            self.close_connection = True
+    
+    def _inject_error(self, api: str) -> bool:
+        # Answer with a 429 or 500 in the provider's error format, at the
+        # configured rates. Returns True if an error was sent.
+        if not (self.rate_limit_rate or self.error_rate):
+            return False
+        with self.rng_lock:
+            draw = self.rng.random()
+        
+        if draw < self.rate_limit_rate:
+            status, error_type, message = 429, "rate_limit_error", "Rate limit reached (injected)"
+            headers = {'retry-after-ms': str(int(self.retry_after * 1000)),
+                       'retry-after': str(math.ceil(self.retry_after))}
+        elif draw < self.rate_limit_rate + self.error_rate:
+            status, message, headers = 500, "Internal server error (injected)", None
+            error_type = "server_error" if api == "openai" else "api_error"
+        else:
+            return False
+        
+        if api == "openai":
+            body = {'error': {'message': message, 'type': error_type, 'param': None,
+                              'code': "rate_limit_exceeded" if status == 429 else None}}
+        else:
+            body = {'type': 'error', 'error': {'type': error_type, 'message': message}}
+        self._send_json(status, body, headers)
+        return True
+    
+    def _send_stream(self, events: Iterator[Tuple[Optional[str], object]]) -> None:
+        # Server-sent events over chunked transfer encoding, so the
+        # connection can stay open for the next request
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        try:
+            for name, data in events:
+                payload = data if isinstance(data, str) else json.dumps(data)
+                message = f"event: {name}\ndata: {payload}\n\n" if name else f"data: {payload}\n\n"
+                encoded = message.encode('utf-8')
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(encoded), encoded))
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+    
+    def _text_pieces(self, text: str, output_tokens: int) -> Iterator[str]:
+        # Word-sized deltas, spaced so the whole reply takes
+        # output_tokens / tokens_per_second
+        pieces: List[str] = re.findall(r"\s*\S+", text) or [text]
+        pause = output_tokens / self.tokens_per_second / len(pieces) if self.tokens_per_second else 0
+        for i, piece in enumerate(pieces):
+            if i and pause:
+                time.sleep(pause)
+            yield piece
+    
+    def _openai_events(self, request: dict) -> Iterator[Tuple[Optional[str], object]]:
+        text, input_tokens, output_tokens, truncated = self._reply_text(request)
+        chunk = {
+            'id': f"chatcmpl-{uuid.uuid4().hex}",
+            'object': 'chat.completion.chunk',
+            'created': int(time.time()),
+            'model': request.get('model', 'gpt-3.5-turbo'),
+            'system_fingerprint': None,
+        }
+        
+        def choice(delta: dict, finish_reason: str = None) -> dict:
+            return dict(chunk, choices=[{'index': 0, 'delta': delta, 'finish_reason': finish_reason}])
+        
+        yield None, choice({'role': 'assistant', 'content': ''})
+        for piece in self._text_pieces(text, output_tokens):
+            yield None, choice({'content': piece})
+        yield None, choice({}, 'length' if truncated else 'stop')
+        if (request.get('stream_options') or {}).get('include_usage'):
+            yield None, dict(chunk, choices=[], usage={
+                'prompt_tokens': input_tokens,
+                'completion_tokens': output_tokens,
+                'total_tokens': input_tokens + output_tokens
+            })
+        yield None, "[DONE]"
+    
+    def _anthropic_events(self, request: dict) -> Iterator[Tuple[Optional[str], object]]:
+        text, input_tokens, output_tokens, truncated = self._reply_text(request)
+        
+        yield 'message_start', {'type': 'message_start', 'message': {
+            'id': f"msg_{uuid.uuid4().hex}",
+            'type': 'message',
+            'role': 'assistant',
+            'model': request.get('model', 'claude-3-haiku-20240307'),
+            'content': [],
+            'stop_reason': None,
+            'stop_sequence': None,
+            'usage': {'input_tokens': input_tokens, 'output_tokens': 1}
+        }}
+        yield 'content_block_start', {'type': 'content_block_start', 'index': 0,
+                                      'content_block': {'type': 'text', 'text': ''}}
+        yield 'ping', {'type': 'ping'}
+        for piece in self._text_pieces(text, output_tokens):
+            yield 'content_block_delta', {'type': 'content_block_delta', 'index': 0,
+                                          'delta': {'type': 'text_delta', 'text': piece}}
+        yield 'content_block_stop', {'type': 'content_block_stop', 'index': 0}
+        yield 'message_delta', {'type': 'message_delta',
+                                'delta': {'stop_reason': 'max_tokens' if truncated else 'end_turn',
+                                          'stop_sequence': None},
+                                'usage': {'output_tokens': output_tokens}}
+        yield 'message_stop', {'type': 'message_stop'}
+    
+    def _batch_api(self, method: str, body: bytes) -> None:
+        store = self.batch_store
+        parts = self.path.split("?")[0].strip("/").split("/")
+        
+        if method == "POST" and parts == ["v1", "files"]:
+            filename, content = self._parse_upload(body)
+            self._send_json(200, store.add_file(filename, content))
+        elif method == "POST" and parts == ["v1", "batches"]:
+            request = json.loads(body)
+            self._send_json(200, store.create_openai_batch(request, self._openai_response))
+        elif method == "GET" and parts == ["v1", "batches"]:
+            self._send_json(200, store.list_batches("batch_", store.openai_batch))
+        elif method == "GET" and parts[:2] == ["v1", "batches"] and len(parts) == 3:
+            self._send_json(*store.openai_batch(parts[2]))
+        elif method == "GET" and parts[:2] == ["v1", "files"] and parts[3:] == ["content"]:
+            content = store.files.get(parts[2], {}).get('content')
+            if content is None:
+                self._send_json(404, {'error': {'message': f"No such file: {parts[2]}"}})
+            else:
+                self._send_bytes(200, content, 'application/octet-stream')
+        elif method == "POST" and parts == ["v1", "messages", "batches"]:
+            request = json.loads(body)
+            self._send_json(200, store.create_anthropic_batch(
+                request, self._anthropic_response, self._base_url()
+            ))
+        elif method == "GET" and parts == ["v1", "messages", "batches"]:
+            self._send_json(200, store.list_batches("msgbatch_", store.anthropic_batch))
+        elif method == "GET" and parts[:3] == ["v1", "messages", "batches"] and len(parts) == 4:
+            self._send_json(*store.anthropic_batch(parts[3]))
+        elif method == "GET" and parts[:3] == ["v1", "messages", "batches"] and parts[4:] == ["results"]:
+            status, content = store.anthropic_results(parts[3])
+            if status != 200:
+                self._send_json(status, content)
+            else:
+                self._send_bytes(200, content, 'application/binary')
+        else:
+            self._send_json(404, {'error': {'message': f"Unknown path: {self.path}"}})
+    
+    def _parse_upload(self, body: bytes) -> Tuple[str, bytes]:
+        # multipart/form-data body with a 'file' field
+        header = f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode('utf-8')
+        message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(header + body)
+        for part in message.iter_parts():
+            if part.get_param('name', header='content-disposition') == 'file':
+                return part.get_filename() or "upload.jsonl", part.get_payload(decode=True)
+        return "upload.jsonl", b""
+    
+    def _base_url(self) -> str:
+        return f"http://{self.headers.get('Host', '%s:%s' % self.server.server_address[:2])}"
+    
+    def _reply_text(self, request: dict) -> Tuple[str, int, int, bool]:
+        # (reply, input tokens, output tokens, cut off at max_tokens)
+        messages = request.get('messages', [])
+        prompt = " ".join(str(m.get('content', '')) for m in messages)
+        if request.get('system'):
+            prompt = f"{request['system']} {prompt}"
+        user_text = _last_user_text(messages)
+        text = self.responses.get(user_text, f"Echo: {user_text}")
+        
+        max_tokens = request.get('max_tokens') or request.get('max_completion_tokens')
+        truncated = bool(max_tokens) and _fake_tokens(text) > max_tokens
+        if truncated:
+            text = text[:max_tokens * 4]
+        return text, _fake_tokens(prompt), _fake_tokens(text), truncated
+    
+    def _openai_response(self, request: dict) -> dict:
+        text, input_tokens, output_tokens, truncated = self._reply_text(request)
+        # n > 1 asks for several completions; each is billed as output
+        n = request.get('n') or 1
+        output_tokens *= n
+        return {
+            'id': f"chatcmpl-{uuid.uuid4().hex}",
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': request.get('model', 'gpt-3.5-turbo'),
+            'choices': [{
+                'index': index,
+                'message': {'role': 'assistant', 'content': text},
+                'finish_reason': 'length' if truncated else 'stop'
+            } for index in range(n)],
+            'usage': {
+                'prompt_tokens': input_tokens,
+                'completion_tokens': output_tokens,
+                'total_tokens': input_tokens + output_tokens
+            }
+        }
+    
+    def _anthropic_response(self, request: dict) -> dict:
+        text, input_tokens, output_tokens, truncated = self._reply_text(request)
+        return {
+            'id': f"msg_{uuid.uuid4().hex}",
+            'type': 'message',
+            'role': 'assistant',
+            'model': request.get('model', 'claude-3-haiku-20240307'),
+            'content': [{'type': 'text', 'text': text}],
+            'stop_reason': 'max_tokens' if truncated else 'end_turn',
+            'stop_sequence': None,
+            'usage': {'input_tokens': input_tokens, 'output_tokens': output_tokens}
+        }
+
+
+class BatchStore:
+    """
+    Uploaded files and batch jobs for one mock server.
+    
+    A batch reports in-progress until `delay` seconds after creation,
+    then completed with every request answered like the live endpoints.
+    """
+    
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.files: Dict[str, dict] = {}
+        self.batches: Dict[str, dict] = {}
+        self.lock = threading.Lock()
+    
+    def add_file(self, filename: str, content: bytes, purpose: str = "batch") -> dict:
+        """Store a file and return its OpenAI file object."""
+        file_id = f"file-{uuid.uuid4().hex}"
+        info = {
+            'id': file_id,
+            'object': 'file',
+            'bytes': len(content),
+            'created_at': int(time.time()),
+            'filename': filename,
+            'purpose': purpose,
+            'status': 'processed',
+        }
+        with self.lock:
+            self.files[file_id] = dict(info, content=content)
+        return info
+    
+    def _done(self, batch: dict) -> bool:
+        return time.time() >= batch['created'] + self.delay
+    
+    def create_openai_batch(self, request: dict, respond) -> dict:
+        """Create a batch from an uploaded JSONL file of /v1/chat/completions requests."""
+        lines = self.files[request['input_file_id']]['content'].decode('utf-8').splitlines()
+        output = []
+        for line in filter(None, lines):
+            item = json.loads(line)
+            output.append({
+                'id': f"batch_req_{uuid.uuid4().hex}",
+                'custom_id': item['custom_id'],
+                'response': {'status_code': 200, 'request_id': uuid.uuid4().hex,
+                             'body': respond(item['body'])},
+                'error': None,
+            })
+        
+        batch = {
+            'id': f"batch_{uuid.uuid4().hex}",
+            'created': time.time(),
+            'input_file_id': request['input_file_id'],
+            'endpoint': request.get('endpoint', '/v1/chat/completions'),
+            'completion_window': request.get('completion_window', '24h'),
+            'output': "".join(json.dumps(line) + "\n" for line in output).encode('utf-8'),
+            'output_file_id': None,
+            'metadata': request.get('metadata'),
+        }
+        with self.lock:
+            self.batches[batch['id']] = batch
+        return self.openai_batch(batch['id'])[1]
+    
+    def openai_batch(self, batch_id: str) -> Tuple[int, dict]:
+        """Current OpenAI batch object (status, output file once done)."""
+        batch = self.batches.get(batch_id)
+        if batch is None:
+            return 404, {'error': {'message': f"No such batch: {batch_id}"}}
+        
+        done = self._done(batch)
+        if done and batch['output_file_id'] is None:
+            batch['output_file_id'] = self.add_file(f"{batch_id}_output.jsonl", batch['output'])['id']
+        total = batch['output'].count(b"\n")
+        return 200, {
+            'id': batch_id,
+            'object': 'batch',
+            'endpoint': batch['endpoint'],
+            'input_file_id': batch['input_file_id'],
+            'completion_window': batch['completion_window'],
+            'status': 'completed' if done else 'in_progress',
+            'output_file_id': batch['output_file_id'],
+            'error_file_id': None,
+            'created_at': int(batch['created']),
+            'request_counts': {'total': total, 'completed': total if done else 0, 'failed': 0},
+            'metadata': batch['metadata'],
+        }
+    
+    def list_batches(self, prefix: str, describe) -> dict:
+        """One page holding every batch whose ID starts with prefix, newest first."""
+        with self.lock:
+            batches = sorted((b for b in self.batches.values() if b['id'].startswith(prefix)),
+                             key=lambda b: b['created'], reverse=True)
+        data = [describe(batch['id'])[1] for batch in batches]
+        return {
+            'object': 'list',
+            'data': data,
+            'first_id': data[0]['id'] if data else None,
+            'last_id': data[-1]['id'] if data else None,
+            'has_more': False,
+        }
+    
+    def create_anthropic_batch(self, request: dict, respond, base_url: str) -> dict:
+        """Create a message batch from its list of requests."""
+        output = [
+            {'custom_id': item['custom_id'],
+             'result': {'type': 'succeeded', 'message': respond(item['params'])}}
+            for item in request['requests']
+        ]
+        batch = {
+            'id': f"msgbatch_{uuid.uuid4().hex}",
+            'created': time.time(),
+            'base_url': base_url,
+            'output': "".join(json.dumps(line) + "\n" for line in output).encode('utf-8'),
+            'count': len(output),
+        }
+        with self.lock:
+            self.batches[batch['id']] = batch
+        return self.anthropic_batch(batch['id'])[1]
+    
+    def anthropic_batch(self, batch_id: str) -> Tuple[int, dict]:
+        """Current Anthropic message batch object."""
+        batch = self.batches.get(batch_id)
+        if batch is None:
+            return 404, {'type': 'error', 'error': {'type': 'not_found_error', 'message': batch_id}}
+        
+        done = self._done(batch)
+        created = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(batch['created']))
+        return 200, {
+            'id': batch_id,
+            'type': 'message_batch',
+            'processing_status': 'ended' if done else 'in_progress',
+            'request_counts': {
+                'processing': 0 if done else batch['count'],
+                'succeeded': batch['count'] if done else 0,
+                'errored': 0, 'canceled': 0, 'expired': 0,
+            },
+            'created_at': created,
+            'expires_at': created,
+            'ended_at': created if done else None,
+            'archived_at': None,
+            'cancel_initiated_at': None,
+            'results_url': f"{batch['base_url']}/v1/messages/batches/{batch_id}/results" if done else None,
+        }
+    
+    def anthropic_results(self, batch_id: str) -> Tuple[int, object]:
+        """JSONL results of an ended message batch."""
+        batch = self.batches.get(batch_id)
+        if batch is None or not self._done(batch):
+            return 404, {'type': 'error', 'error': {'type': 'not_found_error', 'message': batch_id}}
+        return 200, batch['output']
+
+
+def start_mock_server(
+    host: str = "127.0.0.1",
+    port: int = 0,
+    latency: Union[float, Callable[[], float]] = 0.0,
+    batch_delay: float = 0.0,
+    tokens_per_second: float = 0.0,
+    rate_limit_rate: float = 0.0,
+    error_rate: float = 0.0,
+    retry_after: float = 0.1,
+    responses: Dict[str, str] = None,
+    seed: int = 0
+) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    Start the mock server on a background thread.
+    
+    Args:
+        host: Interface to bind
+        port: Port to bind (0 = pick a free port)
+        latency: Seconds to wait before answering each request (time to
+            first token when streaming), or a function called per
+            request, e.g. lognormal_latency(0.3, 2.0) or
+            lambda: 1.0 if random.random() < 0.05 else 0.05
+        batch_delay: Seconds before a submitted batch job completes
+        tokens_per_second: Output generation speed (0 = instant)
+        rate_limit_rate: Fraction of chat requests answered with a 429
+        error_rate: Fraction of chat requests answered with a 500
+        retry_after: Seconds suggested in each 429's retry-after headers
+        responses: Last user message -> canned reply (others are echoed)
+        seed: Seed for error injection (same seed = same errors, in
+            request order)
+    
+    Returns:
+        tuple: (server, base URL such as "http://127.0.0.1:54321").
+        Call server.shutdown() to stop it.
+    
+    Example:
+        >>> server, base_url = start_mock_server()
+        >>> client = OpenAI(api_key="mock", base_url=f"{base_url}/v1")
+    """
+    if callable(latency):
+        latency = staticmethod(latency)
+    handler = type("ConfiguredMockLLMHandler", (MockLLMHandler,), {
+        'latency': latency,
+        'tokens_per_second': tokens_per_second,
+        'rate_limit_rate': rate_limit_rate,
+        'error_rate': error_rate,
+        'retry_after': retry_after,
+        'responses': dict(responses or {}),
+        'rng': random.Random(seed),
+        'rng_lock': threading.Lock(),
+        'batch_store': BatchStore(batch_delay),
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def use_mock_server(base_url: str) -> None:
+    """
+    Point the shared clients (and so call_openai(), call_anthropic() and
+    the streaming helpers) at a mock server.
+    
+    Placeholder API keys are set for providers that have none, since the
+    SDKs refuse to start without one.
+    
+    Args:
+        base_url: Base URL returned by start_mock_server()
+    
+    Example:
+        >>> server, base_url = start_mock_server(tokens_per_second=80)
+        >>> use_mock_server(base_url)
+        >>> call_openai("What is the capital of France?")['text']
+        'Echo: What is the capital of France?'
+    """
+    from llm_clients import close_clients, configure_clients
+    
+    os.environ.setdefault("OPENAI_API_KEY", "mock")
+    os.environ.setdefault("ANTHROPIC_API_KEY", "mock")
+    configure_clients(openai_base_url=f"{base_url}/v1", anthropic_base_url=base_url)
+    close_clients()
+
+
+def main():
+    """
+    Run the mock server in the foreground.
+    """
+    parser = argparse.ArgumentParser(description="Local mock of the OpenAI and Anthropic APIs.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="Seconds per response (the median if --latency-p99 is set)")
+    parser.add_argument("--latency-p99", type=float, default=None,
+                        help="99th-percentile seconds per response (lognormal latency)")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0,
+                        help="Output generation speed (0 = instant)")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0,
+                        help="Fraction of requests answered with a 429")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Fraction of requests answered with a 500")
+    parser.add_argument("--responses", default=None,
+                        help="JSON file mapping prompts to canned replies")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch-delay", type=float, default=5.0, help="Seconds per batch job")
+    args = parser.parse_args()
+    
+    latency = args.latency
+    if args.latency_p99 is not None:
+        latency = lognormal_latency(args.latency, args.latency_p99, args.seed)
+    responses = None
+    if args.responses:
+        with open(args.responses, 'r', encoding='utf-8') as f:
+            responses = json.load(f)
+    
+    server, base_url = start_mock_server(
+        args.host, args.port, latency, args.batch_delay,
+        tokens_per_second=args.tokens_per_second,
+        rate_limit_rate=args.rate_limit_rate,
+        error_rate=args.error_rate,
+        responses=responses,
+        seed=args.seed
+    )
+    print(f"Mock LLM server listening on {base_url}")
+    print(f"  OPENAI_BASE_URL={base_url}/v1")
+    print(f"  ANTHROPIC_BASE_URL={base_url}")
+    
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
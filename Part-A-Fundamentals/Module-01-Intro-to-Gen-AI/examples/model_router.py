@@ -0,0 +1,372 @@
+"""
+Model Router - Pick the Cheapest Model That Meets Each Request's Needs
+
+optimize_model_selection() in pricing_calculator.py recommends one model
+from monthly averages. This module decides per request instead:
+1. Count the prompt's tokens once with count_tokens()
+2. Drop models whose context_limit cannot hold the prompt plus max_tokens
+3. Drop models below the requested quality tier
+4. Of the rest, pick the cheapest whose recent latency meets the SLO
+
+Steps 2 and 3 read a table of candidates for every (tier, context size)
+pair, computed once from PRICING_DATA, instead of filtering and sorting
+the price list per request. With the handful of models here that saves
+little next to counting the prompt's tokens (see benchmark_routing());
+it matters more as the price list grows. Latency comes from the router's
+own recent API calls (hedging.LatencyTracker); cache hits are not counted.
+
+Usage:
+    from model_router import ModelRouter
+
+    router = ModelRouter()
+    decision = router.route("Summarize this report...", max_tokens=500,
+                            latency_slo_ms=3000, min_tier=2)
+    decision.model, decision.estimated_cost
+
+    result = router.call("What is the capital of France?", max_tokens=50)
+    result['routed_model']
+"""
+
+import bisect
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from hedging import LatencyTracker
+from llm_clients import API_MODEL_NAMES
+from pricing_calculator import PRICING_DATA, ModelPricing
+from rate_limiter import estimate_request_tokens
+
+
+# Quality tier of each PRICING_DATA model: 1 = basic, 2 = standard, 3 = advanced
+MODEL_TIERS = {
+    "gpt-3.5-turbo": 1,
+    "gpt-3.5-turbo-16k": 1,
+    "claude-3-haiku": 1,
+    "claude-3-sonnet": 2,
+    "gpt-4-turbo": 2,
+    "gpt-4": 3,
+    "gpt-4-32k": 3,
+    "claude-3-opus": 3,
+}
+
+# Latency percentile compared against the SLO
+SLO_PERCENTILE = 95.0
+
+
+@dataclass
+class RouteDecision:
+    """
+    The model chosen for one request.
+    
+    Attributes:
+        model: PRICING_DATA model name
+        provider: "openai" or "anthropic"
+        api_model: Model name to send to the API
+        input_tokens: Prompt tokens, including chat formatting
+        max_tokens: Completion limit used for the context check
+        estimated_cost: Cost if the completion uses all max_tokens (USD)
+        expected_latency_ms: The model's SLO_PERCENTILE latency (None = no data yet)
+        slo_met: False if no candidate met the SLO and the fastest was chosen
+    """
+    model: str
+    provider: str
+    api_model: str
+    input_tokens: int
+    max_tokens: int
+    estimated_cost: float
+    expected_latency_ms: Optional[float]
+    slo_met: bool
+
+
+# (model, provider, USD per input token, USD per output token)
+_Candidate = Tuple[str, str, float, float]
+
+
+class RoutingIndex:
+    """
+    Candidate models for every (minimum tier, context size) pair.
+    
+    Context sizes are the distinct context_limit values in the pricing
+    data, so a request's size maps to a bucket with one bisect over a
+    handful of numbers, and the bucket's candidate tuple is ready to use.
+    
+    Example:
+        >>> index = RoutingIndex()
+        >>> [c[0] for c in index.candidates(6000, min_tier=3)]
+        ['gpt-4', 'gpt-4-32k', 'claude-3-opus']
+    """
+    
+    def __init__(self, pricing: Dict[str, ModelPricing] = None, tiers: Dict[str, int] = None):
+        """
+        Args:
+            pricing: Model name -> ModelPricing (None = PRICING_DATA)
+            tiers: Model name -> quality tier (None = MODEL_TIERS)
+        """
+        if pricing is None:
+            pricing = PRICING_DATA
+        if tiers is None:
+            tiers = MODEL_TIERS
+        
+        models = [m for m in pricing if m in tiers]
+        self.providers: Dict[str, str] = {m: pricing[m].provider.lower() for m in models}
+        self.limits: List[int] = sorted({pricing[m].context_limit for m in models})
+        self.max_tier = max(tiers[m] for m in models)
+        self._table: Dict[Tuple[int, int], Tuple[_Candidate, ...]] = {}
+        
+        for tier in range(1, self.max_tier + 1):
+            for bucket, limit in enumerate(self.limits):
+                self._table[(tier, bucket)] = tuple(
+                    (m, self.providers[m],
+                     pricing[m].input_price / 1_000_000, pricing[m].output_price / 1_000_000)
+                    for m in models
+                    if tiers[m] >= tier and pricing[m].context_limit >= limit
+                )
+    
+    def candidates(self, total_tokens: int, min_tier: int = 1) -> Tuple[_Candidate, ...]:
+        """
+        Models that can hold total_tokens and are at least min_tier.
+        
+        Returns:
+            tuple: (model, provider, input price, output price) per model
+            (empty if none fits)
+        """
+        bucket = bisect.bisect_left(self.limits, total_tokens)
+        if bucket == len(self.limits) or min_tier > self.max_tier:
+            return ()
+        return self._table[(max(1, min_tier), bucket)]
+
+
+class ModelRouter:
+    """
+    Route each request to the cheapest model that fits it.
+    
+    Attributes:
+        index: RoutingIndex built from the pricing data
+        tracker: Recent latencies per (provider, model)
+        routed: model -> requests routed to it
+    """
+    
+    def __init__(
+        self,
+        pricing: Dict[str, ModelPricing] = None,
+        tiers: Dict[str, int] = None,
+        min_samples: int = 20,
+        tracker: LatencyTracker = None
+    ):
+        """
+        Args:
+            pricing: Model name -> ModelPricing (None = PRICING_DATA)
+            tiers: Model name -> quality tier (None = MODEL_TIERS)
+            min_samples: Latency samples needed before a model's latency
+                is checked against the SLO; until then it is assumed to meet it
+            tracker: Shared LatencyTracker (None = a new one)
+        """
+        self.index = RoutingIndex(pricing, tiers)
+        self.min_samples = min_samples
+        self.tracker = tracker or LatencyTracker()
+        self.routed: Dict[str, int] = {}
+        # model -> SLO_PERCENTILE latency, refreshed on every observation
+        # so route() reads one dict entry instead of merging histograms
+        self._latency: Dict[str, float] = {}
+    
+    def observe(self, model: str, latency_ms: float) -> None:
+        """
+        Record how long a call to a model took.
+        
+        Args:
+            model: PRICING_DATA model name
+            latency_ms: Wall time of the call
+        """
+        if model not in self.index.providers:
+            return
+        target = (self.index.providers[model], model)
+        self.tracker.record(target, latency_ms)
+        if self.tracker.count(target) >= self.min_samples:
+            self._latency[model] = self.tracker.percentile(target, SLO_PERCENTILE)
+    
+    def route(
+        self,
+        prompt: str,
+        max_tokens: int = 150,
+        latency_slo_ms: float = None,
+        min_tier: int = 1
+    ) -> RouteDecision:
+        """
+        Choose the model for one request.
+        
+        Args:
+            prompt: The user's input text
+            max_tokens: Maximum tokens in response
+            latency_slo_ms: Latency the request must finish within (None = any)
+            min_tier: Lowest acceptable quality tier (see MODEL_TIERS)
+        
+        Returns:
+            RouteDecision: The chosen model and why. If no model meets
+            the SLO, the fastest fitting one with slo_met=False.
+        
+        Raises:
+            ValueError: If no model of the tier can hold the request
+        """
+        # All candidates are priced with one count: cl100k_base for every
+        # model (exact for GPT-3.5/4, close enough for Claude)
+        total_tokens = estimate_request_tokens(
+            [{"role": "user", "content": prompt}], "cl100k_base", max_tokens
+        )
+        input_tokens = total_tokens - max_tokens
+        candidates = self.index.candidates(total_tokens, min_tier)
+        if not candidates:
+            raise ValueError(
+                f"No tier {min_tier}+ model has a context window of {total_tokens:,} tokens"
+            )
+        
+        best = fastest = None
+        best_cost = fastest_latency = float("inf")
+        for candidate in candidates:
+            model, _, input_price, output_price = candidate
+            latency = self._latency.get(model)
+            if latency_slo_ms is None or latency is None or latency <= latency_slo_ms:
+                cost = input_tokens * input_price + max_tokens * output_price
+                if cost < best_cost:
+                    best, best_cost = candidate, cost
+            elif latency < fastest_latency:
+                fastest, fastest_latency = candidate, latency
+        
+        slo_met = best is not None
+        if not slo_met:
+            best = fastest
+            best_cost = input_tokens * best[2] + max_tokens * best[3]
+        
+        model, provider = best[0], best[1]
+        self.routed[model] = self.routed.get(model, 0) + 1
+        return RouteDecision(
+            model=model,
+            provider=provider,
+            api_model=API_MODEL_NAMES.get(model, model),
+            input_tokens=input_tokens,
+            max_tokens=max_tokens,
+            estimated_cost=best_cost,
+            expected_latency_ms=self._latency.get(model),
+            slo_met=slo_met
+        )
+    
+    def call(
+        self,
+        prompt: str,
+        max_tokens: int = 150,
+        latency_slo_ms: float = None,
+        min_tier: int = 1,
+        temperature: float = 0.7
+    ) -> dict:
+        """
+        Route a request, send it with call_openai()/call_anthropic(), and
+        record its latency. Answers from the response cache are not
+        recorded, since they say nothing about the model's latency.
+        
+        Returns:
+            dict: The call's result plus 'routed_model' and 'slo_met'
+        """
+        from basic_llm_call import call_anthropic, call_openai
+        
+        decision = self.route(prompt, max_tokens, latency_slo_ms, min_tier)
+        call = call_openai if decision.provider == "openai" else call_anthropic
+        
+        start = time.perf_counter()
+        result = call(prompt, model=decision.api_model, temperature=temperature,
+                      max_tokens=max_tokens)
+        if 'error' not in result and not result.get('cached'):
+            self.observe(decision.model, (time.perf_counter() - start) * 1000)
+        
+        result = dict(result)
+        result['routed_model'] = decision.model
+        result['slo_met'] = decision.slo_met
+        return result
+
+
+def _route_by_sorting(prompt: str, max_tokens: int, latency_slo_ms: float, min_tier: int,
+                      latencies: Dict[str, float]) -> str:
+    # The per-request approach the index replaces: filter and sort
+    # PRICING_DATA for every request
+    total_tokens = estimate_request_tokens(
+        [{"role": "user", "content": prompt}], "cl100k_base", max_tokens
+    )
+    input_tokens = total_tokens - max_tokens
+    fitting = [
+        pricing for name, pricing in PRICING_DATA.items()
+        if MODEL_TIERS.get(name, 0) >= min_tier and pricing.context_limit >= total_tokens
+        and latencies.get(name, 0.0) <= latency_slo_ms
+    ]
+    fitting.sort(key=lambda p: input_tokens * p.input_price + max_tokens * p.output_price)
+    return fitting[0].name
+
+
+def demonstrate_routing() -> None:
+    """
+    Route a few requests with different needs, using simulated latencies.
+    """
+    router = ModelRouter(min_samples=1)
+    simulated_latency_ms = {
+        "gpt-3.5-turbo": 600, "gpt-3.5-turbo-16k": 900, "claude-3-haiku": 500,
+        "claude-3-sonnet": 1800, "gpt-4-turbo": 2500, "gpt-4": 4000,
+        "gpt-4-32k": 5000, "claude-3-opus": 6000,
+    }
+    for model, latency in simulated_latency_ms.items():
+        router.observe(model, latency)
+    
+    long_document = "Quarterly revenue grew in every region. " * 1500
+    requests = [
+        ("Short question", "What is the capital of France?", 50, None, 1),
+        ("Needs standard quality", "Explain transformers to a new engineer.", 400, None, 2),
+        ("Advanced, 5 s SLO", "Draft a migration plan for our billing system.", 800, 5000, 3),
+        ("Advanced, 3 s SLO", "Draft a migration plan for our billing system.", 800, 3000, 3),
+        ("Long document", f"Summarize:\n{long_document}", 500, None, 1),
+    ]
+    
+    print(f"\n{'='*80}")
+    print("MODEL ROUTING")
+    print(f"{'='*80}")
+    print(f"{'Request':<25} {'Tokens':>8} {'Model':<18} {'Est. cost':>11} {'p95 ms':>8} {'SLO'}")
+    print("-" * 80)
+    for label, prompt, max_tokens, slo, tier in requests:
+        decision = router.route(prompt, max_tokens=max_tokens, latency_slo_ms=slo, min_tier=tier)
+        print(f"{label:<25} {decision.input_tokens:>8,} {decision.model:<18} "
+              f"${decision.estimated_cost:>10.6f} {decision.expected_latency_ms:>8.0f} "
+              f"{'met' if decision.slo_met else 'missed'}")
+
+
+def benchmark_routing(num_requests: int = 20_000) -> None:
+    """
+    Compare routing through the index with filtering and sorting
+    PRICING_DATA per request. Token counting is the same in both and
+    takes most of the time, so with PRICING_DATA's few models the two
+    are close.
+    
+    Args:
+        num_requests: Routing decisions per approach
+    """
+    router = ModelRouter(min_samples=1)
+    latencies = {model: 1000.0 for model in PRICING_DATA}
+    for model, latency in latencies.items():
+        router.observe(model, latency)
+    prompt = "Explain the difference between supervised and unsupervised learning."
+    
+    print(f"\n{'='*70}")
+    print(f"ROUTING BENCHMARK ({num_requests:,} decisions)")
+    print(f"{'='*70}")
+    print(f"{'Approach':<30} {'µs per decision':>16}")
+    print("-" * 70)
+    
+    for label, route in [
+        ("Sort per request", lambda: _route_by_sorting(prompt, 200, 2000, 2, latencies)),
+        ("Precomputed index", lambda: router.route(prompt, 200, 2000, 2)),
+    ]:
+        route()  # Warm up
+        start = time.perf_counter()
+        for _ in range(num_requests):
+            route()
+        print(f"{label:<30} {(time.perf_counter() - start) / num_requests * 1e6:>16.2f}")
+
+
+if __name__ == "__main__":
+    demonstrate_routing()
+    benchmark_routing()
@@ -9,11 +9,12 @@ providers and models. It includes:
 4. Usage scenarios with cost projections
 
 Requirements:
-    - tiktoken>=0.6.0
+    - numpy>=1.26.0
 """
 
-import tiktoken
-from typing import Dict, List, Tuple
+import numpy as np
+import time
+from typing import Callable, Dict, List, Sequence, Tuple
 from dataclasses import dataclass
 from datetime import datetime
 
@@ -37,8 +38,45 @@ class ModelPricing:
     context_limit: int
 
 
+class _PricingDict(dict):
+    # dict that counts its edits, so PRICE_TABLE can tell it is stale
+    version = 0
+    
+    def __setitem__(self, key, value):
+        self.version += 1
+        super().__setitem__(key, value)
+    
+    def __delitem__(self, key):
+        self.version += 1
+        super().__delitem__(key)
+    
+    def pop(self, *args):
+        self.version += 1
+        return super().pop(*args)
+    
+    def popitem(self):
+        self.version += 1
+        return super().popitem()
+    
+    def setdefault(self, key, default=None):
+        self.version += 1
+        return super().setdefault(key, default)
+    
+    def update(self, *args, **kwargs):
+        self.version += 1
+        super().update(*args, **kwargs)
+    
+    def clear(self):
+        self.version += 1
+        super().clear()
+    
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+
 # Pricing data (as of 2024 - check provider websites for current prices)
-PRICING_DATA = {
+PRICING_DATA = _PricingDict({
     # OpenAI models
     "gpt-3.5-turbo": ModelPricing("gpt-3.5-turbo", "OpenAI", 0.50, 1.50, 4096),
     "gpt-3.5-turbo-16k": ModelPricing("gpt-3.5-turbo-16k", "OpenAI", 3.00, 4.00, 16384),
@@ -50,7 +88,201 @@ PRICING_DATA = {
     "claude-3-opus": ModelPricing("claude-3-opus", "Anthropic", 15.00, 75.00, 200000),
     "claude-3-sonnet": ModelPricing("claude-3-sonnet", "Anthropic", 3.00, 15.00, 200000),
     "claude-3-haiku": ModelPricing("claude-3-haiku", "Anthropic", 0.25, 1.25, 200000),
-}
+})
+
+# Discount on requests sent through the OpenAI and Anthropic batch APIs
+BATCH_DISCOUNT = 0.5
+
+
+@dataclass
+class PriceTable:
+    """
+    PRICING_DATA laid out as parallel NumPy arrays for vectorized math.
+    
+    Attributes:
+        models: Model names, in column order
+        providers: Provider name for each model
+        input_prices: Price per 1M input tokens for each model (USD)
+        output_prices: Price per 1M output tokens for each model (USD)
+        context_limits: Context window for each model (tokens)
+        index: Model name -> column number
+    """
+    models: List[str]
+    providers: List[str]
+    input_prices: np.ndarray
+    output_prices: np.ndarray
+    context_limits: np.ndarray
+    index: Dict[str, int]
+    
+    def columns(self, models: Sequence[str] = None) -> np.ndarray:
+        """Column numbers for a list of model names (None = all models)."""
+        if models is None:
+            return np.arange(len(self.models))
+        for model in models:
+            if model not in self.index:
+                raise ValueError(f"Unknown model: {model}")
+        return np.array([self.index[model] for model in models], dtype=np.intp)
+
+
+def build_price_table(pricing: Dict[str, ModelPricing] = None) -> PriceTable:
+    """
+    Convert a pricing dict into a PriceTable.
+    
+    Args:
+        pricing: Model name -> ModelPricing (None = PRICING_DATA)
+        
+    Returns:
+        PriceTable: Array form of the pricing data
+    """
+    if pricing is None:
+        pricing = PRICING_DATA
+    models = list(pricing.keys())
+    return PriceTable(
+        models=models,
+        providers=[pricing[m].provider for m in models],
+        input_prices=np.array([pricing[m].input_price for m in models], dtype=np.float64),
+        output_prices=np.array([pricing[m].output_price for m in models], dtype=np.float64),
+        context_limits=np.array([pricing[m].context_limit for m in models], dtype=np.int64),
+        index={m: i for i, m in enumerate(models)}
+    )
+
+
+# PRICING_DATA as arrays. Adding, replacing or removing a PRICING_DATA
+# entry marks it stale; current_price_table() then rebuilds it. Changing
+# a field of an existing ModelPricing needs refresh_prices().
+PRICE_TABLE = build_price_table()
+_table_version = PRICING_DATA.version
+
+# Called by refresh_prices(), e.g. to clear caches of resolved prices
+_refresh_hooks: List[Callable[[], None]] = []
+
+
+def on_price_refresh(hook: Callable[[], None]) -> Callable[[], None]:
+    """Register a function for refresh_prices() to call; returns it unchanged."""
+    _refresh_hooks.append(hook)
+    return hook
+
+
+def refresh_prices() -> None:
+    """
+    Rebuild PRICE_TABLE from the current PRICING_DATA.
+    
+    The table is updated in place, so modules that imported PRICE_TABLE
+    see the new prices too, and caches registered with on_price_refresh()
+    are cleared. Needed only after changing a field of an existing
+    entry; other edits are picked up by current_price_table().
+    
+    Example:
+        >>> PRICING_DATA["gpt-4"].input_price = 25.00
+        >>> refresh_prices()
+        >>> calculate_cost(1000, 0, "gpt-4")['total_cost']
+        0.025
+    """
+    global _table_version
+    version = PRICING_DATA.version
+    vars(PRICE_TABLE).update(vars(build_price_table()))
+    _table_version = version
+    for hook in _refresh_hooks:
+        hook()
+
+
+def current_price_table() -> PriceTable:
+    """
+    PRICE_TABLE, rebuilt first with refresh_prices() if entries have been
+    added to, replaced in or removed from PRICING_DATA since it was built.
+    
+    Example:
+        >>> PRICING_DATA["gpt-4o"] = ModelPricing("gpt-4o", "OpenAI", 5.00, 15.00, 128000)
+        >>> "gpt-4o" in current_price_table().index
+        True
+    """
+    if PRICING_DATA.version != _table_version:
+        refresh_prices()
+    return PRICE_TABLE
+
+
+def cost_matrix(
+    input_tokens,
+    output_tokens,
+    models: Sequence[str] = None,
+    table: PriceTable = None
+) -> Dict[str, np.ndarray]:
+    """
+    Cost of every usage record under every model, in one NumPy pass.
+    
+    Args:
+        input_tokens: Input token counts, one per record (scalar or array)
+        output_tokens: Output token counts, one per record (scalar or array)
+        models: Model names to price (None = all models in the table)
+        table: Price table to use (None = PRICE_TABLE)
+        
+    Returns:
+        dict: 'input_cost', 'output_cost' and 'total_cost' arrays of
+        shape (records, models), plus the 'models' column names
+        
+    Example:
+        >>> costs = cost_matrix([1000, 5000], [500, 2000], ["gpt-4", "claude-3-haiku"])
+        >>> costs['total_cost'].shape
+        (2, 2)
+    """
+    if table is None:
+        table = current_price_table()
+    columns = table.columns(models)
+    
+    input_tokens = np.atleast_1d(np.asarray(input_tokens, dtype=np.float64))
+    output_tokens = np.atleast_1d(np.asarray(output_tokens, dtype=np.float64))
+    
+    input_cost = np.multiply.outer(input_tokens / 1_000_000, table.input_prices[columns])
+    output_cost = np.multiply.outer(output_tokens / 1_000_000, table.output_prices[columns])
+    
+    return {
+        'input_cost': input_cost,
+        'output_cost': output_cost,
+        'total_cost': input_cost + output_cost,
+        'models': [table.models[c] for c in columns]
+    }
+
+
+def record_costs(
+    input_tokens,
+    output_tokens,
+    models,
+    table: PriceTable = None,
+    batch: bool = False
+) -> Dict[str, np.ndarray]:
+    """
+    Cost of each usage record under the model that record actually used.
+    
+    Args:
+        input_tokens: Input token counts, one per record
+        output_tokens: Output token counts, one per record
+        models: Model name (or PriceTable column number) for each record
+        table: Price table to use (None = PRICE_TABLE)
+        batch: Apply BATCH_DISCOUNT (records sent through a batch API)
+        
+    Returns:
+        dict: 'input_cost', 'output_cost' and 'total_cost' arrays, one
+        value per record
+    """
+    if table is None:
+        table = current_price_table()
+    models = np.asarray(models)
+    if models.dtype.kind in "iu":
+        columns = models
+    else:
+        columns = table.columns(models.tolist())
+    
+    input_cost = np.asarray(input_tokens, dtype=np.float64) / 1_000_000 * table.input_prices[columns]
+    output_cost = np.asarray(output_tokens, dtype=np.float64) / 1_000_000 * table.output_prices[columns]
+    if batch:
+        input_cost *= 1 - BATCH_DISCOUNT
+        output_cost *= 1 - BATCH_DISCOUNT
+    
+    return {
+        'input_cost': input_cost,
+        'output_cost': output_cost,
+        'total_cost': input_cost + output_cost
+    }
 
 
 def calculate_cost(
@@ -78,13 +310,16 @@ def calculate_cost(
             'model': 'gpt-3.5-turbo'
         }
     """
-    if model not in PRICING_DATA:
+    table = current_price_table()
+    if model not in table.index:
         raise ValueError(f"Unknown model: {model}")
     
-    pricing = PRICING_DATA[model]
+    # Single record: read the engine's price arrays directly, since the
+    # NumPy call overhead would dwarf two multiplications
+    i = table.index[model]
     
-    input_cost = (input_tokens / 1_000_000) * pricing.input_price
-    output_cost = (output_tokens / 1_000_000) * pricing.output_price
+    input_cost = (input_tokens / 1_000_000) * float(table.input_prices[i])
+    output_cost = (output_tokens / 1_000_000) * float(table.output_prices[i])
     total_cost = input_cost + output_cost
     
     return {
@@ -92,7 +327,7 @@ def calculate_cost(
         'output_cost': output_cost,
         'total_cost': total_cost,
         'model': model,
-        'provider': pricing.provider
+        'provider': table.providers[i]
     }
 
 
@@ -121,22 +356,20 @@ def compare_models(
     print(f"\n{'Model':<25} {'Provider':<12} {'Cost':<12} {'vs Cheapest'}")
     print("-" * 80)
     
-    # Calculate costs for all models
-    results = []
-    for model in models:
-        if model in PRICING_DATA:
-            cost_data = calculate_cost(input_tokens, output_tokens, model)
-            results.append(cost_data)
-    
-    # Sort by cost
-    results.sort(key=lambda x: x['total_cost'])
-    cheapest_cost = results[0]['total_cost']
+    # Calculate costs for all models in one pass, cheapest first
+    table = current_price_table()
+    models = [model for model in models if model in table.index]
+    costs = cost_matrix(input_tokens, output_tokens, models)['total_cost'][0]
+    order = np.argsort(costs, kind="stable")
+    cheapest_cost = costs[order[0]]
     
     # Display results
-    for result in results:
-        cost = result['total_cost']
+    for i in order:
+        model = models[i]
+        cost = costs[i]
+        provider = table.providers[table.index[model]]
         multiplier = cost / cheapest_cost if cheapest_cost > 0 else 0
-        print(f"{result['model']:<25} {result['provider']:<12} "
+        print(f"{model:<25} {provider:<12} "
               f"${cost:>10.6f}  {multiplier:>6.1f}x")
 
 
@@ -178,6 +411,39 @@ def estimate_monthly_cost(
     }
 
 
+# Common usage scenarios: request volume and average tokens per request
+SCENARIOS = [
+    {
+        "name": "Small Chatbot",
+        "description": "100 users, 5 messages/day each",
+        "requests_per_day": 500,
+        "avg_input": 100,
+        "avg_output": 75
+    },
+    {
+        "name": "Medium Customer Support",
+        "description": "1000 users, 3 messages/day each",
+        "requests_per_day": 3000,
+        "avg_input": 200,
+        "avg_output": 150
+    },
+    {
+        "name": "Document Analyzer",
+        "description": "100 documents/day, long context",
+        "requests_per_day": 100,
+        "avg_input": 3000,
+        "avg_output": 500
+    },
+    {
+        "name": "Code Assistant",
+        "description": "50 developers, 20 queries/day each",
+        "requests_per_day": 1000,
+        "avg_input": 150,
+        "avg_output": 200
+    }
+]
+
+
 def scenario_analysis() -> None:
     """
     Analyze common usage scenarios with cost projections.
@@ -186,38 +452,7 @@ def scenario_analysis() -> None:
     print("SCENARIO ANALYSIS - Monthly Cost Projections")
     print(f"{'='*80}")
     
-    scenarios = [
-        {
-            "name": "Small Chatbot",
-            "description": "100 users, 5 messages/day each",
-            "requests_per_day": 500,
-            "avg_input": 100,
-            "avg_output": 75
-        },
-        {
-            "name": "Medium Customer Support",
-            "description": "1000 users, 3 messages/day each",
-            "requests_per_day": 3000,
-            "avg_input": 200,
-            "avg_output": 150
-        },
-        {
-            "name": "Document Analyzer",
-            "description": "100 documents/day, long context",
-            "requests_per_day": 100,
-            "avg_input": 3000,
-            "avg_output": 500
-        },
-        {
-            "name": "Code Assistant",
-            "description": "50 developers, 20 queries/day each",
-            "requests_per_day": 1000,
-            "avg_input": 150,
-            "avg_output": 200
-        }
-    ]
-    
-    for scenario in scenarios:
+    for scenario in SCENARIOS:
         print(f"\n📊 Scenario: {scenario['name']}")
         print(f"   {scenario['description']}")
         print(f"   {scenario['requests_per_day']} requests/day, "
@@ -305,6 +540,9 @@ def optimize_model_selection(
     """
     Recommend optimal model based on usage and cost.
     
+    This picks one model from averages; model_router.ModelRouter picks
+    per request from its actual size, quality tier and latency SLO.
+    
     Args:
         expected_requests: Expected number of requests per month
         avg_input_tokens: Average input tokens
@@ -316,19 +554,16 @@ def optimize_model_selection(
     print(f"Expected usage: {expected_requests:,} requests/month")
     print(f"Average tokens: {avg_input_tokens} input + {avg_output_tokens} output")
     
-    # Calculate costs for different models
-    models = list(PRICING_DATA.keys())
-    costs = []
-    
+    # Calculate costs for all models in one pass, cheapest first
     total_input = expected_requests * avg_input_tokens
     total_output = expected_requests * avg_output_tokens
     
-    for model in models:
-        cost_data = calculate_cost(total_input, total_output, model)
-        costs.append((model, cost_data['total_cost'], PRICING_DATA[model]))
-    
-    # Sort by cost
-    costs.sort(key=lambda x: x[1])
+    table = current_price_table()
+    model_costs = cost_matrix(total_input, total_output, table=table)['total_cost'][0]
+    costs = [
+        (table.models[i], float(model_costs[i]), PRICING_DATA[table.models[i]])
+        for i in np.argsort(model_costs, kind="stable")
+    ]
     
     print(f"\n💡 Recommendations:")
     print(f"\n1. Most Economical: {costs[0][0]}")
@@ -348,6 +583,47 @@ def optimize_model_selection(
                 print(f"   - {model}: {pricing.context_limit:,} token limit (${cost:.2f}/month)")
 
 
+def benchmark_cost_engine(num_records: int = 1_000_000, scalar_records: int = 20_000) -> None:
+    """
+    Compare the vectorized cost engine with calling calculate_cost() in a
+    Python loop, for every usage record under every model.
+    
+    The scalar loop is timed on the first scalar_records records and
+    extrapolated, since running it on a million records takes minutes.
+    
+    Args:
+        num_records: Number of synthetic usage records
+        scalar_records: Number of records to run through the scalar loop
+    """
+    rng = np.random.default_rng(0)
+    input_tokens = rng.integers(50, 4000, size=num_records)
+    output_tokens = rng.integers(20, 1000, size=num_records)
+    models = current_price_table().models
+    
+    print(f"\n{'='*80}")
+    print(f"COST ENGINE BENCHMARK ({num_records:,} records x {len(models)} models)")
+    print(f"{'='*80}")
+    
+    scalar_records = min(scalar_records, num_records)
+    start = time.perf_counter()
+    scalar = [
+        [calculate_cost(int(i), int(o), model)['total_cost'] for model in models]
+        for i, o in zip(input_tokens[:scalar_records], output_tokens[:scalar_records])
+    ]
+    scalar_time = (time.perf_counter() - start) * num_records / scalar_records
+    
+    start = time.perf_counter()
+    totals = cost_matrix(input_tokens, output_tokens)['total_cost']
+    vector_time = time.perf_counter() - start
+    
+    assert np.allclose(totals[:scalar_records], scalar)
+    
+    print(f"Scalar loop (extrapolated): {scalar_time:>10.3f} s")
+    print(f"Vectorized engine:          {vector_time:>10.3f} s")
+    print(f"Speedup:                    {scalar_time / vector_time:>10.0f}x")
+    print(f"Total cost, cheapest model: ${totals.sum(axis=0).min():,.2f}")
+
+
 def main():
     """
     Run all demonstrations.
@@ -374,7 +650,10 @@ def main():
     optimize_model_selection(10000, 250, 150)
     optimize_model_selection(1000, 4000, 500)
     
-    # Example 6: Cost tracking tips
+    # Example 6: Vectorized engine vs scalar loop
+    benchmark_cost_engine(num_records=200_000, scalar_records=5_000)
+    
+    # Example 7: Cost tracking tips
     print(f"\n{'='*80}")
     print("💰 COST OPTIMIZATION TIPS")
     print(f"{'='*80}")
@@ -385,7 +664,7 @@ def main():
 4. Use prompt compression techniques to reduce input tokens
 5. Implement rate limiting to control usage
 6. Monitor usage regularly via provider dashboards
-7. Consider batch processing for non-urgent requests
+7. Consider batch processing for non-urgent requests (50% off; see batch_jobs.py)
 8. Use streaming only when needed (doesn't reduce cost but improves UX)
 9. Set up billing alerts on provider platforms
 10. Test thoroughly in development to avoid waste in production
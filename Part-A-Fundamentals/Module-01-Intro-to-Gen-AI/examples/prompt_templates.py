@@ -0,0 +1,266 @@
+"""
+Prompt Templates - Compile Once, Tokenize Only What Changes
+
+A prompt template is mostly fixed text (role, instructions, examples)
+with a few slots filled per request. Formatting the template and
+counting the result with count_tokens() encodes the fixed text again
+for every request. CompiledPrompt parses the template once, encodes its
+fixed segments once, and when rendering only tokenizes the filled slots
+and the few tokens around them.
+
+Counts are exact. tiktoken splits text into pieces with a regex and
+encodes every piece on its own, so a fixed segment's tokens can be
+reused wherever the regex splits the rendered text at the same places
+as the segment alone. Only the text from the end of one fixed segment to
+the first such shared split point in the next is tokenized per request.
+
+Usage:
+    from prompt_templates import CompiledPrompt
+    
+    prompt = CompiledPrompt("You are a {role}.\\n\\nAnswer the question: {question}")
+    text, tokens = prompt.render_with_count(role="tutor", question="What is AI?")
+    prompt.fits(model="gpt-4", max_tokens=500, role="tutor", question="...")
+
+Requirements:
+    - tiktoken>=0.6.0
+    - regex (installed with tiktoken)
+"""
+
+import string
+import time
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from token_counting import CONTEXT_LIMITS, _piece_pattern, count_tokens, get_encoding
+
+
+# Distinct pieces of slot text whose tokens are remembered, per process
+PIECE_CACHE_SIZE = 1 << 16
+
+_formatter = string.Formatter()
+
+
+@lru_cache(maxsize=PIECE_CACHE_SIZE)
+def _piece_tokens(encoding_name: str, piece: str) -> Tuple[int, ...]:
+    # BPE tokens of one regex piece; the same in any context
+    return tuple(get_encoding(encoding_name)._encode_single_piece(piece.encode('utf-8')))
+
+
+class _Segment:
+    # One fixed stretch of template text, pre-split and pre-encoded.
+    # Pieces [0, stable) are reused when the rendered text splits at one
+    # of their boundaries; the last two pieces can merge with the slot
+    # that follows, so they are always re-tokenized.
+    __slots__ = ('text', 'bounds', 'sync', 'stable', 'token_offsets', 'tokens')
+    
+    def __init__(self, text: str, encoding_name: str):
+        pieces = [m.group() for m in _piece_pattern(encoding_name).finditer(text)]
+        self.text = text
+        self.bounds: List[int] = [0]
+        self.token_offsets: List[int] = [0]
+        tokens: List[int] = []
+        for piece in pieces:
+            tokens.extend(_piece_tokens(encoding_name, piece))
+            self.bounds.append(self.bounds[-1] + len(piece))
+            self.token_offsets.append(len(tokens))
+        self.tokens = tuple(tokens)
+        self.stable = max(0, len(pieces) - 2)
+        # Character offset -> piece index, for boundaries we can jump from
+        self.sync: Dict[int, int] = {self.bounds[k]: k for k in range(self.stable + 1)}
+
+
+class CompiledPrompt:
+    """
+    A str.format template parsed and tokenized once, for fast rendering
+    with exact token counts.
+    
+    Slots use str.format syntax, including conversions and format specs
+    ("{name!r}", "{price:.2f}"). Positional "{}" slots are not supported.
+    
+    Attributes:
+        template: The template string
+        fields: Slot names, in order of first appearance
+        static_tokens: Tokens in the fixed text alone
+    
+    Example:
+        >>> prompt = CompiledPrompt("Translate to {language}:\\n{text}")
+        >>> prompt.count(language="French", text="Good morning") == count_tokens(
+        ...     prompt.render(language="French", text="Good morning"))
+        True
+    """
+    
+    def __init__(self, template: str, model: str = "gpt-3.5-turbo"):
+        """
+        Args:
+            template: str.format template
+            model: Model (or encoding) whose tokenizer is used
+        """
+        self.template = template
+        self.model = model
+        self.encoding_name = get_encoding(model).name
+        self._pattern = _piece_pattern(self.encoding_name)
+        
+        # Alternating fixed text and slots: segments[i] comes before slots[i]
+        self._segments: List[_Segment] = []
+        self._slots: List[Tuple[str, Optional[str], str]] = []
+        literal = []
+        for text, field, spec, conversion in _formatter.parse(template):
+            literal.append(text)
+            if field is None:
+                continue
+            if field == "" or field.isdigit():
+                raise ValueError("CompiledPrompt needs named slots, e.g. {question}")
+            self._segments.append(_Segment("".join(literal), self.encoding_name))
+            self._slots.append((field, conversion, spec or ""))
+            literal = []
+        self._segments.append(_Segment("".join(literal), self.encoding_name))
+        
+        self.fields: List[str] = list(dict.fromkeys(field for field, _, _ in self._slots))
+        self.static_tokens = sum(len(segment.tokens) for segment in self._segments)
+    
+    def _fill(self, values: Dict[str, object]) -> Tuple[str, List[int]]:
+        # Rendered text and the start offset of every fixed segment in it
+        parts = []
+        starts = []
+        position = 0
+        for segment, (field, conversion, spec) in zip(self._segments, self._slots):
+            starts.append(position)
+            parts.append(segment.text)
+            position += len(segment.text)
+            
+            value = _formatter.get_field(field, (), values)[0]
+            value = _formatter.format_field(_formatter.convert_field(value, conversion), spec)
+            parts.append(value)
+            position += len(value)
+        starts.append(position)
+        parts.append(self._segments[-1].text)
+        return "".join(parts), starts
+    
+    def _encode(self, text: str, starts: List[int], collect: bool) -> Tuple[int, List[int]]:
+        # Walk the rendered text: jump over each fixed segment's stable
+        # pieces once the regex split lines up with them, and tokenize
+        # everything else piece by piece
+        count = 0
+        tokens: List[int] = []
+        position = 0
+        
+        for segment, start in zip(self._segments, starts):
+            stable_end = start + segment.bounds[segment.stable]
+            index = segment.sync.get(position - start)
+            if index is None and position < stable_end:
+                for match in self._pattern.finditer(text, position):
+                    piece = _piece_tokens(self.encoding_name, match.group())
+                    count += len(piece)
+                    if collect:
+                        tokens.extend(piece)
+                    position = match.end()
+                    index = segment.sync.get(position - start)
+                    if index is not None or position >= stable_end:
+                        break
+            if index is not None:
+                low, high = segment.token_offsets[index], segment.token_offsets[segment.stable]
+                count += high - low
+                if collect:
+                    tokens.extend(segment.tokens[low:high])
+                position = max(position, stable_end)
+        
+        for match in self._pattern.finditer(text, position):
+            piece = _piece_tokens(self.encoding_name, match.group())
+            count += len(piece)
+            if collect:
+                tokens.extend(piece)
+        return count, tokens
+    
+    def render(self, **values) -> str:
+        """Fill the slots; same result as template.format(**values)."""
+        return self._fill(values)[0]
+    
+    def render_with_count(self, **values) -> Tuple[str, int]:
+        """
+        Fill the slots and count the tokens of the result.
+        
+        Returns:
+            tuple: (prompt text, token count), the count equal to
+            count_tokens(text, model)
+        """
+        text, starts = self._fill(values)
+        return text, self._encode(text, starts, collect=False)[0]
+    
+    def count(self, **values) -> int:
+        """Token count of the rendered prompt."""
+        return self.render_with_count(**values)[1]
+    
+    def encode(self, **values) -> List[int]:
+        """Token IDs of the rendered prompt (as encode_ordinary would give)."""
+        text, starts = self._fill(values)
+        return self._encode(text, starts, collect=True)[1]
+    
+    def fits(self, model: str = None, max_tokens: int = 0, **values) -> bool:
+        """
+        Check whether the rendered prompt plus max_tokens fits the model's
+        context window.
+        
+        Args:
+            model: Model name in CONTEXT_LIMITS (None = the template's model)
+            max_tokens: Tokens to leave for the response
+            **values: Slot values
+        """
+        return self.count(**values) + max_tokens <= CONTEXT_LIMITS[model or self.model]
+
+
+def benchmark_compiled_prompt(num_renders: int = 20_000) -> None:
+    """
+    Compare format() + count_tokens() with CompiledPrompt.render_with_count()
+    on a template that is mostly fixed text, as in real traffic.
+    
+    Args:
+        num_renders: Prompts rendered and counted per approach
+    """
+    instructions = "\n".join(
+        f"{i}. Follow company policy section {i}: be accurate, cite the relevant "
+        f"knowledge-base article, and keep a professional, empathetic tone."
+        for i in range(1, 41)
+    )
+    template = (
+        "Role: You are a {expertise} with {experience_level} experience.\n\n"
+        f"Guidelines:\n{instructions}\n\n"
+        "Goal: Your task is to {action}.\n\n"
+        "Customer message:\n{message}\n"
+    )
+    requests = [
+        {
+            'expertise': "customer support specialist",
+            'experience_level': f"{i % 10 + 1} years",
+            'action': "respond to a customer complaint",
+            'message': f"Order #{10000 + i} has not arrived after {i % 14 + 2} days. Please help!",
+        }
+        for i in range(num_renders)
+    ]
+    compiled = CompiledPrompt(template)
+    
+    for values in requests[:50]:
+        assert compiled.render_with_count(**values)[1] == count_tokens(template.format(**values))
+    
+    print(f"\n{'='*70}")
+    print(f"COMPILED PROMPT BENCHMARK ({num_renders:,} renders, "
+          f"{compiled.static_tokens:,} fixed tokens per prompt)")
+    print(f"{'='*70}")
+    print(f"{'Approach':<35} {'µs per prompt':>15} {'Speedup':>10}")
+    print("-" * 70)
+    
+    start = time.perf_counter()
+    for values in requests:
+        count_tokens(template.format(**values))
+    baseline = time.perf_counter() - start
+    print(f"{'format() + count_tokens()':<35} {baseline / num_renders * 1e6:>15.2f} {1.0:>9.1f}x")
+    
+    start = time.perf_counter()
+    for values in requests:
+        compiled.render_with_count(**values)
+    elapsed = time.perf_counter() - start
+    print(f"{'CompiledPrompt.render_with_count()':<35} {elapsed / num_renders * 1e6:>15.2f} "
+          f"{baseline / elapsed:>9.1f}x")
+
+
+if __name__ == "__main__":
+    benchmark_compiled_prompt()
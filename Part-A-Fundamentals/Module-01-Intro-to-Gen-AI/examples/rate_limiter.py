@@ -0,0 +1,461 @@
+"""
+Rate Limiter - Stay Under Provider RPM and TPM Limits
+
+Providers limit each model to a number of requests per minute (RPM) and
+tokens per minute (TPM). Going over returns 429 errors, and naive
+retries make it worse. This module waits *before* sending instead:
+1. Reserve one request plus the prompt's tokens and max_tokens
+2. Wait until the model's budgets have room for the reservation
+3. After the response, correct the reservation with the real usage
+
+Budgets are token buckets that refill continuously. Their state lives
+in memory (threads) or in a locked file (several processes, e.g. a
+ProcessPoolExecutor), so every worker draws from the same budget.
+
+Usage:
+    from rate_limiter import with_rate_limit
+
+    client = with_rate_limit(OpenAI())
+    client.chat.completions.create(model="gpt-4", messages=..., max_tokens=200)
+
+Set LLM_RATE_LIMIT_PATH=.llm_rate_limit.json to share the default
+limiter across processes (POSIX only).
+"""
+
+import asyncio
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from llm_clients import ChatClientWrapper
+
+
+# Requests and tokens per minute, per model (usage tier 1 defaults;
+# check your own limits in the provider's console)
+RATE_LIMITS = {
+    "gpt-3.5-turbo": {"rpm": 3500, "tpm": 200000},
+    "gpt-4": {"rpm": 500, "tpm": 10000},
+    "gpt-4-turbo": {"rpm": 500, "tpm": 30000},
+    "gpt-4o": {"rpm": 500, "tpm": 30000},
+    "gpt-4o-mini": {"rpm": 500, "tpm": 200000},
+    "claude-3-haiku-20240307": {"rpm": 50, "tpm": 50000},
+    "claude-3-sonnet-20240229": {"rpm": 50, "tpm": 40000},
+    "claude-3-opus-20240229": {"rpm": 50, "tpm": 20000},
+}
+
+# Used for models missing from RATE_LIMITS
+DEFAULT_RATE_LIMIT = {"rpm": 60, "tpm": 40000}
+
+# Reserved when a request does not set max_tokens
+DEFAULT_MAX_TOKENS = 1024
+
+
+@dataclass
+class Reservation:
+    """Capacity taken from a model's budget for one request."""
+    model: str
+    tokens: int
+
+
+def estimate_request_tokens(messages: List[Dict], model: str, max_tokens: Optional[int], n: int = 1) -> int:
+    """
+    Worst-case tokens a chat request can use: prompt plus max_tokens for
+    each of its n completions.
+    
+    Non-OpenAI models are counted with cl100k_base, which is close
+    enough for budgeting.
+    
+    Args:
+        messages: Chat messages with 'role' and 'content'
+        model: Model name
+        max_tokens: Completion limit (None = DEFAULT_MAX_TOKENS)
+        n: Completions requested (OpenAI's n parameter)
+    
+    Returns:
+        int: Tokens to reserve
+    """
+    # Imported on first use: tiktoken and NumPy would otherwise load with
+    # every script that only wraps a client
+    from token_counting import get_encoding
+    
+    try:
+        encoding = get_encoding(model)
+    except KeyError:
+        encoding = get_encoding("cl100k_base")
+    
+    # Same per-message overhead as ConversationTokenLedger
+    prompt_tokens = 3
+    for message in messages:
+        content = message.get('content') or ""
+        if isinstance(content, list):
+            content = " ".join(part.get('text', '') for part in content if isinstance(part, dict))
+        # encode_ordinary(): text such as "<|endoftext|>" is counted as
+        # plain text instead of raising like encode() does
+        prompt_tokens += 3 + len(encoding.encode_ordinary(content))
+    
+    return prompt_tokens + n * (max_tokens if max_tokens is not None else DEFAULT_MAX_TOKENS)
+
+
+def _take(state: Optional[dict], limits: dict, requests: int, tokens: int, now: float) -> tuple:
+    # Refill both buckets for the time since the last update, then take
+    # `requests` requests and `tokens` tokens if both have room. Returns
+    # the new state and the seconds to wait (0 = taken).
+    if state is None:
+        state = {'requests': float(limits['rpm']), 'tokens': float(limits['tpm']), 'updated': now}
+    elapsed = max(0.0, now - state['updated'])
+    free_requests = min(limits['rpm'], state['requests'] + elapsed * limits['rpm'] / 60)
+    free_tokens = min(limits['tpm'], state['tokens'] + elapsed * limits['tpm'] / 60)
+    state = {'requests': free_requests, 'tokens': free_tokens, 'updated': now}
+    
+    if free_requests >= requests and free_tokens >= tokens:
+        state['requests'] -= requests
+        state['tokens'] -= tokens
+        return state, 0.0
+    
+    wait_requests = max(0.0, requests - free_requests) * 60 / limits['rpm']
+    wait_tokens = max(0.0, tokens - free_tokens) * 60 / limits['tpm']
+    return state, max(wait_requests, wait_tokens)
+
+
+class MemoryBackend:
+    """Bucket state in this process, shared by its threads."""
+    
+    def __init__(self):
+        self._state: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+    
+    def update(self, model: str, func: Callable[[Optional[dict]], tuple]):
+        """Atomically replace the model's state with func(state)[0]; return func(state)[1]."""
+        with self._lock:
+            self._state[model], result = func(self._state.get(model))
+        return result
+
+
+class FileBackend:
+    """
+    Bucket state in a JSON file, guarded by an exclusive file lock.
+    
+    Any process opening the same path shares the budgets, including
+    forked pool workers.
+    """
+    
+    def __init__(self, path: str):
+        if fcntl is None:
+            raise RuntimeError("FileBackend needs fcntl (POSIX); use MemoryBackend on Windows")
+        self.path = path
+    
+    def update(self, model: str, func: Callable[[Optional[dict]], tuple]):
+        """Atomically replace the model's state with func(state)[0]; return func(state)[1]."""
+        with open(self.path, "a+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                data = f.read()
+                states = json.loads(data) if data else {}
+                states[model], result = func(states.get(model))
+                f.seek(0)
+                f.truncate()
+                json.dump(states, f)
+                f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+        return result
+
+
+class RateLimiter:
+    """
+    Per-model RPM/TPM limiter for threads, asyncio tasks and processes.
+    
+    Attributes:
+        requests: Requests let through
+        waits: Requests that had to wait for capacity
+        wait_seconds: Total time spent waiting
+    
+    Example:
+        >>> limiter = RateLimiter(limits={"gpt-4": {"rpm": 500, "tpm": 10000}})
+        >>> reservation = limiter.acquire("gpt-4", 1200)
+        >>> # ... make the request ...
+        >>> limiter.reconcile(reservation, actual_tokens=340)
+    """
+    
+    def __init__(self, limits: Dict[str, dict] = None, path: Optional[str] = None):
+        """
+        Args:
+            limits: model -> {"rpm": ..., "tpm": ...} (None = RATE_LIMITS)
+            path: State file shared between processes (None = this process only)
+        """
+        self.limits = RATE_LIMITS if limits is None else limits
+        self.backend = FileBackend(path) if path else MemoryBackend()
+        self.requests = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self._stats_lock = threading.Lock()
+    
+    def limits_for(self, model: str) -> dict:
+        """The model's limits, or DEFAULT_RATE_LIMIT."""
+        return self.limits.get(model, DEFAULT_RATE_LIMIT)
+    
+    def _try_take(self, model: str, tokens: int) -> float:
+        limits = self.limits_for(model)
+        if tokens > limits['tpm']:
+            raise ValueError(
+                f"Request needs {tokens} tokens but {model} allows only {limits['tpm']} per minute"
+            )
+        return self.backend.update(model, lambda state: _take(state, limits, 1, tokens, time.time()))
+    
+    def _record(self, waited: float) -> None:
+        with self._stats_lock:
+            self.requests += 1
+            if waited > 0:
+                self.waits += 1
+                self.wait_seconds += waited
+    
+    def acquire(self, model: str, tokens: int, timeout: Optional[float] = None) -> Reservation:
+        """
+        Block until the model has room for one request of `tokens` tokens.
+        
+        Args:
+            model: Model name
+            tokens: Tokens to reserve (prompt + max_tokens)
+            timeout: Seconds to wait at most (None = no limit)
+        
+        Returns:
+            Reservation: Pass to reconcile() once usage is known
+        
+        Raises:
+            TimeoutError: If capacity is not free within timeout
+            ValueError: If the request is larger than the model's TPM
+        """
+        start = time.monotonic()
+        slept = False
+        while True:
+            wait = self._try_take(model, tokens)
+            waited = time.monotonic() - start
+            if wait == 0:
+                self._record(waited if slept else 0.0)
+                return Reservation(model, tokens)
+            if timeout is not None and waited + wait > timeout:
+                raise TimeoutError(f"Rate limit for {model}: no capacity within {timeout}s")
+            time.sleep(wait)
+            slept = True
+    
+    async def aacquire(self, model: str, tokens: int, timeout: Optional[float] = None) -> Reservation:
+        """Async version of acquire(); waits without blocking the event loop."""
+        start = time.monotonic()
+        slept = False
+        while True:
+            wait = self._try_take(model, tokens)
+            waited = time.monotonic() - start
+            if wait == 0:
+                self._record(waited if slept else 0.0)
+                return Reservation(model, tokens)
+            if timeout is not None and waited + wait > timeout:
+                raise TimeoutError(f"Rate limit for {model}: no capacity within {timeout}s")
+            await asyncio.sleep(wait)
+            slept = True
+    
+    def reconcile(self, reservation: Reservation, actual_tokens: int) -> None:
+        """
+        Correct a reservation with the tokens the request really used.
+        
+        Unused tokens go back to the budget; going over the reservation
+        takes the difference, which later requests then wait for.
+        """
+        difference = reservation.tokens - actual_tokens
+        if difference == 0:
+            return
+        limits = self.limits_for(reservation.model)
+        
+        def refund(state: Optional[dict]) -> tuple:
+            state, _ = _take(state, limits, 0, 0, time.time())
+            state['tokens'] = min(limits['tpm'], state['tokens'] + difference)
+            return state, None
+        
+        self.backend.update(reservation.model, refund)
+    
+    def stats(self) -> Dict[str, float]:
+        """Request and wait counters."""
+        return {
+            'requests': self.requests,
+            'waits': self.waits,
+            'wait_seconds': self.wait_seconds,
+        }
+
+
+_default_limiter: Optional[RateLimiter] = None
+_default_lock = threading.Lock()
+
+
+def get_default_limiter() -> RateLimiter:
+    """
+    The process-wide limiter used when none is passed explicitly.
+    
+    Uses a shared state file at $LLM_RATE_LIMIT_PATH if that variable is set.
+    """
+    global _default_limiter
+    if _default_limiter is None:
+        with _default_lock:
+            if _default_limiter is None:
+                _default_limiter = RateLimiter(path=os.getenv("LLM_RATE_LIMIT_PATH"))
+    return _default_limiter
+
+
+def rate_limited(func: Callable = None, *, limiter: RateLimiter = None):
+    """
+    Decorator rate-limiting a call_openai()/call_anthropic()-style function.
+    
+    The function must take prompt, model and max_tokens arguments and
+    return a dict with 'total_tokens' (or 'error'). Works on both plain
+    and async functions. A request larger than the model's TPM limit is
+    not sent; the wrapper returns an {'error': ..., 'error_type':
+    'ValueError'} dict like the function's own failures.
+    
+    Example:
+        >>> @rate_limited
+        ... def call_openai(prompt, model="gpt-3.5-turbo", temperature=0.7, max_tokens=150):
+        ...     ...
+    """
+    if func is None:
+        return functools.partial(rate_limited, limiter=limiter)
+    
+    signature = inspect.signature(func)
+    
+    def reserve_tokens(args, kwargs) -> tuple:
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        model = bound.arguments['model']
+        messages = [{"role": "user", "content": bound.arguments['prompt']}]
+        return model, estimate_request_tokens(messages, model, bound.arguments.get('max_tokens'),
+                                              bound.arguments.get('n', 1))
+    
+    def too_large(error: ValueError) -> dict:
+        return {'error': str(error), 'error_type': type(error).__name__}
+    
+    def settle(store: RateLimiter, reservation: Reservation, result: dict) -> None:
+        # A failed call used no tokens as far as we know
+        store.reconcile(reservation, result.get('total_tokens', 0))
+    
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            store = limiter or get_default_limiter()
+            try:
+                reservation = await store.aacquire(*reserve_tokens(args, kwargs))
+            except ValueError as e:
+                return too_large(e)
+            result = await func(*args, **kwargs)
+            settle(store, reservation, result)
+            return result
+        return async_wrapper
+    
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        store = limiter or get_default_limiter()
+        try:
+            reservation = store.acquire(*reserve_tokens(args, kwargs))
+        except ValueError as e:
+            return too_large(e)
+        result = func(*args, **kwargs)
+        settle(store, reservation, result)
+        return result
+    
+    return wrapper
+
+
+class RateLimitedClient(ChatClientWrapper):
+    """
+    OpenAI client wrapper that waits for rate-limit capacity before
+    each chat.completions.create() and reconciles with response.usage.
+    
+    Streaming responses keep their full reservation, since usage is only
+    known once the stream is read.
+    """
+    
+    def __init__(self, client, limiter: RateLimiter = None):
+        super().__init__(client)
+        self.limiter = limiter
+    
+    def create(self, **params):
+        store = self.limiter or get_default_limiter()
+        tokens = estimate_request_tokens(params.get('messages', []), params['model'], params.get('max_tokens'),
+                                         params.get('n') or 1)
+        reservation = store.acquire(params['model'], tokens)
+        
+        try:
+            response = super().create(**params)
+        except Exception:
+            store.reconcile(reservation, 0)
+            raise
+        
+        usage = getattr(response, 'usage', None)
+        if usage is not None:
+            store.reconcile(reservation, usage.total_tokens)
+        return response
+
+
+def with_rate_limit(client, limiter: RateLimiter = None):
+    """
+    Wrap an OpenAI client so chat.completions.create() respects RPM/TPM.
+    
+    Args:
+        client: OpenAI client (or another ChatClientWrapper)
+        limiter: Limiter to use (None = get_default_limiter())
+    
+    Returns:
+        RateLimitedClient: Drop-in replacement for the client
+    """
+    return RateLimitedClient(client, limiter)
+
+
+def demonstrate_process_sharing(workers: int = 4, requests_per_worker: int = 5) -> None:
+    """
+    Show several processes sharing one budget through a state file.
+    
+    With a limit of 60 RPM (one request per second once the initial
+    burst is spent) the workers together cannot go faster than that,
+    however many of them there are.
+    """
+    import tempfile
+    from concurrent.futures import ProcessPoolExecutor
+    
+    path = os.path.join(tempfile.mkdtemp(), "rate_limit.json")
+    
+    print(f"\n{'='*70}")
+    print(f"SHARED RATE LIMIT ({workers} processes, 60 RPM, burst of 10)")
+    print(f"{'='*70}")
+    
+    # Start with only 10 requests of burst capacity left
+    limits = {"demo-model": {"rpm": 60, "tpm": 100000}}
+    FileBackend(path).update("demo-model", lambda state: (
+        {'requests': 10.0, 'tokens': 100000.0, 'updated': time.time()}, None
+    ))
+    
+    start = time.perf_counter()
+    with ProcessPoolExecutor(workers) as pool:
+        list(pool.map(_demo_worker, [(path, limits, requests_per_worker)] * workers))
+    elapsed = time.perf_counter() - start
+    
+    total = workers * requests_per_worker
+    print(f"{total} requests in {elapsed:.1f}s "
+          f"(expected about {max(0, total - 10):.0f}s after the burst)")
+
+
+def _demo_worker(args: tuple) -> None:
+    path, limits, count = args
+    limiter = RateLimiter(limits, path=path)
+    for _ in range(count):
+        limiter.acquire("demo-model", 100)
+
+
+if __name__ == "__main__":
+    demonstrate_process_sharing()
@@ -0,0 +1,322 @@
+"""
+Response Cache - Reuse Answers to Repeated Deterministic Prompts
+
+At low temperatures the same request gets (nearly) the same answer, so
+sending it again only costs money and latency. This module caches
+responses under a hash of the full request, in two tiers:
+1. An in-memory LRU for the current process
+2. An optional SQLite file shared across runs and processes, with a
+   time-to-live and a size limit
+
+Requests with a temperature above DETERMINISTIC_TEMPERATURE skip the
+cache unless you opt in, since their answers are meant to vary.
+
+Usage:
+    from response_cache import cached_llm_call, with_response_cache
+
+    @cached_llm_call
+    def call_openai(prompt, model="gpt-3.5-turbo", temperature=0.7, ...):
+        ...
+
+    client = with_response_cache(OpenAI())
+    client.chat.completions.create(model=..., messages=..., temperature=0)
+
+Set LLM_CACHE_PATH=.llm_cache.sqlite to turn on the disk tier for the
+default cache.
+"""
+
+import functools
+import hashlib
+import inspect
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from llm_clients import ChatClientWrapper, default_base_url, provider_for
+
+
+# Highest temperature treated as deterministic enough to cache
+DETERMINISTIC_TEMPERATURE = 0.3
+
+
+def request_key(**params) -> str:
+    """
+    Canonical hash of a request.
+    
+    Parameters are serialized as JSON with sorted keys, so the same
+    request always gives the same key regardless of argument order.
+    
+    Example:
+        >>> request_key(model="gpt-4", temperature=0) == request_key(temperature=0, model="gpt-4")
+        True
+    """
+    canonical = json.dumps(params, sort_keys=True, separators=(",", ":"),
+                           ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def is_deterministic(temperature: Optional[float]) -> bool:
+    """True if a request at this temperature is safe to cache by default."""
+    # The APIs default to temperature 1.0 when it is not given
+    if temperature is None:
+        temperature = 1.0
+    return temperature <= DETERMINISTIC_TEMPERATURE
+
+
+class ResponseCache:
+    """
+    Two-tier response cache: in-memory LRU plus optional SQLite file.
+    
+    Values must be JSON-serializable. The cache is safe to share between
+    threads, and several processes can share the same SQLite file.
+    
+    Attributes:
+        hits: Lookups answered from memory
+        disk_hits: Lookups answered from the SQLite tier
+        misses: Lookups not found in either tier
+        bypassed: Requests that skipped the cache (non-deterministic)
+    
+    Example:
+        >>> cache = ResponseCache(path=".llm_cache.sqlite", ttl=86400)
+        >>> cache.set("abc", {"text": "Paris"})
+        >>> cache.get("abc")
+        {'text': 'Paris'}
+    """
+    
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        path: Optional[str] = None,
+        ttl: Optional[float] = 7 * 24 * 3600,
+        max_disk_bytes: int = 256 * 1024 * 1024
+    ):
+        """
+        Args:
+            max_entries: Entries kept in the in-memory LRU
+            path: SQLite file for the disk tier (None = memory only)
+            ttl: Seconds a disk entry stays valid (None = forever)
+            max_disk_bytes: Disk tier size limit; oldest entries go first
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes_since_prune = 0
+        
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "created REAL NOT NULL, size INTEGER NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_created ON responses (created)")
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Look up a key in memory, then on disk. Returns None on a miss."""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._memory[key]
+            
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, created FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and (self.ttl is None or row[1] > time.time() - self.ttl):
+                    value = json.loads(row[0])
+                    self._remember(key, value)
+                    self.disk_hits += 1
+                    return value
+            
+            self.misses += 1
+            return None
+    
+    def set(self, key: str, value: Any) -> None:
+        """Store a value in both tiers."""
+        with self._lock:
+            self._remember(key, value)
+            
+            if self._db is not None:
+                data = json.dumps(value)
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, created, size) VALUES (?, ?, ?, ?)",
+                    (key, data, time.time(), len(data))
+                )
+                self._writes_since_prune += 1
+                if self._writes_since_prune >= 100:
+                    self._prune()
+    
+    def _remember(self, key: str, value: Any) -> None:
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+    
+    def _prune(self) -> None:
+        # Drop expired entries, then the oldest until under the size limit
+        self._writes_since_prune = 0
+        if self.ttl is not None:
+            self._db.execute("DELETE FROM responses WHERE created <= ?", (time.time() - self.ttl,))
+        
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total > self.max_disk_bytes:
+            excess = total - self.max_disk_bytes
+            self._db.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM (SELECT key, size, SUM(size) OVER (ORDER BY created, key) AS running "
+                "FROM responses) WHERE running - size < ?)",
+                (excess,)
+            )
+    
+    def record_bypass(self) -> None:
+        """Count a request that skipped the cache."""
+        with self._lock:
+            self.bypassed += 1
+    
+    def clear(self) -> None:
+        """Remove every entry from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+    
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters."""
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'bypassed': self.bypassed,
+            'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
+
+
+_default_cache: Optional[ResponseCache] = None
+_default_lock = threading.Lock()
+
+
+def get_default_cache() -> ResponseCache:
+    """
+    The process-wide cache used when no cache is passed explicitly.
+    
+    Uses a disk tier at $LLM_CACHE_PATH if that variable is set.
+    """
+    global _default_cache
+    if _default_cache is None:
+        with _default_lock:
+            if _default_cache is None:
+                _default_cache = ResponseCache(path=os.getenv("LLM_CACHE_PATH"))
+    return _default_cache
+
+
+def cached_llm_call(func: Callable = None, *, cache: ResponseCache = None):
+    """
+    Decorator caching a call_openai()/call_anthropic()-style function.
+    
+    The key covers the function name, every argument (after defaults
+    are applied) and the base URL the shared client for the model's
+    provider uses, so answers from a mock or staging server are never
+    served to calls against another endpoint. Answers from the cache
+    carry 'cached': True. Results containing 'error' are never stored.
+    Calls are passed straight through when their temperature is above
+    DETERMINISTIC_TEMPERATURE, unless called with
+    cache_nondeterministic=True.
+    
+    Example:
+        >>> @cached_llm_call
+        ... def call_openai(prompt, model="gpt-3.5-turbo", temperature=0.7, max_tokens=150):
+        ...     ...
+        >>> call_openai("What is AI?", temperature=0)  # API call
+        >>> call_openai("What is AI?", temperature=0)  # from cache
+    """
+    if func is None:
+        return functools.partial(cached_llm_call, cache=cache)
+    
+    signature = inspect.signature(func)
+    
+    @functools.wraps(func)
+    def wrapper(*args, cache_nondeterministic: bool = False, **kwargs):
+        store = cache or get_default_cache()
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        
+        if not (cache_nondeterministic or is_deterministic(bound.arguments.get('temperature'))):
+            store.record_bypass()
+            return func(*args, **kwargs)
+        
+        base_url = default_base_url(provider_for(bound.arguments['model']))
+        key = request_key(function=func.__qualname__, base_url=base_url, **bound.arguments)
+        result = store.get(key)
+        if result is not None:
+            return dict(result, cached=True)
+        
+        result = func(*args, **kwargs)
+        if 'error' not in result:
+            store.set(key, dict(result))
+        return result
+    
+    return wrapper
+
+
+class CachedChatClient(ChatClientWrapper):
+    """
+    OpenAI client wrapper that caches chat.completions.create() results.
+    
+    Responses are stored as plain dicts and rebuilt into ChatCompletion
+    objects, so calling code sees the same type either way. Streaming
+    requests are never cached.
+    """
+    
+    def __init__(self, client, cache: ResponseCache = None, cache_nondeterministic: bool = False):
+        super().__init__(client)
+        self.cache = cache
+        self.cache_nondeterministic = cache_nondeterministic
+    
+    def create(self, **params):
+        store = self.cache or get_default_cache()
+        if params.get('stream') or not (
+            self.cache_nondeterministic or is_deterministic(params.get('temperature'))
+        ):
+            store.record_bypass()
+            return super().create(**params)
+        
+        from openai.types.chat import ChatCompletion
+        
+        key = request_key(base_url=str(self.client.base_url), **params)
+        data = store.get(key)
+        if data is not None:
+            return ChatCompletion.model_validate(data)
+        
+        response = super().create(**params)
+        store.set(key, response.model_dump(mode="json"))
+        return response
+
+
+def with_response_cache(client, cache: ResponseCache = None, cache_nondeterministic: bool = False):
+    """
+    Wrap an OpenAI client so chat.completions.create() uses the cache.
+    
+    Args:
+        client: OpenAI client (or another ChatClientWrapper)
+        cache: Cache to use (None = get_default_cache())
+        cache_nondeterministic: Also cache requests above DETERMINISTIC_TEMPERATURE
+    
+    Returns:
+        CachedChatClient: Drop-in replacement for the client
+    """
+    return CachedChatClient(client, cache, cache_nondeterministic)
@@ -0,0 +1,343 @@
+"""
+Sampling - Many Completions per Prompt and How Different They Are
+
+Temperature studies need several samples of the same prompt. Asking for
+them one call at a time is slow, and comparing them pair by pair in
+Python is slower still. This module:
+1. Gets N samples in one request with OpenAI's n parameter (Anthropic has
+   no n, so its N calls are sent concurrently)
+2. Samples several temperatures at the same time
+3. Scores all N x N sample pairs at once with NumPy: normalized edit
+   distance and character-trigram Jaccard distance
+
+Samples are never cached or coalesced: identical requests are expected
+to give different answers here.
+
+Usage:
+    from sampling import sample, temperature_study, diversity_scores
+    
+    result = sample("Name a coffee shop", n=10, temperature=1.0)
+    scores = diversity_scores(result['texts'])
+    scores['mean_edit_distance']    # 0 = all identical, 1 = nothing shared
+    
+    study = temperature_study("Name a coffee shop", [0.0, 0.7, 1.5], n=10)
+
+Requirements:
+    - openai>=1.12.0
+    - anthropic>=0.18.0
+    - numpy>=1.26.0
+"""
+
+import asyncio
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from llm_clients import get_async_anthropic_client, get_async_openai_client
+from llm_metrics import instrumented
+from rate_limiter import rate_limited
+
+
+@rate_limited
+@instrumented("openai")
+async def _openai_samples(
+    prompt: str,
+    model: str = "gpt-3.5-turbo",
+    temperature: float = 0.7,
+    max_tokens: int = 150,
+    n: int = 1
+) -> dict:
+    client = get_async_openai_client()
+    
+    try:
+        response = await client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=temperature,
+            max_tokens=max_tokens,
+            n=n
+        )
+        return {
+            'texts': [choice.message.content for choice in response.choices],
+            'model': response.model,
+            'input_tokens': response.usage.prompt_tokens,
+            'output_tokens': response.usage.completion_tokens,
+            'total_tokens': response.usage.total_tokens
+        }
+    
+    except Exception as e:
+        return {'error': str(e), 'error_type': type(e).__name__}
+
+
+@rate_limited
+@instrumented("anthropic")
+async def _anthropic_sample(
+    prompt: str,
+    model: str = "claude-3-haiku-20240307",
+    temperature: float = 0.7,
+    max_tokens: int = 150
+) -> dict:
+    client = get_async_anthropic_client()
+    
+    try:
+        response = await client.messages.create(
+            model=model,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            messages=[{"role": "user", "content": prompt}]
+        )
+        return {
+            'text': response.content[0].text,
+            'model': response.model,
+            'input_tokens': response.usage.input_tokens,
+            'output_tokens': response.usage.output_tokens,
+            'total_tokens': response.usage.input_tokens + response.usage.output_tokens
+        }
+    
+    except Exception as e:
+        return {'error': str(e), 'error_type': type(e).__name__}
+
+
+async def asample(
+    prompt: str,
+    n: int = 5,
+    model: str = "gpt-3.5-turbo",
+    temperature: float = 0.7,
+    max_tokens: int = 150
+) -> dict:
+    """
+    Get n independent completions of one prompt.
+    
+    Args:
+        prompt: The user's input text
+        n: Number of samples
+        model: OpenAI or Anthropic model name
+        temperature: Sampling temperature
+        max_tokens: Limit per sample
+    
+    Returns:
+        dict: 'texts' (n strings), 'model', token totals over all samples
+        and 'calls' (API requests made), or 'error' if no sample came back
+    """
+    if not model.startswith("claude"):
+        result = await _openai_samples(prompt, model=model, temperature=temperature,
+                                       max_tokens=max_tokens, n=n)
+        if 'error' not in result:
+            result['calls'] = 1
+        return result
+    
+    results = await asyncio.gather(*(
+        _anthropic_sample(prompt, model=model, temperature=temperature, max_tokens=max_tokens)
+        for _ in range(n)
+    ))
+    succeeded = [r for r in results if 'error' not in r]
+    if not succeeded:
+        return results[0]
+    return {
+        'texts': [r['text'] for r in succeeded],
+        'model': succeeded[0]['model'],
+        'input_tokens': sum(r['input_tokens'] for r in succeeded),
+        'output_tokens': sum(r['output_tokens'] for r in succeeded),
+        'total_tokens': sum(r['total_tokens'] for r in succeeded),
+        'calls': n,
+    }
+
+
+def sample(prompt: str, n: int = 5, **kwargs) -> dict:
+    """Blocking wrapper around asample() for scripts without an event loop."""
+    return asyncio.run(asample(prompt, n, **kwargs))
+
+
+async def atemperature_study(
+    prompt: str,
+    temperatures: Sequence[float] = (0.0, 0.7, 1.5),
+    n: int = 10,
+    **kwargs
+) -> Dict[float, dict]:
+    """
+    Sample a prompt at several temperatures at once and score each set.
+    
+    Args:
+        prompt: The user's input text
+        temperatures: Temperatures to compare
+        n: Samples per temperature
+        **kwargs: Passed to asample() (model, max_tokens)
+    
+    Returns:
+        dict: temperature -> asample() result, plus diversity_scores()
+        of its texts under 'scores'
+    """
+    results = await asyncio.gather(*(
+        asample(prompt, n, temperature=temperature, **kwargs) for temperature in temperatures
+    ))
+    for result in results:
+        if 'error' not in result:
+            result['scores'] = diversity_scores(result['texts'])
+    return dict(zip(temperatures, results))
+
+
+def temperature_study(prompt: str, temperatures: Sequence[float] = (0.0, 0.7, 1.5),
+                      n: int = 10, **kwargs) -> Dict[float, dict]:
+    """Blocking wrapper around atemperature_study()."""
+    return asyncio.run(atemperature_study(prompt, temperatures, n, **kwargs))
+
+
+def _codepoints(texts: Sequence[str]) -> List[np.ndarray]:
+    return [np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32).astype(np.int64) for text in texts]
+
+
+def pairwise_edit_distance(texts: Sequence[str]) -> np.ndarray:
+    """
+    Levenshtein distance between every pair of texts.
+    
+    All pairs are computed together: the dynamic-programming table is
+    filled one row at a time for every pair at once, and the insertion
+    step within a row is a running minimum instead of a loop.
+    
+    Args:
+        texts: Texts to compare
+    
+    Returns:
+        np.ndarray: (n, n) symmetric matrix of edit distances (int64)
+    
+    Example:
+        >>> pairwise_edit_distance(["kitten", "sitting", "kitten"])
+        array([[0, 3, 0],
+               [3, 0, 3],
+               [0, 3, 0]])
+    """
+    count = len(texts)
+    distances = np.zeros((count, count), dtype=np.int64)
+    if count < 2:
+        return distances
+    
+    codes = _codepoints(texts)
+    lengths = np.array([len(c) for c in codes])
+    first, second = np.triu_indices(count, k=1)
+    width = lengths.max()
+    
+    # Padding differs between the two sides so it never matches
+    padded = np.full((count, width), -1, dtype=np.int64)
+    for i, c in enumerate(codes):
+        padded[i, :len(c)] = c
+    a = padded[first]
+    b = np.where(padded[second] < 0, -2, padded[second])
+    
+    columns = np.arange(width + 1)
+    row = np.broadcast_to(columns, (len(first), width + 1)).copy()
+    result = np.zeros(len(first), dtype=np.int64)
+    pairs = np.arange(len(first))
+    len_a, len_b = lengths[first], lengths[second]
+    
+    done = len_a == 0
+    result[done] = len_b[done]
+    for i in range(1, lengths[first].max() + 1):
+        substitute = row[:, :-1] + (a[:, i - 1:i] != b)
+        candidate = np.empty_like(row)
+        candidate[:, 0] = i
+        candidate[:, 1:] = np.minimum(row[:, 1:] + 1, substitute)
+        # Insertions: row[j] = min over k <= j of candidate[k] + (j - k)
+        row = np.minimum.accumulate(candidate - columns, axis=1) + columns
+        done = len_a == i
+        result[done] = row[pairs[done], len_b[done]]
+    
+    distances[first, second] = result
+    distances[second, first] = result
+    return distances
+
+
+def pairwise_ngram_jaccard(texts: Sequence[str], n: int = 3) -> np.ndarray:
+    """
+    Jaccard similarity of the character n-gram sets of every pair of texts.
+    
+    Each n-gram is packed into one integer, the distinct n-grams of all
+    texts are numbered with np.unique, and the intersections of all pairs
+    come from one matrix product.
+    
+    Args:
+        texts: Texts to compare
+        n: n-gram length in characters (1 to 3)
+    
+    Returns:
+        np.ndarray: (n_texts, n_texts) matrix of similarities in [0, 1]
+    """
+    if not 1 <= n <= 3:
+        raise ValueError("n must be between 1 and 3")
+    count = len(texts)
+    
+    owners, grams = [], []
+    for i, c in enumerate(_codepoints(texts)):
+        if len(c) < n:
+            continue
+        # Code points fit in 21 bits, so three of them fit in an int64
+        packed = np.zeros(len(c) - n + 1, dtype=np.int64)
+        for offset in range(n):
+            packed = (packed << 21) | c[offset:len(c) - n + 1 + offset]
+        packed = np.unique(packed)
+        grams.append(packed)
+        owners.append(np.full(len(packed), i))
+    
+    if not grams:
+        return np.ones((count, count))
+    vocabulary, ids = np.unique(np.concatenate(grams), return_inverse=True)
+    membership = np.zeros((count, len(vocabulary)), dtype=np.float32)
+    membership[np.concatenate(owners), ids] = 1
+    
+    intersection = membership @ membership.T
+    sizes = np.diag(intersection)
+    union = sizes[:, None] + sizes[None, :] - intersection
+    # Two texts without any n-gram (both too short) count as identical
+    return np.where(union > 0, intersection / np.maximum(union, 1), 1.0)
+
+
+def diversity_scores(texts: Sequence[str], n: int = 3) -> Dict[str, object]:
+    """
+    How different a set of samples is from each other.
+    
+    Args:
+        texts: Samples of the same prompt
+        n: Character n-gram length for the Jaccard score
+    
+    Returns:
+        dict: mean pairwise edit distance normalized by the longer text
+        (0 = identical, 1 = nothing in common), mean n-gram Jaccard
+        distance, share of distinct samples, and the pairwise matrices
+    """
+    count = len(texts)
+    edit = pairwise_edit_distance(texts)
+    lengths = np.array([len(t) for t in texts])
+    normalized = edit / np.maximum(np.maximum.outer(lengths, lengths), 1)
+    jaccard = 1.0 - pairwise_ngram_jaccard(texts, n)
+    
+    first, second = np.triu_indices(count, k=1)
+    return {
+        'samples': count,
+        'distinct': len(set(texts)) / count if count else 0.0,
+        'mean_edit_distance': float(normalized[first, second].mean()) if len(first) else 0.0,
+        'mean_jaccard_distance': float(jaccard[first, second].mean()) if len(first) else 0.0,
+        'edit_distance': edit,
+        'jaccard_distance': jaccard,
+    }
+
+
+def print_temperature_study(study: Dict[float, dict], show: int = 3) -> None:
+    """
+    Print the diversity of each temperature's samples and a few of them.
+    
+    Args:
+        study: Result of temperature_study()
+        show: Samples to print per temperature
+    """
+    for temperature, result in study.items():
+        print(f"\n🌡️  Temperature: {temperature}")
+        print("-" * 70)
+        if 'error' in result:
+            print(f"Error: {result['error']}")
+            continue
+        scores = result['scores']
+        print(f"{scores['samples']} samples in {result['calls']} call(s): "
+              f"{scores['distinct']:.0%} distinct, "
+              f"edit distance {scores['mean_edit_distance']:.2f}, "
+              f"trigram Jaccard distance {scores['mean_jaccard_distance']:.2f}")
+        for i, text in enumerate(result['texts'][:show]):
+            print(f"Sample {i+1}: {text[:100]}...")
@@ -0,0 +1,277 @@
+"""
+Single Flight - Coalesce Identical In-Flight Requests
+
+When many workers send the same prompt at the same moment, the response
+cache cannot help: none of them has an answer to cache yet. This module
+lets the first caller (the leader) make the upstream call while every
+identical request that arrives before it finishes waits and receives the
+leader's result. Requests are identical when their canonical request
+hash (response_cache.request_key) matches.
+
+Like the response cache, only requests at or below
+DETERMINISTIC_TEMPERATURE are coalesced by default: callers sampling at
+higher temperatures expect different answers.
+
+Works for threads and for asyncio tasks.
+
+Usage:
+    from single_flight import coalesced, with_single_flight
+
+    @coalesced
+    def call_openai(prompt, model="gpt-3.5-turbo", temperature=0.7, ...):
+        ...
+
+    client = with_single_flight(OpenAI())
+"""
+
+import asyncio
+import functools
+import inspect
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from llm_clients import ChatClientWrapper
+from response_cache import is_deterministic, request_key
+
+
+class _Call:
+    # One upstream call in progress, shared by its leader and followers
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Run at most one call per key at a time; concurrent callers share it.
+    
+    Attributes:
+        upstream_calls: Calls actually made
+        saved: Calls avoided because an identical one was in flight
+    
+    Example:
+        >>> flight = SingleFlight()
+        >>> flight.do("key", expensive_function, arg)  # from many threads
+        >>> flight.stats()
+        {'calls': 8, 'upstream_calls': 1, 'saved': 7}
+    """
+    
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._tasks: Dict[tuple, asyncio.Task] = {}
+        self._lock = threading.Lock()
+        self.upstream_calls = 0
+        self.saved = 0
+    
+    def do(self, key: str, func: Callable, *args, **kwargs) -> Any:
+        """
+        Call func(*args, **kwargs), or wait for the identical call in flight.
+        
+        Exceptions raised by the leader's call are raised in every caller.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.upstream_calls += 1
+            else:
+                self.saved += 1
+        
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        
+        try:
+            call.result = func(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+    
+    async def ado(self, key: str, func: Callable, *args, **kwargs) -> Any:
+        """
+        Async version of do(): await func(*args, **kwargs) once per key.
+        
+        The call runs as its own task, so cancelling one waiting caller
+        does not cancel it for the others.
+        """
+        loop = asyncio.get_running_loop()
+        task_key = (loop, key)
+        
+        with self._lock:
+            task = self._tasks.get(task_key)
+            if task is None:
+                task = self._tasks[task_key] = loop.create_task(func(*args, **kwargs))
+                task.add_done_callback(lambda _: self._forget(task_key))
+                self.upstream_calls += 1
+            else:
+                self.saved += 1
+        
+        return await asyncio.shield(task)
+    
+    def _forget(self, task_key: tuple) -> None:
+        with self._lock:
+            self._tasks.pop(task_key, None)
+    
+    def stats(self) -> Dict[str, int]:
+        """Call counters."""
+        return {
+            'calls': self.upstream_calls + self.saved,
+            'upstream_calls': self.upstream_calls,
+            'saved': self.saved,
+        }
+
+
+_default_flight = SingleFlight()
+
+
+def get_default_flight() -> SingleFlight:
+    """The process-wide SingleFlight used when none is passed explicitly."""
+    return _default_flight
+
+
+def coalesced(func: Callable = None, *, flight: SingleFlight = None, nondeterministic: bool = False):
+    """
+    Decorator coalescing concurrent identical calls to a
+    call_openai()/call_anthropic()-style function (plain or async).
+    
+    The key covers the function name and every argument. Each waiting
+    caller gets its own copy of the leader's result dict. Calls above
+    DETERMINISTIC_TEMPERATURE run on their own unless nondeterministic=True.
+    
+    Example:
+        >>> @coalesced
+        ... def call_openai(prompt, model="gpt-3.5-turbo", temperature=0.7, max_tokens=150):
+        ...     ...
+    """
+    if func is None:
+        return functools.partial(coalesced, flight=flight, nondeterministic=nondeterministic)
+    
+    signature = inspect.signature(func)
+    
+    def key_for(args, kwargs) -> Optional[str]:
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        if not (nondeterministic or is_deterministic(bound.arguments.get('temperature'))):
+            return None
+        return request_key(function=func.__qualname__, **bound.arguments)
+    
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            key = key_for(args, kwargs)
+            if key is None:
+                return await func(*args, **kwargs)
+            shared = flight or get_default_flight()
+            return dict(await shared.ado(key, func, *args, **kwargs))
+        return async_wrapper
+    
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        key = key_for(args, kwargs)
+        if key is None:
+            return func(*args, **kwargs)
+        shared = flight or get_default_flight()
+        return dict(shared.do(key, func, *args, **kwargs))
+    
+    return wrapper
+
+
+class SingleFlightClient(ChatClientWrapper):
+    """
+    OpenAI client wrapper that coalesces identical concurrent
+    chat.completions.create() requests. Streaming requests, and requests
+    above DETERMINISTIC_TEMPERATURE unless nondeterministic=True, are
+    never coalesced.
+    """
+    
+    def __init__(self, client, flight: SingleFlight = None, nondeterministic: bool = False):
+        super().__init__(client)
+        self.flight = flight
+        self.nondeterministic = nondeterministic
+    
+    def create(self, **params):
+        if params.get('stream') or not (
+            self.nondeterministic or is_deterministic(params.get('temperature'))
+        ):
+            return super().create(**params)
+        shared = self.flight or get_default_flight()
+        key = request_key(base_url=str(self.client.base_url), **params)
+        return shared.do(key, super().create, **params)
+
+
+def with_single_flight(client, flight: SingleFlight = None, nondeterministic: bool = False):
+    """
+    Wrap an OpenAI client so identical concurrent requests share one call.
+    
+    Args:
+        client: OpenAI client (or another ChatClientWrapper)
+        flight: SingleFlight to use (None = get_default_flight())
+        nondeterministic: Also coalesce requests above DETERMINISTIC_TEMPERATURE
+    
+    Returns:
+        SingleFlightClient: Drop-in replacement for the client
+    """
+    return SingleFlightClient(client, flight, nondeterministic)
+
+
+def demonstrate_coalescing(workers: int = 16, latency: float = 0.2) -> None:
+    """
+    Send the same prompt from many threads and from many asyncio tasks
+    to the local mock server, and count the upstream calls.
+    
+    Args:
+        workers: Concurrent identical requests
+        latency: Mock server latency in seconds
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from mock_llm_server import start_mock_server
+    from llm_clients import get_async_openai_client, get_openai_client
+    
+    server, base_url = start_mock_server(latency=latency)
+    params = {
+        'model': "gpt-3.5-turbo",
+        'messages': [{"role": "user", "content": "What is the capital of France?"}],
+        'max_tokens': 20,
+        'temperature': 0,
+    }
+    
+    print(f"\n{'='*70}")
+    print(f"SINGLE-FLIGHT COALESCING ({workers} identical requests, {latency*1000:.0f} ms latency)")
+    print(f"{'='*70}")
+    
+    try:
+        flight = SingleFlight()
+        client = with_single_flight(get_openai_client(api_key="mock", base_url=f"{base_url}/v1"), flight)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(workers) as pool:
+            list(pool.map(lambda _: client.chat.completions.create(**params), range(workers)))
+        print(f"Threads: {time.perf_counter() - start:.2f}s, {flight.stats()}")
+        
+        flight = SingleFlight()
+        
+        async def run_tasks() -> None:
+            async_client = get_async_openai_client(api_key="mock", base_url=f"{base_url}/v1")
+            await asyncio.gather(*(
+                flight.ado("same-request", async_client.chat.completions.create, **params)
+                for _ in range(workers)
+            ))
+        
+        start = time.perf_counter()
+        asyncio.run(run_tasks())
+        print(f"Asyncio: {time.perf_counter() - start:.2f}s, {flight.stats()}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    demonstrate_coalescing()
@@ -13,11 +13,75 @@ counts is crucial for:
 Requirements:
     - tiktoken>=0.6.0
     - openai>=1.12.0
+    - numpy>=1.26.0
+    - regex (installed with tiktoken)
 """
 
 import tiktoken
-from typing import List, Dict
+import numpy as np
+import regex
+import codecs
+import hashlib
+import os
+from functools import lru_cache
+from typing import BinaryIO, Iterable, Iterator, List, Dict, Sequence, Union
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Maximum number of distinct model/encoding names kept in the registry
+ENCODING_CACHE_SIZE = 32
+
+# Model context limits (tokens)
+CONTEXT_LIMITS = {
+    "gpt-3.5-turbo": 4096,
+    "gpt-3.5-turbo-16k": 16384,
+    "gpt-4": 8192,
+    "gpt-4-32k": 32768,
+    "gpt-4-turbo": 128000,
+}
+
+
+@lru_cache(maxsize=ENCODING_CACHE_SIZE)
+def get_encoding(name: str = "gpt-3.5-turbo") -> tiktoken.Encoding:
+    """
+    Get the shared tiktoken encoding for a model or encoding name.
+    
+    Looking up and constructing an Encoding is far more expensive than
+    encoding a short string, so every helper in this module goes through
+    this process-wide registry instead of calling
+    tiktoken.encoding_for_model() on each call. The cache is bounded
+    (ENCODING_CACHE_SIZE entries) and safe to share between threads:
+    Encoding objects are immutable and tiktoken guards their creation.
+    
+    Args:
+        name: Model name (e.g., "gpt-4") or encoding name (e.g., "cl100k_base")
+        
+    Returns:
+        tiktoken.Encoding: Cached encoding instance
+        
+    Example:
+        >>> get_encoding("gpt-4") is get_encoding("gpt-4")
+        True
+    """
+    if name in tiktoken.list_encoding_names():
+        return tiktoken.get_encoding(name)
+    return tiktoken.encoding_for_model(name)
+
+
+def preload_encodings(names: Iterable[str] = ("gpt-3.5-turbo", "gpt-4")) -> None:
+    """
+    Warm the encoding registry at startup.
+    
+    Call this once when a service starts so the first request does not
+    pay for loading the BPE ranks from disk (or downloading them).
+    
+    Args:
+        names: Model or encoding names to load
+    """
+    for name in names:
+        get_encoding(name)
 
 
 def count_tokens(text: str, model: str = "gpt-3.5-turbo") -> int:
@@ -35,18 +99,401 @@ def count_tokens(text: str, model: str = "gpt-3.5-turbo") -> int:
         >>> count_tokens("Hello, world!")
         4
     """
-    encoding = tiktoken.encoding_for_model(model)
+    encoding = get_encoding(model)
     tokens = encoding.encode(text)
     return len(tokens)
 
 
-def visualize_tokenization(text: str, model: str = "gpt-3.5-turbo") -> None:
+def count_tokens_batch(
+    texts: Sequence[str],
+    model: str = "gpt-3.5-turbo",
+    num_threads: int = 8
+) -> np.ndarray:
+    """
+    Count tokens for many texts at once using multiple encoder threads.
+    
+    tiktoken's encoder releases the GIL, so the texts are split into one
+    contiguous slice per thread and each thread encodes its slice in a
+    tight loop (encode_batch() schedules one task per text, which costs
+    more than encoding a short prompt). Only the per-text counts are
+    kept, never the token ID lists.
+    
+    Args:
+        texts: Input texts to tokenize
+        model: Model name (e.g., "gpt-3.5-turbo", "gpt-4")
+        num_threads: Number of encoder threads
+        
+    Returns:
+        np.ndarray: Token count for each text (uint32), in input order
+        
+    Example:
+        >>> count_tokens_batch(["Hello, world!", "AI"])
+        array([4, 1], dtype=uint32)
+    """
+    encoding = get_encoding(model)
+    counts = np.empty(len(texts), dtype=np.uint32)
+    if len(texts) == 0:
+        return counts
+    
+    def count_slice(start: int, end: int) -> None:
+        counts[start:end] = [len(encoding.encode(text)) for text in texts[start:end]]
+    
+    num_threads = max(1, min(num_threads, len(texts)))
+    step = -(-len(texts) // num_threads)  # ceiling division
+    
+    if num_threads == 1:
+        count_slice(0, len(texts))
+    else:
+        with ThreadPoolExecutor(num_threads) as executor:
+            futures = [
+                executor.submit(count_slice, start, min(start + step, len(texts)))
+                for start in range(0, len(texts), step)
+            ]
+            for future in futures:
+                future.result()
+    
+    return counts
+
+
+def benchmark_batch_counting(
+    num_texts: int = 20_000,
+    thread_counts: Sequence[int] = (1, 2, 4, 8),
+    model: str = "gpt-3.5-turbo"
+) -> None:
+    """
+    Compare count_tokens in a loop with count_tokens_batch at several
+    thread counts.
+    
+    Args:
+        num_texts: Number of synthetic prompts to count
+        thread_counts: Thread counts to benchmark
+        model: Model name
+    """
+    texts = [
+        f"Request {i}: summarize the customer feedback and list "
+        f"{i % 7 + 1} action items for the support team." * (i % 5 + 1)
+        for i in range(num_texts)
+    ]
+    
+    print(f"\n{'='*70}")
+    print(f"BATCH TOKEN COUNTING BENCHMARK ({num_texts:,} texts)")
+    print(f"{'='*70}")
+    print(f"{'Method':<25} {'Seconds':>10} {'Texts/sec':>15} {'Speedup':>10}")
+    print("-" * 70)
+    
+    start = time.perf_counter()
+    expected = [count_tokens(text, model) for text in texts]
+    loop_time = time.perf_counter() - start
+    print(f"{'count_tokens loop':<25} {loop_time:>10.3f} "
+          f"{num_texts / loop_time:>15,.0f} {1.0:>9.1f}x")
+    
+    for num_threads in thread_counts:
+        start = time.perf_counter()
+        counts = count_tokens_batch(texts, model, num_threads=num_threads)
+        elapsed = time.perf_counter() - start
+        assert counts.tolist() == expected
+        label = f"batch ({num_threads} threads)"
+        print(f"{label:<25} {elapsed:>10.3f} "
+              f"{num_texts / elapsed:>15,.0f} {loop_time / elapsed:>9.1f}x")
+
+
+class StreamingTokenCounter:
+    """
+    Count tokens, characters and words of text that arrives in chunks.
+    
+    Chunks may be bytes (decoded incrementally as UTF-8, so a multi-byte
+    character split across chunks is handled) or str. tiktoken first
+    splits text into pieces with a regex and never merges BPE tokens
+    across pieces, so the counter encodes each piece the regex finds in
+    the buffered text on its own, except the last two, which are carried
+    into the next chunk. The result matches encoding the whole text at once, while
+    memory stays bounded by the chunk size plus the carried tail.
+    
+    Special-token text such as "<|endoftext|>" is counted as ordinary
+    text rather than raising, since corpora may legitimately contain it.
+    
+    Example:
+        >>> counter = StreamingTokenCounter()
+        >>> counter.feed(b"Hello, wor")
+        >>> counter.feed(b"ld!")
+        >>> counter.close()
+        {'tokens': 4, 'characters': 13, 'words': 2}
+    """
+    
+    # A single piece longer than this (e.g. a huge run of whitespace) is
+    # committed anyway so memory stays bounded
+    max_carry_chars = 1 << 16
+    
+    def __init__(self, model: str = "gpt-3.5-turbo"):
+        self.encoding = get_encoding(model)
+        self._pattern = _piece_pattern(self.encoding.name)
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._carry = ""
+        self._after_space = True
+        self.tokens = 0
+        self.characters = 0
+        self.words = 0
+    
+    def feed(self, chunk: Union[bytes, str]) -> None:
+        """Add the next chunk of text."""
+        if isinstance(chunk, (bytes, bytearray, memoryview)):
+            chunk = self._decoder.decode(chunk)
+        if not chunk:
+            return
+        
+        buffer = self._carry + chunk
+        
+        # Commit the pieces exactly as the regex split them in the buffer;
+        # re-splitting the committed prefix on its own can split its end
+        # differently. The last two pieces are carried over: appending
+        # text can still change how the final piece (and its lookahead
+        # neighbour) is split.
+        pending = []
+        tokens = 0
+        for match in self._pattern.finditer(buffer):
+            pending.append(match)
+            if len(pending) > 2:
+                tokens += self._piece_tokens(pending.pop(0).group())
+        cut = pending[0].start() if pending else len(buffer)
+        while pending and len(buffer) - cut > self.max_carry_chars:
+            tokens += self._piece_tokens(pending.pop(0).group())
+            cut = pending[0].start() if pending else len(buffer)
+        
+        self._commit(buffer[:cut], tokens)
+        self._carry = buffer[cut:]
+    
+    def close(self) -> Dict[str, int]:
+        """Flush any buffered text and return the final totals."""
+        # Nothing follows the carry any more, so it splits as it would at
+        # the end of the whole text
+        text = self._carry + self._decoder.decode(b"", final=True)
+        self._commit(text, len(self.encoding.encode_ordinary(text)))
+        self._carry = ""
+        return self.totals()
+    
+    def totals(self) -> Dict[str, int]:
+        """Running totals for the text committed so far."""
+        return {
+            'tokens': self.tokens,
+            'characters': self.characters,
+            'words': self.words
+        }
+    
+    def _piece_tokens(self, piece: str) -> int:
+        # BPE never merges across pieces, so a piece encodes the same alone
+        return len(self.encoding._encode_single_piece(piece.encode('utf-8')))
+    
+    def _commit(self, text: str, tokens: int) -> None:
+        if not text:
+            return
+        self.tokens += tokens
+        self.characters += len(text)
+        
+        # Match str.split(): a word continuing from the previous segment
+        # is only counted once
+        words = len(text.split())
+        if not self._after_space and not text[0].isspace():
+            words -= 1
+        self.words += max(words, 0)
+        self._after_space = text[-1].isspace()
+
+
+@lru_cache(maxsize=ENCODING_CACHE_SIZE)
+def _piece_pattern(encoding_name: str) -> "regex.Pattern":
+    # Same pre-tokenization regex tiktoken applies before BPE merges
+    return regex.compile(get_encoding(encoding_name)._pat_str)
+
+
+def stream_token_counts(
+    source: Union[str, os.PathLike, BinaryIO, Iterable[Union[bytes, str]]],
+    model: str = "gpt-3.5-turbo",
+    chunk_size: int = 1 << 20
+) -> Iterator[Dict[str, int]]:
+    """
+    Count tokens in a file or stream without loading it into memory.
+    
+    Yields running totals after every chunk; the last value yielded is
+    the total for the whole input.
+    
+    Args:
+        source: File path, binary file object, or iterator of bytes/str chunks
+        model: Model name
+        chunk_size: Bytes read per chunk from paths and file objects
+        
+    Yields:
+        dict: Running 'tokens', 'characters' and 'words' totals
+        
+    Example:
+        >>> for totals in stream_token_counts("corpus.txt"):
+        ...     print(f"{totals['tokens']:,} tokens so far")
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            yield from stream_token_counts(f, model, chunk_size)
+        return
+    
+    counter = StreamingTokenCounter(model)
+    
+    if hasattr(source, "read"):
+        # Text-mode file objects signal EOF with "" rather than b""
+        chunks = iter(lambda: source.read(chunk_size) or b"", b"")
+    else:
+        chunks = iter(source)
+    
+    for chunk in chunks:
+        counter.feed(chunk)
+        yield counter.totals()
+    
+    yield counter.close()
+
+
+@lru_cache(maxsize=ENCODING_CACHE_SIZE)
+def _token_byte_lengths(encoding_name: str) -> np.ndarray:
+    # Byte length of every token ID, built once per encoding
+    encoding = get_encoding(encoding_name)
+    lengths = np.zeros(encoding.n_vocab, dtype=np.uint32)
+    for token_bytes, token in encoding._mergeable_ranks.items():
+        lengths[token] = len(token_bytes)
+    for special, token in encoding._special_tokens.items():
+        lengths[token] = len(special.encode('utf-8'))
+    return lengths
+
+
+class TokenOffsets:
+    """
+    Token IDs of a text with the byte and character span of every token.
+    
+    Built with one encode pass; spans come from a per-encoding table of
+    token byte lengths and a running count of UTF-8 characters, so no
+    token is decoded on its own. A token that covers only part of a
+    multi-byte character (common with emoji and CJK text) gets the span
+    of that whole character, shared with its neighbour.
+    
+    Slicing by token index (offsets[1000:1050]) returns a view over the
+    same arrays and text.
+    
+    Attributes:
+        text: The tokenized text
+        tokens: Token IDs (np.ndarray, uint32)
+        offsets: (n, 4) array of byte_start, byte_end, char_start, char_end
+    
+    Example:
+        >>> offsets = TokenOffsets("Hello, world!")
+        >>> offsets.pieces()
+        ['Hello', ',', ' world', '!']
+        >>> offsets[2:].text_span()
+        (6, 13)
+    """
+    
+    BYTE_START, BYTE_END, CHAR_START, CHAR_END = range(4)
+    
+    def __init__(self, text: str, model: str = "gpt-3.5-turbo", *, _arrays: tuple = None):
+        self.text = text
+        if _arrays is not None:
+            self.tokens, self.offsets = _arrays
+            return
+        
+        encoding = get_encoding(model)
+        self.tokens = np.asarray(encoding.encode_ordinary(text), dtype=np.uint32)
+        
+        data = np.frombuffer(text.encode('utf-8', errors='surrogatepass'), dtype=np.uint8)
+        dtype = np.uint32 if len(data) < 2**32 else np.uint64
+        byte_end = np.cumsum(_token_byte_lengths(encoding.name)[self.tokens], dtype=dtype)
+        byte_start = byte_end - _token_byte_lengths(encoding.name)[self.tokens]
+        
+        # chars_before[b] = characters starting before byte b
+        is_lead = (data & 0xC0) != 0x80
+        chars_before = np.zeros(len(data) + 1, dtype=dtype)
+        np.cumsum(is_lead, out=chars_before[1:])
+        # A token starting inside a character starts at that character
+        starts_mid_char = np.append(~is_lead, False)[byte_start]
+        
+        self.offsets = np.empty((len(self.tokens), 4), dtype=dtype)
+        self.offsets[:, self.BYTE_START] = byte_start
+        self.offsets[:, self.BYTE_END] = byte_end
+        self.offsets[:, self.CHAR_START] = chars_before[byte_start] - starts_mid_char
+        self.offsets[:, self.CHAR_END] = chars_before[byte_end]
+    
+    def __len__(self) -> int:
+        return len(self.tokens)
+    
+    def __getitem__(self, index: slice) -> "TokenOffsets":
+        if not isinstance(index, slice):
+            raise TypeError("TokenOffsets only supports slicing, e.g. offsets[10:20]")
+        return TokenOffsets(self.text, _arrays=(self.tokens[index], self.offsets[index]))
+    
+    def text_span(self) -> tuple:
+        """(char_start, char_end) covered by these tokens."""
+        if not len(self):
+            return (0, 0)
+        return (int(self.offsets[0, self.CHAR_START]), int(self.offsets[-1, self.CHAR_END]))
+    
+    def decode(self) -> str:
+        """Text of these tokens, read from the original string."""
+        start, end = self.text_span()
+        return self.text[start:end]
+    
+    def pieces(self) -> List[str]:
+        """
+        Text of each token. A character split across tokens is shown with
+        the first of them; the rest show "".
+        """
+        starts = self.offsets[:, self.CHAR_START].astype(np.int64)
+        ends = self.offsets[:, self.CHAR_END].astype(np.int64)
+        if len(starts) > 1:
+            starts[1:] = np.maximum(starts[1:], ends[:-1])
+        return [self.text[s:e] for s, e in zip(starts.tolist(), ends.tolist())]
+    
+    def token_at(self, char_index: int) -> int:
+        """Index of the token covering a character position."""
+        return int(np.searchsorted(self.offsets[:, self.CHAR_END], char_index, side='right'))
+    
+    def highlight(self, separator: str = "|") -> str:
+        """These tokens' text with a separator at every token boundary."""
+        return separator + separator.join(self.pieces()) + separator
+
+
+def benchmark_token_offsets(num_tokens: int = 100_000, model: str = "gpt-3.5-turbo") -> None:
+    """
+    Compare decoding every token separately with building TokenOffsets
+    on a document of about num_tokens tokens.
+    """
+    paragraph = ("Large language models split text into tokens. Café prices rose 5% in "
+                 "日本 🚀 while def tokenize(text): return text.split() stays simple.\n")
+    encoding = get_encoding(model)
+    document = paragraph * max(1, num_tokens // len(encoding.encode_ordinary(paragraph)))
+    
+    start = time.perf_counter()
+    tokens = encoding.encode_ordinary(document)
+    [encoding.decode([token]) for token in tokens]
+    per_token = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    offsets = TokenOffsets(document, model)
+    build = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    middle = len(offsets) // 2
+    offsets[middle:middle + 50].highlight()
+    window = time.perf_counter() - start
+    
+    print(f"\n{'='*70}")
+    print(f"TOKEN OFFSETS BENCHMARK ({len(tokens):,} tokens)")
+    print(f"{'='*70}")
+    print(f"{'encode + decode([token]) each':<35} {per_token * 1000:>10.1f} ms")
+    print(f"{'TokenOffsets (encode + offsets)':<35} {build * 1000:>10.1f} ms "
+          f"({per_token / build:.1f}x)")
+    print(f"{'  then highlight 50 tokens':<35} {window * 1000:>10.3f} ms")
+
+
+def visualize_tokenization(text: str, model: str = "gpt-3.5-turbo", max_shown: int = None) -> None:
     """
     Show how text is broken down into individual tokens.
     
     Args:
         text: Input text to tokenize
         model: Model name
+        max_shown: Show only the first this many tokens (None = all)
         
     Output example:
         Text: "Hello, world!"
@@ -54,21 +501,22 @@ def visualize_tokenization(text: str, model: str = "gpt-3.5-turbo") -> None:
         Token IDs: [15496, 11, 1917, 0]
         Total tokens: 4
     """
-    encoding = tiktoken.encoding_for_model(model)
-    tokens = encoding.encode(text)
-    
-    # Decode each token to see what it represents
-    token_strings = [encoding.decode([token]) for token in tokens]
+    # One encode pass; each token's text is sliced from the input rather
+    # than decoded on its own
+    offsets = TokenOffsets(text, model)
+    shown = offsets[:max_shown]
+    tokens = shown.tokens.tolist()
+    more = f" ... (+{len(offsets) - len(shown):,} more)" if len(shown) < len(offsets) else ""
     
     print(f"\n{'='*70}")
-    print(f"Text: '{text}'")
+    print(f"Text: '{text if not more else shown.decode() + '...'}'")
     print(f"{'='*70}")
-    print(f"Tokens: {token_strings}")
-    print(f"Token IDs: {tokens}")
-    print(f"Total tokens: {len(tokens)}")
+    print(f"Tokens: {shown.pieces()}{more}")
+    print(f"Token IDs: {tokens}{more}")
+    print(f"Total tokens: {len(offsets)}")
     print(f"Characters: {len(text)}")
     print(f"Words (approx): {len(text.split())}")
-    print(f"Ratio: {len(tokens) / len(text.split()):.2f} tokens per word")
+    print(f"Ratio: {len(offsets) / len(text.split()):.2f} tokens per word")
 
 
 def compare_tokenization_examples() -> None:
@@ -93,16 +541,118 @@ def compare_tokenization_examples() -> None:
     ]
     
     for text in examples:
-        token_count = count_tokens(text)
+        offsets = TokenOffsets(text)
         print(f"\n'{text}'")
-        print(f"  → {token_count} tokens ({len(text)} characters)")
+        print(f"  → {len(offsets)} tokens ({len(text)} characters)")
+        
+        # Show the breakdown for short texts only
+        if len(offsets) <= 5:
+            print(f"  → Breakdown: {offsets.pieces()}")
+
+
+class ConversationTokenLedger:
+    """
+    Keep running token counts for a conversation as it changes.
+    
+    Each message is tokenized once, when it is added or edited, and its
+    count is cached by a hash of its content so repeated content (e.g.
+    the same system prompt) is never re-encoded. Appending, editing or
+    evicting a message only touches that message, so accounting for a
+    whole chat session is linear in the text added rather than
+    quadratic in the number of turns.
+    
+    OpenAI's chat models use special tokens for message formatting:
+    - Each message has overhead (role, name, formatting)
+    - Typically 3-4 tokens per message overhead
+    
+    Example:
+        >>> ledger = ConversationTokenLedger()
+        >>> ledger.append({"role": "system", "content": "You are helpful."})
+        >>> ledger.append({"role": "user", "content": "Hello!"})
+        >>> ledger.totals()
+        {'system': 4, 'user': 2, 'assistant': 0, 'overhead': 9, 'total': 15}
+    """
+    
+    # <|start|>role\n + content + <|end|>\n
+    tokens_per_message = 3
+    tokens_per_name = 1
+    # Every reply is primed with <|start|>assistant<|message|>
+    reply_priming = 3
+    
+    roles = ('system', 'user', 'assistant')
+    
+    def __init__(self, model: str = "gpt-3.5-turbo", messages: Iterable[Dict[str, str]] = ()):
+        self.encoding = get_encoding(model)
+        # (role, content hash, overhead) for each message, in order
+        self._entries: List[tuple] = []
+        # content hash -> [token count, number of messages using it]
+        self._counts: Dict[bytes, List[int]] = {}
+        self._totals = {role: 0 for role in self.roles}
+        self._totals['overhead'] = self.reply_priming
+        self.extend(messages)
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def append(self, message: Dict[str, str]) -> None:
+        """Add a message to the end of the conversation."""
+        self._entries.append(self._add(message))
+    
+    def extend(self, messages: Iterable[Dict[str, str]]) -> None:
+        """Add several messages to the end of the conversation."""
+        for message in messages:
+            self.append(message)
+    
+    def edit(self, index: int, message: Dict[str, str]) -> None:
+        """Replace the message at index."""
+        # Look up the old entry first so a bad index leaves totals untouched
+        old = self._entries[index]
+        self._entries[index] = self._add(message)
+        self._remove(old)
+    
+    def evict(self, index: int = 0) -> None:
+        """Remove the message at index (default: the oldest)."""
+        self._remove(self._entries.pop(index))
+    
+    def totals(self) -> Dict[str, int]:
+        """
+        Token counts breakdown, in the same shape as
+        estimate_conversation_tokens().
+        """
+        counts = dict(self._totals)
+        counts['total'] = sum(counts.values())
+        return counts
+    
+    def _add(self, message: Dict[str, str]) -> tuple:
+        role = message.get('role', 'user')
+        content = message.get('content', '')
+        key = hashlib.blake2b(content.encode('utf-8'), digest_size=16).digest()
+        
+        cached = self._counts.get(key)
+        if cached is None:
+            cached = self._counts[key] = [len(self.encoding.encode(content)), 0]
+        cached[1] += 1
         
-        # Show first 5 tokens if more than 5
-        encoding = tiktoken.encoding_for_model("gpt-3.5-turbo")
-        tokens = encoding.encode(text)
-        if len(tokens) <= 5:
-            token_strings = [encoding.decode([t]) for t in tokens]
-            print(f"  → Breakdown: {token_strings}")
+        overhead = self.tokens_per_message
+        if 'name' in message:
+            overhead += self.tokens_per_name
+        
+        if role in self._totals and role != 'overhead':
+            self._totals[role] += cached[0]
+        self._totals['overhead'] += overhead
+        return role, key, overhead
+    
+    def _remove(self, entry: tuple) -> None:
+        role, key, overhead = entry
+        cached = self._counts[key]
+        
+        if role in self._totals and role != 'overhead':
+            self._totals[role] -= cached[0]
+        self._totals['overhead'] -= overhead
+        
+        cached[1] -= 1
+        if cached[1] == 0:
+            del self._counts[key]
 
 
 def estimate_conversation_tokens(
@@ -112,9 +662,9 @@ def estimate_conversation_tokens(
     """
     Estimate token count for a conversation (chat format).
     
-    OpenAI's chat models use special tokens for message formatting:
-    - Each message has overhead (role, name, formatting)
-    - Typically 3-4 tokens per message overhead
+    For a conversation that keeps growing, hold on to a
+    ConversationTokenLedger instead so earlier messages are not
+    re-encoded on every turn.
     
     Args:
         messages: List of message dicts with 'role' and 'content'
@@ -129,48 +679,24 @@ def estimate_conversation_tokens(
         ...     {"role": "user", "content": "Hello!"}
         ... ]
         >>> estimate_conversation_tokens(messages)
-        {'system': 5, 'user': 3, 'total': 11, 'overhead': 3}
+        {'system': 4, 'user': 2, 'assistant': 0, 'overhead': 9, 'total': 15}
     """
-    encoding = tiktoken.encoding_for_model(model)
-    
-    token_counts = {
-        'system': 0,
-        'user': 0,
-        'assistant': 0,
-        'overhead': 0,
-        'total': 0
-    }
-    
-    # Each message has approximately 3-4 tokens overhead
-    # <|start|>role\n + content + <|end|\n>
-    tokens_per_message = 3
-    tokens_per_name = 1
+    return ConversationTokenLedger(model, messages).totals()
+
+
+def fits_context(token_count: int, model: str, reserve: float = 0.2) -> bool:
+    """
+    Check whether a token count fits a model's context window.
     
-    for message in messages:
-        role = message.get('role', 'user')
-        content = message.get('content', '')
-        
-        # Count content tokens
-        content_tokens = len(encoding.encode(content))
-        
-        # Add to role-specific count
-        if role in token_counts:
-            token_counts[role] += content_tokens
-        
-        # Add message overhead
-        token_counts['overhead'] += tokens_per_message
+    Args:
+        token_count: Number of input tokens
+        model: Model name (must be in CONTEXT_LIMITS)
+        reserve: Fraction of the window to leave for the response
         
-        # Add name token if present
-        if 'name' in message:
-            token_counts['overhead'] += tokens_per_name
-    
-    # Add 3 tokens for assistant reply priming
-    token_counts['overhead'] += 3
-    
-    # Calculate total
-    token_counts['total'] = sum(token_counts.values()) - token_counts['overhead'] + token_counts['overhead']
-    
-    return token_counts
+    Returns:
+        bool: True if the input leaves enough room for the response
+    """
+    return token_count < CONTEXT_LIMITS[model] * (1 - reserve)
 
 
 def demonstrate_context_limits() -> None:
@@ -181,15 +707,6 @@ def demonstrate_context_limits() -> None:
     print("CONTEXT LIMIT AWARENESS")
     print("="*70)
     
-    # Model context limits
-    limits = {
-        "gpt-3.5-turbo": 4096,
-        "gpt-3.5-turbo-16k": 16384,
-        "gpt-4": 8192,
-        "gpt-4-32k": 32768,
-        "gpt-4-turbo": 128000,
-    }
-    
     # Sample long text
     long_text = "AI " * 1000  # Repeat to make it long
     token_count = count_tokens(long_text)
@@ -197,8 +714,8 @@ def demonstrate_context_limits() -> None:
     print(f"\nSample text token count: {token_count}")
     print(f"\nModel compatibility:")
     
-    for model, limit in limits.items():
-        fits = token_count < (limit * 0.8)  # Leave 20% for response
+    for model, limit in CONTEXT_LIMITS.items():
+        fits = fits_context(token_count, model)  # Leave 20% for response
         status = "✓" if fits else "✗"
         print(f"  {status} {model}: {limit} tokens "
               f"({'fits' if fits else 'too large'})")
@@ -292,6 +809,9 @@ def main():
     print("TOKEN COUNTING DEMONSTRATION")
     print("="*70)
     
+    # Load the encodings once up front; every helper below reuses them
+    preload_encodings()
+    
     # Example 1: Basic tokenization
     visualize_tokenization("Hello, world!")
     visualize_tokenization("The quick brown fox jumps over the lazy dog.")
@@ -320,6 +840,13 @@ def main():
     print(f"  Overhead:  {counts['overhead']} tokens")
     print(f"  Total:     {counts['total']} tokens")
     
+    # Keep a ledger for a live chat: each new turn is tokenized only once
+    ledger = ConversationTokenLedger(messages=messages)
+    ledger.append({"role": "assistant", "content": "reverse() works in place; slicing returns a copy."})
+    ledger.evict(1)  # Drop the oldest user turn to save context
+    print(f"\nAfter one more turn and evicting the first question: "
+          f"{ledger.totals()['total']} tokens")
+    
     # Example 4: Context limits
     demonstrate_context_limits()
     
@@ -342,6 +869,22 @@ def main():
         "Please provide a comprehensive, detailed explanation of artificial "
         "intelligence, including its history, current applications, and future prospects."
     )
+    
+    # Example 7: Batch counting throughput
+    benchmark_batch_counting(num_texts=5_000)
+    
+    # Example 8: Streaming a corpus chunk by chunk
+    print("\n" + "="*70)
+    print("STREAMING TOKEN COUNT")
+    print("="*70)
+    
+    document = "Retrieval-augmented generation grounds answers in your data. " * 2000
+    chunks = (document[i:i + 4096].encode("utf-8") for i in range(0, len(document), 4096))
+    for totals in stream_token_counts(chunks):
+        pass
+    print(f"\nStreamed totals: {totals['tokens']:,} tokens, "
+          f"{totals['characters']:,} characters, {totals['words']:,} words")
+    print(f"Whole-text count: {count_tokens(document):,} tokens")
 
 
 if __name__ == "__main__":
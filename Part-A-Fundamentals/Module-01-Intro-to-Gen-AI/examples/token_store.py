@@ -0,0 +1,317 @@
+"""
+Token Store - Tokenize a Corpus Once, Look Up Token Counts Instantly
+
+This module tokenizes a directory of documents a single time and saves
+the token IDs to disk. Later token counts, context-limit checks and
+truncation read the saved tokens through a memory map instead of running
+the tokenizer again.
+
+Each build writes a new generation directory with three files:
+1. tokens.bin  - every document's token IDs back to back (uint32)
+2. offsets.bin - where each document starts and ends in tokens.bin (uint64)
+3. index.json  - the model used, and each document's name, size,
+                 modification time and SHA-256
+and then points the store's CURRENT file at it. Replacing CURRENT is a
+single rename, so readers see either the old store or the new one.
+Documents edited since the build are reported as stale instead of
+returning old counts.
+
+Usage:
+    python token_store.py build ./knowledge_base ./kb_tokens --pattern "**/*.md"
+    python token_store.py stats ./kb_tokens
+    python token_store.py check ./kb_tokens faq.md --model gpt-4
+
+Requirements:
+    - tiktoken>=0.6.0
+    - numpy>=1.26.0
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import Dict, List, Union
+
+import numpy as np
+
+from token_counting import CONTEXT_LIMITS, fits_context, get_encoding
+
+
+TOKENS_FILE = "tokens.bin"
+OFFSETS_FILE = "offsets.bin"
+INDEX_FILE = "index.json"
+# Names the generation directory the store currently uses
+CURRENT_FILE = "CURRENT"
+GENERATION_PREFIX = "gen-"
+
+
+def _file_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_synced(path: Path, data: bytes) -> None:
+    with open(path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def build_token_store(
+    source_dir: Union[str, os.PathLike],
+    store_dir: Union[str, os.PathLike],
+    model: str = "gpt-3.5-turbo",
+    pattern: str = "**/*.txt"
+) -> int:
+    """
+    Tokenize every matching document and write a token store.
+    
+    The files go into a new generation directory, and CURRENT is
+    replaced to point at it only once they are on disk, so a reader (or
+    a crash) never sees a half-written or mixed store. Generations older
+    than the previous one are deleted.
+    
+    Args:
+        source_dir: Directory containing the documents
+        store_dir: Directory to write the store to (created if needed)
+        model: Model whose tokenizer to use
+        pattern: Glob pattern, relative to source_dir, selecting documents
+    
+    Returns:
+        int: Number of documents stored
+    
+    Example:
+        >>> build_token_store("docs", "docs_tokens", pattern="*.md")
+        42
+    """
+    source_dir = Path(source_dir)
+    store_dir = Path(store_dir)
+    store_dir.mkdir(parents=True, exist_ok=True)
+    
+    encoding = get_encoding(model)
+    paths = sorted(p for p in source_dir.glob(pattern) if p.is_file())
+    
+    generation = f"{GENERATION_PREFIX}{uuid.uuid4().hex}"
+    generation_dir = store_dir / generation
+    generation_dir.mkdir()
+    
+    offsets = np.zeros(len(paths) + 1, dtype=np.uint64)
+    documents = []
+    
+    with open(generation_dir / TOKENS_FILE, "wb") as f:
+        for i, path in enumerate(paths):
+            # Stat and hash the bytes that are tokenized, so an edit made
+            # during the build shows up as stale rather than being missed
+            data = path.read_bytes()
+            stat = path.stat()
+            text = data.decode("utf-8", errors="replace")
+            tokens = np.asarray(encoding.encode_ordinary(text), dtype=np.uint32)
+            tokens.tofile(f)
+            offsets[i + 1] = offsets[i] + len(tokens)
+            documents.append({
+                'name': path.relative_to(source_dir).as_posix(),
+                'size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns,
+                'sha256': hashlib.sha256(data).hexdigest(),
+            })
+        f.flush()
+        os.fsync(f.fileno())
+    
+    _write_synced(generation_dir / OFFSETS_FILE, offsets.tobytes())
+    _write_synced(generation_dir / INDEX_FILE, json.dumps({
+        'model': model,
+        'encoding': encoding.name,
+        'source_dir': str(source_dir.resolve()),
+        'documents': documents
+    }, indent=2).encode("utf-8"))
+    
+    # Switch readers to the new generation in one rename
+    current = store_dir / CURRENT_FILE
+    previous = current.read_text().strip() if current.exists() else None
+    tmp_current = store_dir / (CURRENT_FILE + ".tmp")
+    _write_synced(tmp_current, generation.encode("utf-8"))
+    os.replace(tmp_current, current)
+    
+    # Keep the previous generation for readers that opened it just before
+    # the switch; older ones (and those of crashed builds) go
+    for old in store_dir.glob(f"{GENERATION_PREFIX}*"):
+        if old.name not in (generation, previous):
+            shutil.rmtree(old, ignore_errors=True)
+    
+    return len(paths)
+
+
+class TokenStore:
+    """
+    Read-only view of a token store built by build_token_store().
+    
+    Token arrays are memory-mapped, so opening a store is cheap and
+    tokens() returns a view into the file rather than a copy. Token
+    counts are a subtraction of two offsets.
+    
+    Each lookup checks the source document's size and modification time
+    against the build, and re-hashes it if they differ; a document whose
+    contents changed (or that was removed) raises ValueError. Pass
+    check_sources=False to use a store without its source directory.
+    
+    Example:
+        >>> store = TokenStore("kb_tokens")
+        >>> store.count("faq.md")
+        1834
+        >>> store.fits_context("faq.md", "gpt-3.5-turbo")
+        True
+    """
+    
+    def __init__(self, store_dir: Union[str, os.PathLike], check_sources: bool = True):
+        store_dir = Path(store_dir)
+        generation_dir = store_dir / (store_dir / CURRENT_FILE).read_text().strip()
+        index = json.loads((generation_dir / INDEX_FILE).read_text())
+        
+        self.model = index['model']
+        self.encoding = get_encoding(index['encoding'])
+        self.source_dir = Path(index['source_dir'])
+        self.check_sources = check_sources
+        self._sources: List[dict] = index['documents']
+        self.documents: List[str] = [doc['name'] for doc in self._sources]
+        self._positions: Dict[str, int] = {
+            name: i for i, name in enumerate(self.documents)
+        }
+        
+        self.offsets = np.fromfile(generation_dir / OFFSETS_FILE, dtype=np.uint64)
+        if self.offsets[-1] > 0:
+            self.token_ids = np.memmap(generation_dir / TOKENS_FILE, dtype=np.uint32, mode="r")
+        else:
+            # np.memmap cannot map an empty file
+            self.token_ids = np.zeros(0, dtype=np.uint32)
+    
+    def __len__(self) -> int:
+        return len(self.documents)
+    
+    def __contains__(self, name: str) -> bool:
+        return name in self._positions
+    
+    def is_stale(self, name: str) -> bool:
+        """Whether a document has changed or been removed since the build."""
+        if name not in self._positions:
+            raise KeyError(f"Document not in token store: {name}")
+        source = self._sources[self._positions[name]]
+        path = self.source_dir / name
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return True
+        if (stat.st_size, stat.st_mtime_ns) == (source['size'], source['mtime_ns']):
+            return False
+        if stat.st_size != source['size'] or _file_hash(path) != source['sha256']:
+            return True
+        # Touched but unchanged: skip the hash next time
+        source['mtime_ns'] = stat.st_mtime_ns
+        return False
+    
+    def _span(self, name: str) -> tuple:
+        if name not in self._positions:
+            raise KeyError(f"Document not in token store: {name}")
+        if self.check_sources and self.is_stale(name):
+            raise ValueError(f"Document changed since the token store was built: {name}")
+        i = self._positions[name]
+        return int(self.offsets[i]), int(self.offsets[i + 1])
+    
+    def count(self, name: str) -> int:
+        """Number of tokens in a document."""
+        start, end = self._span(name)
+        return end - start
+    
+    def tokens(self, name: str) -> np.ndarray:
+        """Token IDs of a document (a read-only view, not a copy)."""
+        start, end = self._span(name)
+        return self.token_ids[start:end]
+    
+    def fits_context(self, name: str, model: str, reserve: float = 0.2) -> bool:
+        """
+        Check whether a document fits a model's context window.
+        
+        Args:
+            name: Document name
+            model: Model whose context limit to check against
+            reserve: Fraction of the window to leave for the response
+        """
+        return fits_context(self.count(name), model, reserve)
+    
+    def truncate(self, name: str, max_tokens: int) -> str:
+        """
+        Return the document text cut to at most max_tokens tokens.
+        
+        Only the kept tokens are decoded; the rest of the document is
+        never read from disk.
+        """
+        return self.encoding.decode(self.tokens(name)[:max_tokens].tolist())
+    
+    def total_tokens(self) -> int:
+        """Total number of tokens across all documents."""
+        return int(self.offsets[-1])
+
+
+def main():
+    """
+    Command-line interface for building and inspecting token stores.
+    """
+    parser = argparse.ArgumentParser(description="Tokenize a corpus once and reuse the tokens.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    build = commands.add_parser("build", help="Tokenize a directory into a store")
+    build.add_argument("source_dir")
+    build.add_argument("store_dir")
+    build.add_argument("--model", default="gpt-3.5-turbo")
+    build.add_argument("--pattern", default="**/*.txt")
+    
+    stats = commands.add_parser("stats", help="Show per-document token counts")
+    stats.add_argument("store_dir")
+    
+    check = commands.add_parser("check", help="Check a document against context limits")
+    check.add_argument("store_dir")
+    check.add_argument("document")
+    check.add_argument("--model", default=None, choices=list(CONTEXT_LIMITS),
+                       help="Check one model (default: all)")
+    
+    args = parser.parse_args()
+    
+    if args.command == "build":
+        count = build_token_store(args.source_dir, args.store_dir, args.model, args.pattern)
+        store = TokenStore(args.store_dir)
+        print(f"✓ Stored {count} documents ({store.total_tokens():,} tokens) "
+              f"in {args.store_dir}")
+    
+    elif args.command == "stats":
+        store = TokenStore(args.store_dir)
+        print(f"\n{'='*70}")
+        print(f"TOKEN STORE: {args.store_dir} ({store.model})")
+        print(f"{'='*70}")
+        for name in store.documents:
+            if store.is_stale(name):
+                print(f"  {'stale':>10}  {name}")
+            else:
+                print(f"  {store.count(name):>10,}  {name}")
+        print("-" * 70)
+        print(f"  {store.total_tokens():>10,}  total ({len(store)} documents)")
+    
+    elif args.command == "check":
+        store = TokenStore(args.store_dir)
+        models = [args.model] if args.model else list(CONTEXT_LIMITS)
+        if store.is_stale(args.document):
+            parser.exit(1, f"✗ {args.document} changed since the store was built; rebuild it\n")
+        print(f"\n{args.document}: {store.count(args.document):,} tokens")
+        for model in models:
+            fits = store.fits_context(args.document, model)
+            status = "✓" if fits else "✗"
+            print(f"  {status} {model}: {CONTEXT_LIMITS[model]} tokens "
+                  f"({'fits' if fits else 'too large'})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,455 @@
+"""
+Usage Report - Real Costs from Request Logs
+
+This module turns JSONL request logs into cost reports. Each log line is
+the dict returned by call_openai()/call_anthropic() in basic_llm_call.py,
+optionally with a timestamp:
+
+    {"model": "gpt-3.5-turbo-0125", "input_tokens": 12, "output_tokens": 45,
+     "total_tokens": 57, "timestamp": "2024-05-01T12:00:00Z"}
+
+Logs are read line by line (plain, .gz, .bz2 or .xz), so memory stays
+constant however large they are. Per-request distributions are kept in
+fixed-size logarithmic histograms, which is what makes percentiles
+possible without storing every value. Several files are processed in
+parallel, one worker process per file.
+
+Usage:
+    python usage_report.py logs/2024-05-*.jsonl.gz
+    python usage_report.py logs/*.jsonl.gz --group-by model,day --workers 8
+    python usage_report.py logs/*.jsonl.gz --json report.json
+
+Requirements:
+    - numpy>=1.26.0
+"""
+
+import argparse
+import bz2
+import gzip
+import json
+import lzma
+import math
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from pricing_calculator import current_price_table, on_price_refresh, record_costs
+
+
+GROUP_FIELDS = ("model", "provider", "day")
+
+# Lines are priced in batches so the cost math runs vectorized
+BATCH_SIZE = 10_000
+
+# What may follow a PRICING_DATA name in a reported model name:
+# nothing, or a snapshot date ("-0613", "-20240307", "-2024-04-09")
+DATE_SUFFIX = re.compile(r"(?:-(?:\d{4}|\d{8}|\d{4}-\d{2}-\d{2}))?")
+
+
+class LogHistogram:
+    """
+    Fixed-memory histogram with logarithmic buckets (HDR-style).
+    
+    Each power of two is split into `precision` buckets, so percentiles
+    are accurate to within about 1/precision of the true value (roughly
+    1% with the default) while memory depends only on the range of
+    values, not on how many were recorded. Histograms from different
+    workers can be merged.
+    
+    Example:
+        >>> hist = LogHistogram()
+        >>> hist.record_many(np.array([10, 20, 30, 40]))
+        >>> round(hist.percentile(50))
+        20
+    """
+    
+    def __init__(self, precision: int = 64):
+        self.precision = precision
+        self.counts: Dict[int, int] = {}
+        self.zeros = 0
+        self.total = 0
+    
+    def record(self, value: float) -> None:
+        """Add one value."""
+        self.total += 1
+        if value <= 0:
+            self.zeros += 1
+            return
+        bucket = math.floor(math.log2(value) * self.precision)
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+    
+    def record_many(self, values: np.ndarray) -> None:
+        """Add an array of values."""
+        values = np.asarray(values, dtype=np.float64)
+        positive = values[values > 0]
+        self.total += len(values)
+        self.zeros += len(values) - len(positive)
+        if len(positive) == 0:
+            return
+        buckets = np.floor(np.log2(positive) * self.precision).astype(np.int64)
+        for bucket, count in zip(*np.unique(buckets, return_counts=True)):
+            bucket = int(bucket)
+            self.counts[bucket] = self.counts.get(bucket, 0) + int(count)
+    
+    def merge(self, other: "LogHistogram") -> None:
+        """Add all values recorded in another histogram."""
+        self.total += other.total
+        self.zeros += other.zeros
+        for bucket, count in other.counts.items():
+            self.counts[bucket] = self.counts.get(bucket, 0) + count
+    
+    def percentile(self, q: float) -> float:
+        """
+        Approximate value at percentile q (0-100).
+        
+        Returns:
+            float: Midpoint of the bucket holding the percentile (0.0 if empty)
+        """
+        if self.total == 0:
+            return 0.0
+        rank = max(1, math.ceil(q / 100 * self.total))
+        if rank <= self.zeros:
+            return 0.0
+        seen = self.zeros
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                return 2 ** ((bucket + 0.5) / self.precision)
+        return 2 ** ((max(self.counts) + 0.5) / self.precision)
+
+
+@dataclass
+class GroupStats:
+    """
+    Running totals and distributions for one report group.
+    
+    Attributes:
+        requests: Number of requests
+        input_tokens: Total input tokens
+        output_tokens: Total output tokens
+        cost: Total cost (USD)
+        cost_hist: Distribution of cost per request
+        tokens_hist: Distribution of total tokens per request
+    """
+    requests: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cost: float = 0.0
+    cost_hist: LogHistogram = field(default_factory=LogHistogram)
+    tokens_hist: LogHistogram = field(default_factory=LogHistogram)
+    
+    def merge(self, other: "GroupStats") -> None:
+        """Add another group's totals into this one."""
+        self.requests += other.requests
+        self.input_tokens += other.input_tokens
+        self.output_tokens += other.output_tokens
+        self.cost += other.cost
+        self.cost_hist.merge(other.cost_hist)
+        self.tokens_hist.merge(other.tokens_hist)
+
+
+def resolve_model(model: str) -> Optional[str]:
+    """
+    Map a model name reported by an API to its PRICING_DATA entry.
+    
+    APIs report dated snapshots ("gpt-4-0613", "claude-3-haiku-20240307",
+    "gpt-4-turbo-2024-04-09"), so a PRICING_DATA name matches when it is
+    the whole reported name or is followed only by such a date suffix;
+    the longest match wins. Other variants ("gpt-4o", "gpt-4-1106-preview")
+    are priced differently and are not matched.
+    
+    Returns:
+        str: PRICING_DATA model name, or None if the model is not priced
+    
+    Example:
+        >>> resolve_model("gpt-4-32k-0613")
+        'gpt-4-32k'
+        >>> resolve_model("gpt-4o") is None
+        True
+    """
+    if not isinstance(model, str):
+        return None
+    # Rebuilds the price table, clearing the cache, after PRICING_DATA edits
+    current_price_table()
+    return _resolve_model(model)
+
+
+@lru_cache(maxsize=1024)
+def _resolve_model(model: str) -> Optional[str]:
+    matches = [
+        name for name in current_price_table().index
+        if model.startswith(name) and DATE_SUFFIX.fullmatch(model, len(name))
+    ]
+    return max(matches, key=len) if matches else None
+
+
+on_price_refresh(_resolve_model.cache_clear)
+
+
+# Epoch timestamps at least this large are taken to be in milliseconds,
+# microseconds or nanoseconds (1e11 seconds is past the year 5000)
+EPOCH_SCALES = ((1e17, 1e9), (1e14, 1e6), (1e11, 1e3))
+
+
+def _day(timestamp) -> str:
+    if timestamp is None:
+        return "unknown"
+    if isinstance(timestamp, (int, float)):
+        for limit, scale in EPOCH_SCALES:
+            if abs(timestamp) >= limit:
+                timestamp /= scale
+                break
+        try:
+            return datetime.fromtimestamp(timestamp, timezone.utc).date().isoformat()
+        except (ValueError, OverflowError, OSError):
+            return "unknown"
+    return str(timestamp)[:10]
+
+
+def open_log(path: str):
+    """Open a log file for text reading, decompressing by file extension."""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    if path.endswith(".bz2"):
+        return bz2.open(path, "rt", encoding="utf-8")
+    if path.endswith((".xz", ".lzma")):
+        return lzma.open(path, "rt", encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def _batches(lines: Iterable[str], size: int) -> Iterator[List[str]]:
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def aggregate_lines(
+    lines: Iterable[str],
+    group_by: Tuple[str, ...] = GROUP_FIELDS,
+    time_field: str = "timestamp"
+) -> Tuple[Dict[tuple, GroupStats], int]:
+    """
+    Aggregate JSONL usage records into per-group statistics.
+    
+    Lines that are not valid JSON or have no model name (e.g. the
+    {'error': ...} dicts returned on failed calls) are skipped. Models
+    missing from PRICING_DATA are reported with provider "unknown" and
+    zero cost.
+    
+    Args:
+        lines: JSONL lines
+        group_by: Fields to group by, from GROUP_FIELDS
+        time_field: Record field holding an ISO date or epoch time (s, ms, µs or ns)
+    
+    Returns:
+        tuple: (group key -> GroupStats, number of skipped lines)
+    """
+    groups: Dict[tuple, GroupStats] = {}
+    skipped = 0
+    
+    for batch in _batches(lines, BATCH_SIZE):
+        table = current_price_table()
+        keys, columns, inputs, outputs = [], [], [], []
+        
+        for line in batch:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                model = record['model']
+                input_tokens = int(record.get('input_tokens', 0))
+                output_tokens = int(record.get('output_tokens', 0))
+            except (ValueError, KeyError, TypeError):
+                skipped += 1
+                continue
+            if not isinstance(model, str):
+                skipped += 1
+                continue
+            
+            priced = resolve_model(model)
+            fields = {
+                'model': priced or model,
+                'provider': table.providers[table.index[priced]] if priced else "unknown",
+                'day': _day(record.get(time_field))
+            }
+            keys.append(tuple(fields[name] for name in group_by))
+            columns.append(table.index[priced] if priced else -1)
+            inputs.append(input_tokens)
+            outputs.append(output_tokens)
+        
+        if not keys:
+            continue
+        
+        columns = np.array(columns, dtype=np.intp)
+        inputs = np.array(inputs, dtype=np.int64)
+        outputs = np.array(outputs, dtype=np.int64)
+        costs = record_costs(inputs, outputs, np.maximum(columns, 0), table)['total_cost']
+        costs[columns < 0] = 0.0
+        
+        # Group the batch by key, then update each group with array slices
+        key_ids: Dict[tuple, int] = {}
+        ids = np.array([key_ids.setdefault(key, len(key_ids)) for key in keys])
+        order = np.argsort(ids, kind="stable")
+        bounds = np.searchsorted(ids[order], np.arange(len(key_ids) + 1))
+        
+        for key, i in key_ids.items():
+            rows = order[bounds[i]:bounds[i + 1]]
+            stats = groups.setdefault(key, GroupStats())
+            stats.requests += len(rows)
+            stats.input_tokens += int(inputs[rows].sum())
+            stats.output_tokens += int(outputs[rows].sum())
+            stats.cost += float(costs[rows].sum())
+            stats.cost_hist.record_many(costs[rows])
+            stats.tokens_hist.record_many(inputs[rows] + outputs[rows])
+    
+    return groups, skipped
+
+
+def aggregate_file(
+    path: str,
+    group_by: Tuple[str, ...] = GROUP_FIELDS,
+    time_field: str = "timestamp"
+) -> Tuple[Dict[tuple, GroupStats], int]:
+    """Aggregate one (possibly compressed) JSONL log file."""
+    with open_log(path) as f:
+        return aggregate_lines(f, group_by, time_field)
+
+
+def aggregate_files(
+    paths: List[str],
+    group_by: Tuple[str, ...] = GROUP_FIELDS,
+    time_field: str = "timestamp",
+    workers: int = None
+) -> Tuple[Dict[tuple, GroupStats], int]:
+    """
+    Aggregate many log files in parallel and merge the results.
+    
+    Args:
+        paths: Log files (one shard per worker task)
+        group_by: Fields to group by, from GROUP_FIELDS
+        time_field: Record field holding an ISO date or epoch time (s, ms, µs or ns)
+        workers: Worker processes (None = one per CPU, 1 = no subprocesses)
+    
+    Returns:
+        tuple: (group key -> GroupStats, number of skipped lines)
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(paths)))
+    
+    if workers == 1:
+        shard_results = (aggregate_file(path, group_by, time_field) for path in paths)
+        return _merge(shard_results)
+    
+    with ProcessPoolExecutor(workers) as executor:
+        shard_results = executor.map(
+            aggregate_file, paths, [group_by] * len(paths), [time_field] * len(paths)
+        )
+        return _merge(shard_results)
+
+
+def _merge(shard_results) -> Tuple[Dict[tuple, GroupStats], int]:
+    groups: Dict[tuple, GroupStats] = {}
+    skipped = 0
+    for shard_groups, shard_skipped in shard_results:
+        skipped += shard_skipped
+        for key, stats in shard_groups.items():
+            if key in groups:
+                groups[key].merge(stats)
+            else:
+                groups[key] = stats
+    return groups, skipped
+
+
+def report_rows(groups: Dict[tuple, GroupStats], group_by: Tuple[str, ...]) -> List[dict]:
+    """
+    Flatten aggregated groups into report rows, most expensive first.
+    """
+    rows = []
+    for key, stats in sorted(groups.items(), key=lambda item: -item[1].cost):
+        row = dict(zip(group_by, key))
+        row.update({
+            'requests': stats.requests,
+            'input_tokens': stats.input_tokens,
+            'output_tokens': stats.output_tokens,
+            'cost': stats.cost,
+            'cost_p50': stats.cost_hist.percentile(50),
+            'cost_p90': stats.cost_hist.percentile(90),
+            'cost_p99': stats.cost_hist.percentile(99),
+            'tokens_p50': stats.tokens_hist.percentile(50),
+            'tokens_p99': stats.tokens_hist.percentile(99),
+        })
+        rows.append(row)
+    return rows
+
+
+def print_report(rows: List[dict], group_by: Tuple[str, ...], skipped: int) -> None:
+    """
+    Print report rows as a table.
+    """
+    print(f"\n{'='*100}")
+    print("USAGE COST REPORT")
+    print(f"{'='*100}")
+    
+    label = " / ".join(group_by)
+    print(f"{label:<40} {'Requests':>10} {'Tokens':>14} {'Cost':>12} "
+          f"{'p50 $/req':>10} {'p99 $/req':>10}")
+    print("-" * 100)
+    
+    for row in rows:
+        name = " / ".join(str(row[f]) for f in group_by)
+        tokens = row['input_tokens'] + row['output_tokens']
+        print(f"{name:<40} {row['requests']:>10,} {tokens:>14,} ${row['cost']:>11.4f} "
+              f"{row['cost_p50']:>10.6f} {row['cost_p99']:>10.6f}")
+    
+    print("-" * 100)
+    total_cost = sum(row['cost'] for row in rows)
+    total_requests = sum(row['requests'] for row in rows)
+    print(f"{'TOTAL':<40} {total_requests:>10,} {'':>14} ${total_cost:>11.4f}")
+    if skipped:
+        print(f"\n⚠️  Skipped {skipped:,} lines (invalid JSON or no model)")
+
+
+def main():
+    """
+    Command-line entry point.
+    """
+    parser = argparse.ArgumentParser(description="Aggregate LLM request logs into a cost report.")
+    parser.add_argument("paths", nargs="+", help="JSONL log files (.gz/.bz2/.xz supported)")
+    parser.add_argument("--group-by", default="model,provider,day",
+                        help=f"Comma-separated fields from {', '.join(GROUP_FIELDS)}")
+    parser.add_argument("--time-field", default="timestamp",
+                        help="Record field holding an ISO date or epoch time (s, ms, µs or ns)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes (default: one per CPU)")
+    parser.add_argument("--json", dest="json_path", help="Also write the rows to this JSON file")
+    args = parser.parse_args()
+    
+    group_by = tuple(name.strip() for name in args.group_by.split(",") if name.strip())
+    for name in group_by:
+        if name not in GROUP_FIELDS:
+            parser.error(f"Unknown group field: {name}")
+    
+    groups, skipped = aggregate_files(args.paths, group_by, args.time_field, args.workers)
+    rows = report_rows(groups, group_by)
+    print_report(rows, group_by, skipped)
+    
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(rows, f, indent=2)
+        print(f"\n✓ Wrote {len(rows)} rows to {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Few-Shot Prompt Builder - Similar Examples Within a Token Budget
+
+Taking the first N examples from a bank works for five hand-picked
+examples, not for thousands. ExampleBank picks the examples most similar
+to each input instead:
+1. Every example is formatted and token-counted once, when the bank is built
+2. Examples are embedded once and kept in a FAISS index (a NumPy matrix
+   when faiss is not installed)
+3. Per request, the input is embedded, the nearest examples are looked up,
+   and they are added in order of similarity until k are chosen or the
+   token budget is used up
+4. The prompt is assembled with one join, in time linear in its length
+
+Usage:
+    from few_shot_builder import ExampleBank
+    
+    bank = ExampleBank(examples)   # [{"input": ..., "output": ...}, ...]
+    prompt, tokens = bank.build_prompt(
+        "Classify the sentiment.", "Pretty good, would buy again",
+        k=5, token_budget=500
+    )
+
+Requirements:
+    - numpy>=1.26.0
+    - sentence-transformers>=2.5.0 (default embedder)
+    - faiss-cpu>=1.7.4 (optional; NumPy search is used without it)
+"""
+
+import sys
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import faiss
+except ImportError:  # NumPy search instead
+    faiss = None
+
+# Shared helpers live with the Module 1 examples
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "Module-01-Intro-to-Gen-AI" / "examples"))
+from token_counting import count_tokens, count_tokens_batch
+
+from few_shot_format import EXAMPLE_FORMAT, QUERY_FORMAT
+
+# sentence-transformers model used when no embedder is given
+DEFAULT_EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+
+# Nearest neighbours fetched per requested example, so that examples
+# skipped for being too long can be replaced by the next most similar
+SEARCH_FACTOR = 4
+
+
+def sentence_transformer_embedder(model_name: str = DEFAULT_EMBEDDING_MODEL) -> Callable[[List[str]], np.ndarray]:
+    """
+    Embedder backed by sentence-transformers, loaded on first use.
+    
+    Args:
+        model_name: sentence-transformers model name
+    
+    Returns:
+        callable: texts -> float32 array of shape (len(texts), dim)
+    """
+    model = None
+    
+    def embed(texts: List[str]) -> np.ndarray:
+        nonlocal model
+        if model is None:
+            from sentence_transformers import SentenceTransformer
+            model = SentenceTransformer(model_name)
+        return model.encode(texts, batch_size=64, convert_to_numpy=True)
+    
+    return embed
+
+
+class ExampleBank:
+    """
+    A bank of few-shot examples with cached token counts and an
+    embedding index for similarity search.
+    
+    Attributes:
+        examples: The example dicts, in bank order
+        blocks: Each example formatted with EXAMPLE_FORMAT
+        block_tokens: Token count of each block (np.ndarray)
+    """
+    
+    def __init__(
+        self,
+        examples: Sequence[Dict[str, str]],
+        model: str = "gpt-3.5-turbo",
+        embedder: Optional[Callable[[List[str]], np.ndarray]] = None
+    ):
+        """
+        Args:
+            examples: Dicts with 'input' and 'output'
+            model: Model whose tokenizer is used for the budget
+            embedder: texts -> array of shape (len(texts), dim)
+                (default: sentence_transformer_embedder())
+        """
+        if not examples:
+            raise ValueError("ExampleBank needs at least one example")
+        self.examples = list(examples)
+        self.model = model
+        self.embed = embedder or sentence_transformer_embedder()
+        
+        self.blocks = [EXAMPLE_FORMAT.format(**ex) for ex in self.examples]
+        # Each block ends with a newline and the next starts with a letter,
+        # so tokens never span two blocks and the counts add up exactly
+        self.block_tokens = count_tokens_batch(self.blocks, model).astype(np.int64)
+        
+        vectors = self._normalize(self.embed([ex['input'] for ex in self.examples]))
+        if faiss is not None:
+            self._index = faiss.IndexFlatIP(vectors.shape[1])
+            self._index.add(vectors)
+        else:
+            self._index = vectors
+    
+    def __len__(self) -> int:
+        return len(self.examples)
+    
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        # Unit vectors, so inner product is cosine similarity
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+    
+    def _nearest(self, query: str, count: int) -> np.ndarray:
+        # Indices of the `count` most similar examples, most similar first
+        vector = self._normalize(self.embed([query]))
+        count = min(count, len(self))
+        if faiss is not None:
+            return self._index.search(vector, count)[1][0]
+        scores = self._index @ vector[0]
+        if count < len(scores):
+            top = np.argpartition(-scores, count - 1)[:count]
+        else:
+            top = np.arange(len(scores))
+        return top[np.argsort(-scores[top], kind='stable')]
+    
+    def select(self, test_input: str, k: int = 5, token_budget: Optional[int] = None) -> List[int]:
+        """
+        Pick up to k examples most similar to the input that fit the budget.
+        
+        Examples are taken in order of similarity; one that would overrun
+        the budget is skipped in favour of the next. Selection stops after
+        k examples or once the budget is spent.
+        
+        Args:
+            test_input: The new input
+            k: Maximum number of examples
+            token_budget: Maximum tokens for the example blocks (None = no limit)
+        
+        Returns:
+            list: Bank indices of the chosen examples, most similar first
+        """
+        if k <= 0:
+            return []
+        chosen: List[int] = []
+        remaining = token_budget if token_budget is not None else float('inf')
+        for index in self._nearest(test_input, k * SEARCH_FACTOR):
+            cost = self.block_tokens[index]
+            if cost > remaining:
+                continue
+            chosen.append(int(index))
+            remaining -= cost
+            if len(chosen) == k or remaining <= 0:
+                break
+        return chosen
+    
+    def build_prompt(
+        self,
+        task: str,
+        test_input: str,
+        k: int = 5,
+        token_budget: Optional[int] = None
+    ) -> Tuple[str, int]:
+        """
+        Build a few-shot prompt from the most similar examples.
+        
+        Args:
+            task: Description of the task
+            test_input: New input to answer
+            k: Maximum number of examples
+            token_budget: Maximum tokens for the whole prompt; what the task
+                and input leave over goes to examples (None = no limit)
+        
+        Returns:
+            tuple: (prompt, prompt token count)
+        """
+        head = f"{task}\n\n"
+        tail = QUERY_FORMAT.format(input=test_input)
+        fixed = count_tokens(head, self.model) + count_tokens(tail, self.model)
+        budget = None if token_budget is None else token_budget - fixed
+        
+        chosen = self.select(test_input, k, budget)
+        prompt = "".join([head, *(self.blocks[i] for i in chosen), tail])
+        return prompt, fixed + int(self.block_tokens[chosen].sum())
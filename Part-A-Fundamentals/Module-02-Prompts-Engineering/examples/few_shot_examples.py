@@ -12,12 +12,19 @@ Few-shot learning is particularly effective for:
 """
 
 import os
+import sys
+from pathlib import Path
 from dotenv import load_dotenv
-from openai import OpenAI
 from typing import List, Dict
 
-load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Shared helpers live with the Module 1 examples
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "Module-01-Intro-to-Gen-AI" / "examples"))
+from llm_clients import default_chat_client
+
+from few_shot_format import build_few_shot_prompt
+
+# Rate-limited, single-flight and cached; built on the first request
+client = default_chat_client()
 
 
 def zero_shot_vs_few_shot(task: str, examples: List[Dict[str, str]], test_input: str) -> None:
@@ -49,10 +56,7 @@ def zero_shot_vs_few_shot(task: str, examples: List[Dict[str, str]], test_input:
     print(f"\n💬 Output: {response1.choices[0].message.content}")
     
     # Few-shot (with examples)
-    few_shot_prompt = f"{task}\n\n"
-    for ex in examples:
-        few_shot_prompt += f"Input: {ex['input']}\nOutput: {ex['output']}\n\n"
-    few_shot_prompt += f"Input: {test_input}\nOutput:"
+    few_shot_prompt = build_few_shot_prompt(task, examples, test_input)
     
     print(f"\n\n📚 FEW-SHOT (With {len(examples)} Examples):")
     print(f"{'-'*80}")
@@ -248,12 +252,7 @@ def optimal_example_count() -> None:
         print(f"{'='*40}")
         
         task = "Classify sentiment as positive, negative, or neutral."
-        few_shot_prompt = f"{task}\n\n"
-        
-        for ex in all_examples[:num_examples]:
-            few_shot_prompt += f"Input: {ex['input']}\nOutput: {ex['output']}\n\n"
-        
-        few_shot_prompt += f"Input: {test_input}\nOutput:"
+        few_shot_prompt = build_few_shot_prompt(task, all_examples[:num_examples], test_input)
         
         response = client.chat.completions.create(
             model="gpt-3.5-turbo",
@@ -266,6 +265,48 @@ def optimal_example_count() -> None:
         print(f"Tokens used: {response.usage.total_tokens}")
 
 
+def similar_examples_demo() -> None:
+    """
+    Pick the examples closest to each input from a larger bank, within a
+    token budget, instead of always using the first few.
+    """
+    print(f"\n{'='*80}")
+    print("SIMILAR EXAMPLE SELECTION")
+    print(f"{'='*80}")
+    
+    # Loads numpy, tiktoken and the embedding model, so imported on use
+    from few_shot_builder import ExampleBank
+    
+    bank = ExampleBank([
+        {"input": "The battery lasts all day, fantastic phone.", "output": "positive"},
+        {"input": "Screen cracked within a week of normal use.", "output": "negative"},
+        {"input": "Delivery was on time, packaging was fine.", "output": "neutral"},
+        {"input": "Customer service solved my issue in minutes!", "output": "positive"},
+        {"input": "Support never answered my emails.", "output": "negative"},
+        {"input": "The hotel room was spotless and quiet.", "output": "positive"},
+        {"input": "Our flight was delayed six hours with no explanation.", "output": "negative"},
+        {"input": "The restaurant was average, prices were fair.", "output": "neutral"},
+        {"input": "This book kept me up all night, couldn't put it down.", "output": "positive"},
+        {"input": "The sequel was a boring rehash of the first movie.", "output": "negative"},
+    ])
+    task = "Classify the sentiment as positive, negative, or neutral."
+    
+    for test_input in ["The phone charger stopped working after two days.",
+                       "The waiter was friendly and the food arrived quickly."]:
+        prompt, tokens = bank.build_prompt(task, test_input, k=3, token_budget=120)
+        print(f"\n📚 {tokens} tokens:")
+        print(f"{'-'*80}")
+        print(prompt)
+        
+        response = client.chat.completions.create(
+            model="gpt-3.5-turbo",
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=10,
+            temperature=0.3
+        )
+        print(f"\n💬 Output: {response.choices[0].message.content}")
+
+
 def few_shot_best_practices() -> None:
     """
     Print best practices for few-shot learning.
@@ -336,11 +377,15 @@ def main():
     # Analysis: Optimal count
     optimal_example_count()
     
+    # Selection: Most similar examples within a token budget
+    similar_examples_demo()
+    
     # Best practices
     few_shot_best_practices()
 
 
 if __name__ == "__main__":
+    load_dotenv()
     if not os.getenv("OPENAI_API_KEY"):
         print("⚠️  Error: OPENAI_API_KEY not found in environment")
         print("Please set up your .env file. See resources/setup-guide.md")
@@ -0,0 +1,41 @@
+"""
+Few-Shot Prompt Format - Assemble Prompts from Example Pairs
+
+The prompt layout shared by the few-shot demos and ExampleBank. This
+module has no dependencies, so plain demos can build prompts without
+loading NumPy, tiktoken or an embedding model (see few_shot_builder.py).
+
+Usage:
+    from few_shot_format import build_few_shot_prompt
+
+    prompt = build_few_shot_prompt(
+        "Classify the sentiment.",
+        [{"input": "Great product!", "output": "positive"}],
+        "Pretty good, would buy again"
+    )
+"""
+
+from typing import Dict, Sequence
+
+
+# Format of one example block and of the final input
+EXAMPLE_FORMAT = "Input: {input}\nOutput: {output}\n\n"
+QUERY_FORMAT = "Input: {input}\nOutput:"
+
+
+def build_few_shot_prompt(task: str, examples: Sequence[Dict[str, str]], test_input: str) -> str:
+    """
+    Build a few-shot prompt with a single join.
+    
+    Args:
+        task: Description of the task
+        examples: Input-output example pairs, in prompt order
+        test_input: New input to answer
+    
+    Returns:
+        str: Task, example blocks, and the final "Input: ...\\nOutput:" line
+    """
+    parts = [f"{task}\n\n"]
+    parts.extend(EXAMPLE_FORMAT.format(**ex) for ex in examples)
+    parts.append(QUERY_FORMAT.format(input=test_input))
+    return "".join(parts)
@@ -12,11 +12,16 @@ Key Concepts:
 """
 
 import os
+import sys
+from pathlib import Path
 from dotenv import load_dotenv
-from openai import OpenAI
 
-load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Shared helpers live with the Module 1 examples
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "Module-01-Intro-to-Gen-AI" / "examples"))
+from llm_clients import default_chat_client
+
+# Rate-limited, single-flight and cached; built on the first request
+client = default_chat_client()
 
 
 def demonstrate_positive_prompting() -> None:
@@ -129,6 +134,8 @@ def demonstrate_balanced_approach() -> None:
     print("BALANCED APPROACH - Combining Both")
     print(f"{'='*80}")
     
+    from prompt_experiments import ExperimentGrid, cell_outputs, chat_call, run_experiment
+    
     scenarios = [
         {
             "name": "Product Review Analysis",
@@ -166,7 +173,14 @@ def demonstrate_balanced_approach() -> None:
         }
     ]
     
-    for scenario in scenarios:
+    # Every scenario's balanced prompt is sent at once
+    results = run_experiment(ExperimentGrid(
+        variants={scenario['name']: scenario['good'] for scenario in scenarios},
+        temperatures=[0.7],
+        max_tokens=200
+    ), call=chat_call(client.chat.completions.create))
+    
+    for scenario, output in zip(scenarios, cell_outputs(results)):
         print(f"\n{'─'*80}")
         print(f"Scenario: {scenario['name']}")
         print(f"{'─'*80}")
@@ -177,14 +191,7 @@ def demonstrate_balanced_approach() -> None:
         print(f"\n✅ Better Prompt (Balanced):")
         print(scenario['good'])
         
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": scenario['good']}],
-            max_tokens=200,
-            temperature=0.7
-        )
-        
-        print(f"\n💬 Response:\n{response.choices[0].message.content}")
+        print(f"\n💬 Response:\n{output}")
 
 
 def demonstrate_common_mistakes() -> None:
@@ -295,6 +302,7 @@ def main():
 
 
 if __name__ == "__main__":
+    load_dotenv()
     if not os.getenv("OPENAI_API_KEY"):
         print("⚠️  Error: OPENAI_API_KEY not found in environment")
         print("Please set up your .env file. See resources/setup-guide.md")
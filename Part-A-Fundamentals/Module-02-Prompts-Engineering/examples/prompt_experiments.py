@@ -0,0 +1,381 @@
+"""
+Prompt Experiments - Run a Grid of Prompt Variants Concurrently
+
+Comparing prompts one call at a time is slow and loses everything when
+the script stops halfway. This module runs a whole grid instead:
+variants x inputs x models x temperatures, one API call per cell.
+1. Cells run concurrently, at most max_concurrency at a time
+2. Every finished cell is appended to a checkpoint file, so a rerun
+   (or an interrupted run) only calls the cells that are missing
+3. Results are written as columns (one NumPy array per field) with the
+   output text, latency, tokens and cost of every cell
+
+A cell is identified by a hash of its prompt text, model, temperature
+and max_tokens, so editing a variant re-runs just that variant's cells.
+Failed cells are not checkpointed and are retried on the next run.
+
+Usage:
+    from prompt_experiments import ExperimentGrid, run_experiment
+    
+    grid = ExperimentGrid(
+        variants={"plain": "Summarize: {input}",
+                  "expert": "You are an editor. Summarize in 2 sentences: {input}"},
+        inputs={"news": article, "email": message},
+        models=["gpt-3.5-turbo", "gpt-4"],
+        temperatures=[0.0, 0.7]
+    )
+    results = run_experiment(grid, checkpoint_path="summaries.jsonl",
+                             results_path="summaries.npz")
+    print_experiment_results(results)
+    
+    python prompt_experiments.py   # Demo against the local mock server
+
+Requirements:
+    - numpy>=1.26.0
+"""
+
+import asyncio
+import hashlib
+import inspect
+import itertools
+import json
+import os
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Shared helpers live with the Module 1 examples
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "Module-01-Intro-to-Gen-AI" / "examples"))
+
+
+# Result columns and their NumPy dtypes, in file order
+COLUMNS = {
+    'variant': str,
+    'input': str,
+    'model': str,
+    'temperature': np.float64,
+    'text': str,
+    'error': str,
+    'latency_ms': np.float64,
+    'input_tokens': np.int64,
+    'output_tokens': np.int64,
+    'cost_usd': np.float64,
+}
+
+
+@dataclass(frozen=True)
+class Cell:
+    """One grid cell: a rendered prompt sent to one model at one temperature."""
+    variant: str
+    input: str
+    model: str
+    temperature: float
+    prompt: str
+    max_tokens: int
+    
+    @property
+    def key(self) -> str:
+        """Checkpoint key; changes whenever the request would change."""
+        request = [self.prompt, self.model, self.temperature, self.max_tokens]
+        return hashlib.sha256(json.dumps(request).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class ExperimentGrid:
+    """
+    Prompt variants x inputs x models x temperatures.
+    
+    Variants are prompt templates; "{input}" is replaced by each input's
+    text (other braces are left alone). Without inputs, every variant is
+    sent as written.
+    """
+    variants: Dict[str, str]
+    inputs: Optional[Dict[str, str]] = None
+    models: Sequence[str] = ("gpt-3.5-turbo",)
+    temperatures: Sequence[float] = (0.7,)
+    max_tokens: int = 200
+    
+    def cells(self) -> List[Cell]:
+        """Every cell, in variant, input, model, temperature order."""
+        inputs = self.inputs or {"": ""}
+        return [
+            Cell(variant, input_name, model, float(temperature),
+                 template.replace("{input}", text), self.max_tokens)
+            for (variant, template), (input_name, text), model, temperature in itertools.product(
+                self.variants.items(), inputs.items(), self.models, self.temperatures
+            )
+        ]
+
+
+def load_checkpoint(path: str) -> Dict[str, dict]:
+    """
+    Finished cells from a checkpoint file, by cell key.
+    
+    A line cut short by a crash is ignored; that cell simply runs again.
+    """
+    finished: Dict[str, dict] = {}
+    if not path or not os.path.exists(path):
+        return finished
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            finished[record['key']] = record
+    return finished
+
+
+def _open_checkpoint(path: str):
+    # Start on a fresh line if the last run died halfway through one
+    ends_mid_line = False
+    if os.path.exists(path) and os.path.getsize(path) > 0:
+        with open(path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            ends_mid_line = f.read(1) != b"\n"
+    f = open(path, "a", encoding="utf-8")
+    if ends_mid_line:
+        f.write("\n")
+    return f
+
+
+async def _default_call(model: str, prompt: str, temperature: float, max_tokens: int) -> dict:
+    # Imported here so that loading this module does not load the SDKs
+    from basic_llm_call import acall_model
+    
+    return await acall_model(prompt, model=model, temperature=temperature, max_tokens=max_tokens)
+
+
+def chat_call(create: Callable[..., object]) -> Callable[[str, str, float, int], Awaitable[dict]]:
+    """
+    Adapt a chat.completions.create function into a `call` for
+    arun_experiment(), so cells go through that client and its wrappers
+    (rate limiting, single-flight, response cache).
+    
+    Each cell is sent as a single user message. A blocking create runs
+    in a worker thread; an async one is awaited.
+    
+    Args:
+        create: e.g. client.chat.completions.create
+    
+    Returns:
+        callable: async (model, prompt, temperature, max_tokens) -> result dict
+    """
+    async def call(model: str, prompt: str, temperature: float, max_tokens: int) -> dict:
+        response = await asyncio.to_thread(
+            create,
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+        if inspect.isawaitable(response):
+            response = await response
+        return {
+            'text': response.choices[0].message.content,
+            'input_tokens': response.usage.prompt_tokens,
+            'output_tokens': response.usage.completion_tokens,
+        }
+    
+    return call
+
+
+def _cost(model: str, input_tokens: int, output_tokens: int) -> Optional[float]:
+    from llm_clients import API_MODEL_NAMES
+    from pricing_calculator import calculate_cost
+    from usage_report import resolve_model
+    
+    priced = resolve_model(API_MODEL_NAMES.get(model, model))
+    if priced is None:
+        return None
+    return calculate_cost(input_tokens, output_tokens, priced)['total_cost']
+
+
+async def arun_experiment(
+    grid: ExperimentGrid,
+    checkpoint_path: str = None,
+    results_path: str = None,
+    max_concurrency: int = 8,
+    call: Callable[[str, str, float, int], Awaitable[dict]] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Run every cell of a grid that has not finished yet.
+    
+    Args:
+        grid: The experiment grid
+        checkpoint_path: JSONL file of finished cells, read at the start and
+            appended to as cells finish (None = keep nothing between runs)
+        results_path: Where to write the result columns (.npz; None = don't)
+        max_concurrency: Maximum calls in flight at once
+        call: async (model, prompt, temperature, max_tokens) -> result dict
+            like call_openai()'s (default: acall_model(); see chat_call()
+            to use a client instead)
+    
+    Returns:
+        dict: Column name -> NumPy array, one row per cell in grid order
+    """
+    call = call or _default_call
+    cells = grid.cells()
+    finished = load_checkpoint(checkpoint_path)
+    records: Dict[str, dict] = {}
+    semaphore = asyncio.Semaphore(max_concurrency)
+    checkpoint = _open_checkpoint(checkpoint_path) if checkpoint_path else None
+    
+    async def run(cell: Cell) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                result = await call(cell.model, cell.prompt, cell.temperature, cell.max_tokens)
+            except Exception as e:
+                result = {'error': str(e), 'error_type': type(e).__name__}
+            latency_ms = (time.perf_counter() - start) * 1000
+        
+        if 'error' in result:
+            records[cell.key] = {'error': result['error'], 'latency_ms': latency_ms}
+            return
+        record = {
+            'key': cell.key,
+            'text': result['text'],
+            'latency_ms': latency_ms,
+            'input_tokens': result['input_tokens'],
+            'output_tokens': result['output_tokens'],
+            'cost_usd': _cost(cell.model, result['input_tokens'], result['output_tokens']),
+        }
+        records[cell.key] = record
+        if checkpoint:
+            checkpoint.write(json.dumps(record, ensure_ascii=False) + "\n")
+            checkpoint.flush()
+    
+    try:
+        # Identical cells (e.g. a variant without "{input}" under several
+        # inputs) are called once
+        pending = {cell.key: cell for cell in cells if cell.key not in finished}
+        await asyncio.gather(*(run(cell) for cell in pending.values()))
+    finally:
+        if checkpoint:
+            checkpoint.close()
+    
+    finished.update(records)
+    columns = {name: [] for name in COLUMNS}
+    for cell in cells:
+        record = finished[cell.key]
+        columns['variant'].append(cell.variant)
+        columns['input'].append(cell.input)
+        columns['model'].append(cell.model)
+        columns['temperature'].append(cell.temperature)
+        columns['text'].append(record.get('text', ""))
+        columns['error'].append(record.get('error', ""))
+        columns['latency_ms'].append(record['latency_ms'])
+        columns['input_tokens'].append(record.get('input_tokens', 0))
+        columns['output_tokens'].append(record.get('output_tokens', 0))
+        cost = record.get('cost_usd')
+        columns['cost_usd'].append(np.nan if cost is None else cost)
+    results = {name: np.asarray(values, dtype=COLUMNS[name]) for name, values in columns.items()}
+    
+    if results_path:
+        save_results(results, results_path)
+    return results
+
+
+def run_experiment(grid: ExperimentGrid, **kwargs) -> Dict[str, np.ndarray]:
+    """Blocking wrapper around arun_experiment() for scripts without an event loop."""
+    return asyncio.run(arun_experiment(grid, **kwargs))
+
+
+def save_results(results: Dict[str, np.ndarray], path: str) -> None:
+    """Write result columns to an .npz file (via a temporary file and rename)."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **results)
+    os.replace(tmp_path, path)
+
+
+def load_results(path: str) -> Dict[str, np.ndarray]:
+    """Read result columns written by run_experiment()."""
+    with np.load(path, allow_pickle=False) as data:
+        return {name: data[name] for name in data.files}
+
+
+def cell_outputs(results: Dict[str, np.ndarray]) -> List[str]:
+    """Each cell's output text, or its error message for failed cells."""
+    return [text or f"❌ Error: {error}" for text, error in zip(results['text'], results['error'])]
+
+
+def print_experiment_results(results: Dict[str, np.ndarray], show_text: bool = False) -> None:
+    """
+    Print one line per cell: latency, tokens, cost, and errors.
+    
+    Args:
+        results: Columns from run_experiment() or load_results()
+        show_text: Also print each cell's output
+    """
+    print(f"\n{'Variant':<20} {'Input':<12} {'Model':<16} {'Temp':>5} "
+          f"{'Latency':>10} {'Tokens':>12} {'Cost':>10}")
+    print("-" * 91)
+    for i in range(len(results['variant'])):
+        cost = results['cost_usd'][i]
+        print(f"{results['variant'][i][:20]:<20} {results['input'][i][:12]:<12} "
+              f"{results['model'][i][:16]:<16} {results['temperature'][i]:>5.1f} "
+              f"{results['latency_ms'][i]:>8.0f}ms "
+              f"{results['input_tokens'][i]:>5}+{results['output_tokens'][i]:<6} "
+              f"{'-' if np.isnan(cost) else f'${cost:.5f}':>10}")
+        if results['error'][i]:
+            print(f"   ❌ {results['error'][i]}")
+        elif show_text:
+            print(f"   💬 {results['text'][i]}")
+    
+    ok = results['error'] == ""
+    print("-" * 91)
+    print(f"{ok.sum()}/{len(ok)} cells succeeded, "
+          f"{results['input_tokens'].sum() + results['output_tokens'].sum():,} tokens, "
+          f"${np.nansum(results['cost_usd']):.5f}")
+
+
+def demonstrate_experiments() -> None:
+    """
+    Run a small grid against the local mock server twice: the second run
+    finds every cell in the checkpoint and makes no calls.
+    """
+    from mock_llm_server import start_mock_server, use_mock_server
+    
+    server, base_url = start_mock_server(latency=0.2)
+    use_mock_server(base_url)
+    
+    grid = ExperimentGrid(
+        variants={
+            "simple": "Explain {input}.",
+            "role": "You are a patient teacher. Explain {input} to a beginner.",
+            "role+goal": "You are a patient teacher. Explain {input} in 3 bullet points, "
+                         "each under 15 words.",
+        },
+        inputs={"recursion": "recursion", "closures": "closures in Python"},
+        models=["gpt-3.5-turbo", "gpt-4"],
+        temperatures=[0.0, 0.7],
+        max_tokens=100
+    )
+    
+    work_dir = tempfile.mkdtemp(prefix="prompt_experiments_")
+    checkpoint_path = os.path.join(work_dir, "checkpoint.jsonl")
+    results_path = os.path.join(work_dir, "results.npz")
+    
+    try:
+        for attempt in ("first run", "rerun"):
+            start = time.perf_counter()
+            results = run_experiment(grid, checkpoint_path=checkpoint_path, results_path=results_path)
+            print(f"\n{'='*91}")
+            print(f"{attempt.upper()}: {len(results['variant'])} cells "
+                  f"in {time.perf_counter() - start:.2f}s")
+            print(f"{'='*91}")
+            print_experiment_results(results)
+        print(f"\nColumns saved to {results_path}: {', '.join(load_results(results_path))}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    demonstrate_experiments()
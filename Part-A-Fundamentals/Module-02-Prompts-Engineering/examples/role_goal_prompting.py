@@ -11,12 +11,17 @@ Key Concepts:
 """
 
 import os
+import sys
+from pathlib import Path
 from dotenv import load_dotenv
-from openai import OpenAI
 from typing import Dict, List
 
-load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Shared helpers live with the Module 1 examples
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "Module-01-Intro-to-Gen-AI" / "examples"))
+from llm_clients import default_chat_client
+
+# Rate-limited, single-flight and cached; built on the first request
+client = default_chat_client()
 
 
 def compare_prompt_approaches(
@@ -32,37 +37,33 @@ def compare_prompt_approaches(
         simple_prompt: Simple version of the prompt
         role_goal_prompt: Structured version with role and goal
     """
+    from prompt_experiments import ExperimentGrid, cell_outputs, chat_call, run_experiment
+    
     print(f"\n{'='*80}")
     print(f"BASE QUERY: {base_query}")
     print(f"{'='*80}")
     
+    # Both prompts are sent at the same time
+    results = run_experiment(ExperimentGrid(
+        variants={"simple": simple_prompt, "role_goal": role_goal_prompt},
+        temperatures=[0.7],
+        max_tokens=200
+    ), call=chat_call(client.chat.completions.create))
+    simple_output, role_goal_output = cell_outputs(results)
+    
     # Simple prompt
     print(f"\n❌ SIMPLE PROMPT:")
     print(f"{'-'*80}")
     print(f"{simple_prompt}")
     print(f"\n💬 Response:")
-    
-    response1 = client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=[{"role": "user", "content": simple_prompt}],
-        max_tokens=200,
-        temperature=0.7
-    )
-    print(response1.choices[0].message.content)
+    print(simple_output)
     
     # Role + Goal prompt
     print(f"\n\n✅ ROLE + GOAL PROMPT:")
     print(f"{'-'*80}")
     print(f"{role_goal_prompt}")
     print(f"\n💬 Response:")
-    
-    response2 = client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=[{"role": "user", "content": role_goal_prompt}],
-        max_tokens=200,
-        temperature=0.7
-    )
-    print(response2.choices[0].message.content)
+    print(role_goal_output)
 
 
 def role_experiment() -> None:
@@ -73,6 +74,8 @@ def role_experiment() -> None:
     print("ROLE EXPERIMENT - Same Question, Different Roles")
     print(f"{'='*80}")
     
+    from prompt_experiments import ExperimentGrid, cell_outputs, chat_call, run_experiment
+    
     question = "Explain what recursion is in programming."
     
     roles = [
@@ -96,18 +99,17 @@ def role_experiment() -> None:
         }
     ]
     
-    for role in roles:
-        print(f"\n🎭 ROLE: {role['title']}")
+    # Every role is asked at once
+    results = run_experiment(ExperimentGrid(
+        variants={role['title']: role['prompt'] for role in roles},
+        temperatures=[0.7],
+        max_tokens=150
+    ), call=chat_call(client.chat.completions.create))
+    
+    for title, output in zip(results['variant'], cell_outputs(results)):
+        print(f"\n🎭 ROLE: {title}")
         print(f"{'-'*80}")
-        
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": role['prompt']}],
-            max_tokens=150,
-            temperature=0.7
-        )
-        
-        print(response.choices[0].message.content)
+        print(output)
 
 
 def goal_specificity_demo() -> None:
@@ -118,6 +120,8 @@ def goal_specificity_demo() -> None:
     print("GOAL SPECIFICITY DEMONSTRATION")
     print(f"{'='*80}")
     
+    from prompt_experiments import ExperimentGrid, cell_outputs, chat_call, run_experiment
+    
     topic = "Python list comprehensions"
     
     prompts = [
@@ -141,19 +145,18 @@ def goal_specificity_demo() -> None:
         }
     ]
     
-    for p in prompts:
+    results = run_experiment(ExperimentGrid(
+        variants={p['label']: p['prompt'] for p in prompts},
+        temperatures=[0.7],
+        max_tokens=200
+    ), call=chat_call(client.chat.completions.create))
+    outputs = cell_outputs(results)
+    
+    for i, p in enumerate(prompts):
         print(f"\n📋 {p['label']}: \"{p['prompt']}\"")
         print(f"{'-'*80}")
-        
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": p['prompt']}],
-            max_tokens=200,
-            temperature=0.7
-        )
-        
-        print(f"💬 {response.choices[0].message.content}\n")
-        print(f"Token count: {response.usage.total_tokens}")
+        print(f"💬 {outputs[i]}\n")
+        print(f"Token count: {results['input_tokens'][i] + results['output_tokens'][i]}")
 
 
 def practical_example_code_review() -> None:
@@ -250,6 +253,25 @@ Constraints: Do not {constraint_1}. Do not {constraint_2}.
     return template
 
 
+def compile_reusable_prompt_template(model: str = "gpt-3.5-turbo") -> "CompiledPrompt":
+    """
+    Compile the full template once for repeated use.
+    
+    The fixed text is tokenized here, so each request only tokenizes its
+    own slot values to get an exact token count.
+    
+    Args:
+        model: Model whose tokenizer is used for counting
+    
+    Returns:
+        CompiledPrompt: Renders like full_template.format()
+    """
+    # Imported here: it loads tiktoken, which this module does not need
+    # until the first template is compiled
+    from prompt_templates import CompiledPrompt
+    return CompiledPrompt(create_reusable_prompt_template()["full_template"], model=model)
+
+
 def demonstrate_template_usage() -> None:
     """
     Show how to use the reusable template.
@@ -258,10 +280,10 @@ def demonstrate_template_usage() -> None:
     print("REUSABLE PROMPT TEMPLATE")
     print(f"{'='*80}")
     
-    template = create_reusable_prompt_template()
+    template = compile_reusable_prompt_template()
     
     # Fill in the template
-    filled_prompt = template["full_template"].format(
+    slots = dict(
         expertise="customer support specialist",
         experience_level="5 years",
         action="respond to a customer complaint",
@@ -277,10 +299,13 @@ Customer complaint:
 The tracking hasn't updated in days. This is unacceptable!"
 """
     )
+    filled_prompt, prompt_tokens = template.render_with_count(**slots)
     
     print("📝 FILLED TEMPLATE:")
     print(f"{'-'*80}")
     print(filled_prompt)
+    print(f"🔢 {prompt_tokens} tokens ({template.static_tokens} from the template itself); "
+          f"fits with 200 response tokens: {template.fits(max_tokens=200, **slots)}")
     
     response = client.chat.completions.create(
         model="gpt-3.5-turbo",
@@ -344,6 +369,7 @@ def main():
 
 
 if __name__ == "__main__":
+    load_dotenv()
     if not os.getenv("OPENAI_API_KEY"):
         print("⚠️  Error: OPENAI_API_KEY not found in environment")
         print("Please set up your .env file. See resources/setup-guide.md")
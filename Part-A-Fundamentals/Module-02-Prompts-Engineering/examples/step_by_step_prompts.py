@@ -12,44 +12,45 @@ Key Concepts:
 """
 
 import os
+import sys
+from pathlib import Path
 from dotenv import load_dotenv
-from openai import OpenAI
 
-load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Shared helpers live with the Module 1 examples
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "Module-01-Intro-to-Gen-AI" / "examples"))
+from llm_clients import default_chat_client
+
+# Rate-limited, single-flight and cached; built on the first request
+client = default_chat_client()
 
 
 def simple_vs_stepwise(task: str, simple: str, stepwise: str) -> None:
     """Compare simple prompt vs step-by-step approach."""
+    from prompt_experiments import ExperimentGrid, cell_outputs, chat_call, run_experiment
+    
     print(f"\n{'='*80}")
     print(f"TASK: {task}")
     print(f"{'='*80}")
     
+    # Both prompts are sent at the same time
+    results = run_experiment(ExperimentGrid(
+        variants={"simple": simple, "stepwise": stepwise},
+        temperatures=[0.7],
+        max_tokens=250
+    ), call=chat_call(client.chat.completions.create))
+    simple_output, stepwise_output = cell_outputs(results)
+    
     # Simple approach
     print(f"\n❌ SIMPLE PROMPT:")
     print(f"{'-'*80}")
     print(simple)
-    
-    response1 = client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=[{"role": "user", "content": simple}],
-        max_tokens=250,
-        temperature=0.7
-    )
-    print(f"\n💬 Response:\n{response1.choices[0].message.content}")
+    print(f"\n💬 Response:\n{simple_output}")
     
     # Step-by-step approach
     print(f"\n\n✅ STEP-BY-STEP PROMPT:")
     print(f"{'-'*80}")
     print(stepwise)
-    
-    response2 = client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=[{"role": "user", "content": stepwise}],
-        max_tokens=250,
-        temperature=0.7
-    )
-    print(f"\n💬 Response:\n{response2.choices[0].message.content}")
+    print(f"\n💬 Response:\n{stepwise_output}")
 
 
 def math_problem_solving() -> None:
@@ -344,6 +345,7 @@ def main():
 
 
 if __name__ == "__main__":
+    load_dotenv()
     if not os.getenv("OPENAI_API_KEY"):
         print("⚠️  Error: OPENAI_API_KEY not found in environment")
         print("Please set up your .env file. See resources/setup-guide.md")
@@ -0,0 +1,134 @@
+"""
+Checks for Hedger in hedging.py, against local mock servers.
+
+Run with `pytest test_hedging.py`, or directly:
+python test_hedging.py
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+MODULE_01 = ROOT / "Part-A-Fundamentals" / "Module-01-Intro-to-Gen-AI" / "examples"
+sys.path.insert(0, str(MODULE_01))
+
+from hedging import Hedger
+from llm_clients import get_async_client
+from mock_llm_server import start_mock_server, use_mock_server
+
+PRIMARY = ("primary", "gpt-3.5-turbo")
+SECONDARY = ("secondary", "gpt-3.5-turbo")
+
+
+def mock_call(base_urls):
+    """Hedger call sending each target to its own mock server."""
+    async def call(target, prompt, **kwargs):
+        client = get_async_client("openai", api_key="mock", base_url=base_urls[target[0]])
+        try:
+            response = await client.chat.completions.create(
+                model=target[1], messages=[{"role": "user", "content": prompt}], **kwargs
+            )
+        except Exception as e:
+            return {'error': str(e)}
+        return {'text': response.choices[0].message.content,
+                'total_tokens': response.usage.total_tokens}
+    return call
+
+
+def run_servers(primary, secondary, test):
+    """Run test(call) with PRIMARY and SECONDARY served by mock servers."""
+    servers = [start_mock_server(**primary), start_mock_server(**secondary)]
+    try:
+        base_urls = {name: f"{url}/v1" for name, (_, url) in zip(("primary", "secondary"), servers)}
+        test(mock_call(base_urls))
+    finally:
+        for server, _ in servers:
+            server.shutdown()
+
+
+def test_fast_primary_is_not_hedged():
+    def test(call):
+        hedger = Hedger([PRIMARY, SECONDARY], default_deadline_ms=5000, call=call)
+        result = hedger.call("ping", max_tokens=5)
+        assert result['text'] == "Echo: ping"
+        assert result['target'] == PRIMARY and not result['hedged']
+        assert hedger.hedges == 0 and hedger.failovers == 0
+    run_servers({'latency': 0.0}, {'latency': 0.0}, test)
+
+
+def test_slow_primary_is_hedged():
+    def test(call):
+        hedger = Hedger([PRIMARY, SECONDARY], default_deadline_ms=100, call=call)
+        result = hedger.call("ping", max_tokens=5)
+        assert result['target'] == SECONDARY and result['hedged']
+        assert result['latency_ms'] < 1000
+        assert hedger.hedges == 1
+        # The cancelled primary's elapsed time is not a latency sample
+        assert hedger.tracker.count(PRIMARY) == 0
+        assert hedger.tracker.count(SECONDARY) == 1
+    run_servers({'latency': 2.0}, {'latency': 0.0}, test)
+
+
+def test_failing_primary_fails_over():
+    def test(call):
+        hedger = Hedger([PRIMARY, SECONDARY], default_deadline_ms=5000, call=call)
+        result = hedger.call("ping", max_tokens=5)
+        assert result['target'] == SECONDARY
+        assert result['latency_ms'] < 5000
+        assert hedger.failovers == 1 and hedger.hedges == 0
+    run_servers({'error_rate': 1.0}, {'latency': 0.0}, test)
+
+
+def test_all_targets_failing():
+    def test(call):
+        result = Hedger([PRIMARY, SECONDARY], call=call).call("ping", max_tokens=5)
+        assert result['error'] == "All targets failed"
+        assert result['attempts'] == 2 and len(result['errors']) == 2
+    run_servers({'error_rate': 1.0}, {'error_rate': 1.0}, test)
+
+
+def test_deadline_follows_measured_latency():
+    def test(call):
+        hedger = Hedger([PRIMARY, SECONDARY], percentile=50, default_deadline_ms=1000,
+                        min_samples=3, call=call)
+        assert hedger.deadline_ms(PRIMARY) == 1000
+        for i in range(3):
+            hedger.call(f"Question {i}", max_tokens=5)
+        assert 40 <= hedger.deadline_ms(PRIMARY) < 1000
+    run_servers({'latency': 0.05}, {'latency': 0.0}, test)
+
+
+def test_cancelled_default_call_stops():
+    # Deterministic requests through the default call path: the losing
+    # attempt must really stop, not keep running behind @coalesced
+    server, base_url = start_mock_server(latency=0.3)
+    try:
+        use_mock_server(base_url)
+        hedger = Hedger([("openai", "gpt-3.5-turbo"), ("openai", "gpt-4")], default_deadline_ms=150)
+        
+        async def run():
+            # The first request also creates the client
+            await hedger.acall("warm up", temperature=0, max_tokens=5)
+            result = await hedger.acall("ping", temperature=0, max_tokens=5)
+            others = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+            return result, others
+        
+        result, others = asyncio.run(run())
+        assert result['text'] == "Echo: ping" and result['hedged']
+        assert others == []
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    tests = [(name, test) for name, test in globals().items() if name.startswith("test_")]
+    failed = 0
+    for name, test in tests:
+        try:
+            test()
+            print(f"✓ {name}")
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {name}: {e}")
+    sys.exit(1 if failed else 0)
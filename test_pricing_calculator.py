@@ -0,0 +1,64 @@
+"""
+Checks that pricing_calculator.py follows edits to PRICING_DATA.
+
+Run with `pytest test_pricing_calculator.py`, or directly:
+python test_pricing_calculator.py
+"""
+
+import json
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+MODULE_01 = ROOT / "Part-A-Fundamentals" / "Module-01-Intro-to-Gen-AI" / "examples"
+sys.path.insert(0, str(MODULE_01))
+
+from pricing_calculator import PRICING_DATA, ModelPricing, calculate_cost, refresh_prices
+from usage_report import aggregate_lines, resolve_model
+
+NEW_MODEL = ModelPricing("gpt-4o", "OpenAI", 5.00, 15.00, 128000)
+
+
+def test_added_model_is_priced():
+    # Resolved (and cached as unpriced) before the model is added
+    assert resolve_model("gpt-4o-2024-05-13") is None
+    PRICING_DATA["gpt-4o"] = NEW_MODEL
+    try:
+        assert abs(calculate_cost(1000, 500, "gpt-4o")['total_cost'] - 0.0125) < 1e-12
+        assert resolve_model("gpt-4o-2024-05-13") == "gpt-4o"
+        line = json.dumps({"model": "gpt-4o", "input_tokens": 1000, "output_tokens": 500})
+        groups, _ = aggregate_lines([line], group_by=("model", "provider"))
+        assert abs(groups[("gpt-4o", "OpenAI")].cost - 0.0125) < 1e-12
+    finally:
+        del PRICING_DATA["gpt-4o"]
+    try:
+        calculate_cost(1000, 500, "gpt-4o")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("calculate_cost() still prices a removed model")
+
+
+def test_refresh_after_field_change():
+    pricing = PRICING_DATA["gpt-4"]
+    original = pricing.input_price
+    pricing.input_price = 25.00
+    try:
+        refresh_prices()
+        assert abs(calculate_cost(1000, 0, "gpt-4")['total_cost'] - 0.025) < 1e-12
+    finally:
+        pricing.input_price = original
+        refresh_prices()
+
+
+if __name__ == "__main__":
+    tests = [(name, test) for name, test in globals().items() if name.startswith("test_")]
+    failed = 0
+    for name, test in tests:
+        try:
+            test()
+            print(f"✓ {name}")
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {name}: {e}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,78 @@
+"""
+Checks for the @rate_limited decorator in rate_limiter.py.
+
+Run with `pytest test_rate_limiter.py`, or directly:
+python test_rate_limiter.py
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+MODULE_01 = ROOT / "Part-A-Fundamentals" / "Module-01-Intro-to-Gen-AI" / "examples"
+sys.path.insert(0, str(MODULE_01))
+
+from rate_limiter import RateLimiter, estimate_request_tokens, rate_limited
+
+# Small enough that max_tokens=500 can never fit
+LIMITS = {"gpt-3.5-turbo": {"rpm": 60, "tpm": 200}}
+
+
+def make_calls(limiter):
+    """A sync and an async call_openai()-style function recording their prompts."""
+    sent = []
+    
+    @rate_limited(limiter=limiter)
+    def call(prompt, model="gpt-3.5-turbo", max_tokens=150):
+        sent.append(prompt)
+        return {'text': "ok", 'total_tokens': 20}
+    
+    @rate_limited(limiter=limiter)
+    async def acall(prompt, model="gpt-3.5-turbo", max_tokens=150):
+        sent.append(prompt)
+        return {'text': "ok", 'total_tokens': 20}
+    
+    return call, acall, sent
+
+
+def test_request_within_limit():
+    limiter = RateLimiter(limits=LIMITS)
+    call, acall, sent = make_calls(limiter)
+    assert call("Hello", max_tokens=50)['text'] == "ok"
+    assert asyncio.run(acall("Hello", max_tokens=50))['text'] == "ok"
+    assert sent == ["Hello", "Hello"]
+    assert limiter.stats()['requests'] == 2
+
+
+def test_request_over_tpm_returns_error():
+    limiter = RateLimiter(limits=LIMITS)
+    call, acall, sent = make_calls(limiter)
+    for result in (call("Hello", max_tokens=500), asyncio.run(acall("Hello", max_tokens=500))):
+        assert result['error_type'] == "ValueError"
+        assert "200 per minute" in result['error']
+    assert sent == []
+    assert limiter.stats()['requests'] == 0
+
+
+def test_special_token_text_is_sent():
+    limiter = RateLimiter(limits=LIMITS)
+    call, acall, sent = make_calls(limiter)
+    prompt = "hello <|endoftext|> world"
+    assert call(prompt, max_tokens=50)['text'] == "ok"
+    assert asyncio.run(acall(prompt, max_tokens=50))['text'] == "ok"
+    assert sent == [prompt, prompt]
+    assert estimate_request_tokens([{"role": "user", "content": prompt}], "gpt-4", 0) > 6
+
+
+if __name__ == "__main__":
+    tests = [(name, test) for name, test in globals().items() if name.startswith("test_")]
+    failed = 0
+    for name, test in tests:
+        try:
+            test()
+            print(f"✓ {name}")
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {name}: {e}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,66 @@
+"""
+Checks for the @cached_llm_call decorator in response_cache.py.
+
+Run with `pytest test_response_cache.py`, or directly:
+python test_response_cache.py
+"""
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+MODULE_01 = ROOT / "Part-A-Fundamentals" / "Module-01-Intro-to-Gen-AI" / "examples"
+sys.path.insert(0, str(MODULE_01))
+
+from llm_clients import CLIENT_SETTINGS, configure_clients
+from response_cache import ResponseCache, cached_llm_call
+
+
+def make_call(cache):
+    """A call_openai()-style function answering with the configured base URL."""
+    sent = []
+    
+    @cached_llm_call(cache=cache)
+    def call(prompt, model="gpt-3.5-turbo", temperature=0.7, max_tokens=150):
+        sent.append(prompt)
+        return {'text': CLIENT_SETTINGS['openai_base_url'], 'total_tokens': 20}
+    
+    return call, sent
+
+
+def test_repeated_call_is_cached():
+    call, sent = make_call(ResponseCache())
+    first = call("ping", temperature=0)
+    second = call("ping", temperature=0)
+    assert sent == ["ping"]
+    assert 'cached' not in first and second['cached'] is True
+    call("ping", temperature=1.0)
+    assert len(sent) == 2
+
+
+def test_cache_is_per_endpoint():
+    previous = CLIENT_SETTINGS['openai_base_url']
+    call, sent = make_call(ResponseCache())
+    try:
+        configure_clients(openai_base_url="http://127.0.0.1:8001/v1")
+        assert call("ping", temperature=0)['text'] == "http://127.0.0.1:8001/v1"
+        configure_clients(openai_base_url="http://127.0.0.1:8002/v1")
+        result = call("ping", temperature=0)
+        assert result['text'] == "http://127.0.0.1:8002/v1"
+        assert 'cached' not in result
+        assert len(sent) == 2
+    finally:
+        configure_clients(openai_base_url=previous)
+
+
+if __name__ == "__main__":
+    tests = [(name, test) for name, test in globals().items() if name.startswith("test_")]
+    failed = 0
+    for name, test in tests:
+        try:
+            test()
+            print(f"✓ {name}")
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {name}: {e}")
+    sys.exit(1 if failed else 0)
@@ -1,4 +1,8 @@
 import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -12,15 +16,30 @@ if api_key:
 else:
     print("✗ API key not found. Check your .env file")
 
-# Test imports
-try: 
-    import anthropic
-    import langchain
-    import chromadb
-    import tiktoken
-    from openai import OpenAI
-    print("✓ All required packages imported successfully")
-except ImportError as e:
-    print(f"✗ Import error: {e}")
+# Test imports. Each package is imported in its own interpreter and all
+# of them at once, so the check takes as long as the slowest package
+# instead of the sum of all of them.
+PACKAGES = ["anthropic", "langchain", "chromadb", "tiktoken", "openai"]
+
+
+def check_import(package):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", f"import {package}"],
+                            capture_output=True, text=True)
+    error = result.stderr.strip().splitlines()[-1] if result.returncode else None
+    return package, time.perf_counter() - start, error
+
+
+with ThreadPoolExecutor(len(PACKAGES)) as pool:
+    results = list(pool.map(check_import, PACKAGES))
+
+errors = [error for _, _, error in results if error]
+if errors:
+    for error in errors:
+        print(f"✗ Import error: {error}")
+else:
+    slowest = max(results, key=lambda r: r[1])
+    print(f"✓ All required packages imported successfully "
+          f"(slowest: {slowest[0]}, {slowest[1]:.1f}s)")
 
 print("\n🎉 Setup complete! You're ready to start learning.")
\ No newline at end of file
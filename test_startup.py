@@ -0,0 +1,101 @@
+"""
+Startup-time check for the example helpers.
+
+Every module below is imported in a fresh interpreter with
+`python -X importtime`. The check fails if a module's cumulative import
+time is over IMPORT_BUDGET_MS, or if importing it loads one of
+HEAVY_MODULES (those must only be imported on first use).
+
+Run with `pytest test_startup.py`, or directly: python test_startup.py
+"""
+
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+MODULE_01 = ROOT / "Part-A-Fundamentals" / "Module-01-Intro-to-Gen-AI" / "examples"
+MODULE_02 = ROOT / "Part-A-Fundamentals" / "Module-02-Prompts-Engineering" / "examples"
+
+# Cumulative import time allowed per module (milliseconds)
+IMPORT_BUDGET_MS = 200
+
+# (directory, module) pairs to check
+MODULES = [
+    (MODULE_01, "llm_clients"),
+    (MODULE_01, "rate_limiter"),
+    (MODULE_01, "response_cache"),
+    (MODULE_01, "single_flight"),
+    (MODULE_02, "few_shot_examples"),
+    (MODULE_02, "few_shot_format"),
+    (MODULE_02, "negative_positive_prompts"),
+    (MODULE_02, "role_goal_prompting"),
+    (MODULE_02, "step_by_step_prompts"),
+]
+
+# Packages that take long to import and must not load at import time
+HEAVY_MODULES = {"openai", "anthropic", "httpx", "tiktoken", "numpy"}
+
+# "import time: <self us> | <cumulative us> | <indent><module>"
+IMPORT_TIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def import_profile(directory, module):
+    """
+    Import a module in a fresh interpreter.
+    
+    Returns:
+        tuple: (cumulative import time in ms, set of top-level packages loaded)
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=directory, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed: {result.stderr.strip().splitlines()[-1]}")
+    
+    cumulative_ms = 0.0
+    loaded = set()
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if not match:
+            continue
+        name = match.group(4)
+        loaded.add(name.split(".")[0])
+        if name == module:
+            cumulative_ms = int(match.group(2)) / 1000
+    return cumulative_ms, loaded
+
+
+def check_startup():
+    """Profile every module; returns (rows, failure messages)."""
+    rows, failures = [], []
+    for directory, module in MODULES:
+        elapsed_ms, loaded = import_profile(directory, module)
+        heavy = sorted(loaded & HEAVY_MODULES)
+        rows.append((module, elapsed_ms, heavy))
+        if elapsed_ms > IMPORT_BUDGET_MS:
+            failures.append(f"{module}: {elapsed_ms:.0f} ms (budget {IMPORT_BUDGET_MS} ms)")
+        if heavy:
+            failures.append(f"{module}: imports {', '.join(heavy)} at import time")
+    return rows, failures
+
+
+def test_import_budget():
+    _, failures = check_startup()
+    assert not failures, "\n".join(failures)
+
+
+if __name__ == "__main__":
+    rows, failures = check_startup()
+    print(f"{'Module':<28} {'Import ms':>10}  Heavy imports")
+    print("-" * 60)
+    for module, elapsed_ms, heavy in rows:
+        print(f"{module:<28} {elapsed_ms:>10.1f}  {', '.join(heavy) or '-'}")
+    print()
+    if failures:
+        for failure in failures:
+            print(f"✗ {failure}")
+        sys.exit(1)
+    print(f"✓ Every module imports within {IMPORT_BUDGET_MS} ms")
@@ -0,0 +1,105 @@
+"""
+Checks for the token counting helpers in the Module 1 examples.
+
+Run with `pytest test_token_counting.py`, or directly:
+python test_token_counting.py
+"""
+
+import random
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+MODULE_01 = ROOT / "Part-A-Fundamentals" / "Module-01-Intro-to-Gen-AI" / "examples"
+sys.path.insert(0, str(MODULE_01))
+
+from token_counting import ConversationTokenLedger, StreamingTokenCounter, count_tokens, estimate_conversation_tokens
+
+# Texts whose regex pieces are easy to split badly: runs of spaces before
+# digits and letters, newlines, contractions, punctuation and non-ASCII
+STREAM_TEXTS = [
+    "  1a",
+    "Hello, world! It's   12345 tokens\n\n  of text.\r\n\tDone?",
+    "naïve café — 東京 🙂 don't   stop\n   \n123456789 !!! ...",
+    "word " * 50 + "\n" * 5 + "   trailing   ",
+]
+
+# Random chunkings tried per text
+CHUNKINGS = 200
+
+
+def random_chunks(text, rng):
+    """Split text at random offsets (including empty chunks)."""
+    cuts = sorted(rng.randint(0, len(text)) for _ in range(rng.randint(0, 8)))
+    return [text[start:end] for start, end in zip([0, *cuts], [*cuts, len(text)])]
+
+
+def streamed_totals(chunks, as_bytes=False):
+    counter = StreamingTokenCounter()
+    for chunk in chunks:
+        counter.feed(chunk.encode("utf-8") if as_bytes else chunk)
+    return counter.close()
+
+
+def test_streaming_split_piece():
+    assert streamed_totals([" ", " 1a"])['tokens'] == count_tokens("  1a")
+
+
+def test_streaming_matches_whole_text():
+    rng = random.Random(0)
+    for text in STREAM_TEXTS:
+        expected = {
+            'tokens': count_tokens(text),
+            'characters': len(text),
+            'words': len(text.split()),
+        }
+        for _ in range(CHUNKINGS):
+            chunks = random_chunks(text, rng)
+            assert streamed_totals(chunks) == expected, chunks
+
+
+def test_streaming_split_utf8_bytes():
+    text = STREAM_TEXTS[2]
+    data = text.encode("utf-8")
+    counter = StreamingTokenCounter()
+    for i in range(len(data)):
+        counter.feed(data[i:i + 1])
+    assert counter.close()['tokens'] == count_tokens(text)
+
+
+def test_ledger_edit_matches_estimate():
+    messages = [
+        {"role": "system", "content": "You are helpful."},
+        {"role": "user", "content": "Hello!"},
+        {"role": "assistant", "content": "Hi, how can I help?"},
+    ]
+    ledger = ConversationTokenLedger(messages=messages)
+    messages[1] = {"role": "user", "content": "What is a token?", "name": "ana"}
+    ledger.edit(1, messages[1])
+    assert ledger.totals() == estimate_conversation_tokens(messages)
+
+
+def test_ledger_edit_bad_index_keeps_totals():
+    ledger = ConversationTokenLedger(messages=[{"role": "user", "content": "Hello!"}])
+    before = ledger.totals()
+    try:
+        ledger.edit(5, {"role": "user", "content": "Replacement"})
+    except IndexError:
+        pass
+    else:
+        raise AssertionError("edit() accepted an out-of-range index")
+    assert ledger.totals() == before
+    assert len(ledger) == 1
+
+
+if __name__ == "__main__":
+    tests = [(name, test) for name, test in globals().items() if name.startswith("test_")]
+    failed = 0
+    for name, test in tests:
+        try:
+            test()
+            print(f"✓ {name}")
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {name}: {e}")
+    sys.exit(1 if failed else 0)
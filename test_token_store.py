@@ -0,0 +1,99 @@
+"""
+Checks for the on-disk token store in token_store.py.
+
+Run with `pytest test_token_store.py`, or directly:
+python test_token_store.py
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+MODULE_01 = ROOT / "Part-A-Fundamentals" / "Module-01-Intro-to-Gen-AI" / "examples"
+sys.path.insert(0, str(MODULE_01))
+
+from token_counting import count_tokens
+from token_store import CURRENT_FILE, GENERATION_PREFIX, TokenStore, build_token_store
+
+DOCUMENTS = {
+    "a.txt": "Hello, world! This is the first document.",
+    "sub/b.txt": "A second document,\nin a subdirectory.",
+}
+
+
+def make_corpus(root: Path) -> Path:
+    source = root / "docs"
+    for name, text in DOCUMENTS.items():
+        (source / name).parent.mkdir(parents=True, exist_ok=True)
+        (source / name).write_text(text, encoding="utf-8")
+    return source
+
+
+def test_counts_match_tokenizer():
+    with tempfile.TemporaryDirectory() as tmp:
+        source = make_corpus(Path(tmp))
+        assert build_token_store(source, Path(tmp) / "store") == 2
+        store = TokenStore(Path(tmp) / "store")
+        for name, text in DOCUMENTS.items():
+            assert store.count(name) == count_tokens(text)
+            assert store.truncate(name, 1000) == text
+        assert store.total_tokens() == sum(count_tokens(text) for text in DOCUMENTS.values())
+
+
+def test_rebuild_switches_generation():
+    with tempfile.TemporaryDirectory() as tmp:
+        source, store_dir = make_corpus(Path(tmp)), Path(tmp) / "store"
+        for _ in range(3):
+            build_token_store(source, store_dir)
+        generations = sorted(p.name for p in store_dir.glob(f"{GENERATION_PREFIX}*"))
+        assert len(generations) == 2
+        assert (store_dir / CURRENT_FILE).read_text() in generations
+        
+        # A build that crashed before switching CURRENT is never read
+        (source / "a.txt").write_text("Edited after the crashed build", encoding="utf-8")
+        orphan = store_dir / f"{GENERATION_PREFIX}crashed"
+        orphan.mkdir()
+        (orphan / "tokens.bin").write_bytes(b"\0" * 8)
+        assert TokenStore(store_dir, check_sources=False).count("a.txt") == count_tokens(DOCUMENTS["a.txt"])
+        build_token_store(source, store_dir)
+        assert not orphan.exists()
+        assert TokenStore(store_dir).count("a.txt") == count_tokens("Edited after the crashed build")
+
+
+def test_edited_document_is_stale():
+    with tempfile.TemporaryDirectory() as tmp:
+        source, store_dir = make_corpus(Path(tmp)), Path(tmp) / "store"
+        build_token_store(source, store_dir)
+        
+        # Touched but unchanged is still fresh
+        path = source / "sub" / "b.txt"
+        os.utime(path, ns=(0, path.stat().st_mtime_ns + 10**9))
+        store = TokenStore(store_dir)
+        assert store.count("sub/b.txt") == count_tokens(DOCUMENTS["sub/b.txt"])
+        
+        (source / "a.txt").write_text("Hello, world! This is the FIRST document.", encoding="utf-8")
+        assert store.is_stale("a.txt")
+        try:
+            store.count("a.txt")
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("count() returned a stale token count")
+        
+        path.unlink()
+        assert store.is_stale("sub/b.txt")
+
+
+if __name__ == "__main__":
+    tests = [(name, test) for name, test in globals().items() if name.startswith("test_")]
+    failed = 0
+    for name, test in tests:
+        try:
+            test()
+            print(f"✓ {name}")
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {name}: {e}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,86 @@
+"""
+Checks for model name resolution and log aggregation in usage_report.py.
+
+Run with `pytest test_usage_report.py`, or directly:
+python test_usage_report.py
+"""
+
+import json
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+MODULE_01 = ROOT / "Part-A-Fundamentals" / "Module-01-Intro-to-Gen-AI" / "examples"
+sys.path.insert(0, str(MODULE_01))
+
+from usage_report import aggregate_lines, resolve_model
+
+# Reported model name -> expected PRICING_DATA name (None = unpriced)
+MODEL_NAMES = {
+    "gpt-4": "gpt-4",
+    "gpt-4-0613": "gpt-4",
+    "gpt-4-32k-0613": "gpt-4-32k",
+    "gpt-4-turbo-2024-04-09": "gpt-4-turbo",
+    "gpt-3.5-turbo-0125": "gpt-3.5-turbo",
+    "claude-3-haiku-20240307": "claude-3-haiku",
+    "gpt-4o": None,
+    "gpt-4o-2024-05-13": None,
+    "gpt-4-1106-preview": None,
+    "gpt-4-turbo-preview": None,
+    "claude-3-haiku-latest": None,
+    "": None,
+}
+
+
+def test_resolve_model():
+    for reported, expected in MODEL_NAMES.items():
+        assert resolve_model(reported) == expected, reported
+
+
+def test_resolve_model_not_a_string():
+    assert resolve_model(None) is None
+    assert resolve_model(4) is None
+
+
+def test_aggregate_skips_bad_models():
+    lines = [
+        json.dumps({"model": "gpt-4-0613", "input_tokens": 1000, "output_tokens": 500}),
+        json.dumps({"model": None, "input_tokens": 10, "output_tokens": 5}),
+        json.dumps({"model": ["gpt-4"], "input_tokens": 10, "output_tokens": 5}),
+        json.dumps({"error": "timeout", "error_type": "APITimeoutError"}),
+        json.dumps({"model": "gpt-4o", "input_tokens": 10, "output_tokens": 5}),
+        "not json",
+    ]
+    groups, skipped = aggregate_lines(lines, group_by=("model", "provider"))
+    assert skipped == 4
+    assert groups[("gpt-4", "OpenAI")].requests == 1
+    assert abs(groups[("gpt-4", "OpenAI")].cost - 0.06) < 1e-9
+    assert groups[("gpt-4o", "unknown")].cost == 0.0
+
+
+def test_aggregate_epoch_units():
+    # 2024-03-01T12:00:00Z in seconds, ms, µs and ns, plus unusable values
+    timestamps = [1709294400, 1709294400.5, 1709294400000, 1709294400000000, 1709294400000000000,
+                  1e300, float("nan"), "2024-03-02T00:00:00Z"]
+    lines = [
+        json.dumps({"model": "gpt-4", "input_tokens": 1, "output_tokens": 1, "timestamp": timestamp})
+        for timestamp in timestamps
+    ]
+    groups, skipped = aggregate_lines(lines, group_by=("day",))
+    assert skipped == 0
+    assert {key: stats.requests for key, stats in groups.items()} == {
+        ("2024-03-01",): 5, ("unknown",): 2, ("2024-03-02",): 1
+    }
+
+
+if __name__ == "__main__":
+    tests = [(name, test) for name, test in globals().items() if name.startswith("test_")]
+    failed = 0
+    for name, test in tests:
+        try:
+            test()
+            print(f"✓ {name}")
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {name}: {e}")
+    sys.exit(1 if failed else 0)